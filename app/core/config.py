@@ -11,6 +11,48 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 # Database
 DATABASE_URL = os.environ["DATABASE_URL"]
+ENTITY_CACHE_SIZE = 10_000
+# Connection pool: connections kept open, the most ever open, seconds to wait for a free one,
+# and how long a connection may sit idle before it is pinged on checkout
+DB_POOL_MIN_CONNECTIONS = int(os.getenv("DB_POOL_MIN_CONNECTIONS", "1"))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "5"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_VALIDATE_IDLE_SECONDS = float(os.getenv("DB_POOL_VALIDATE_IDLE_SECONDS", "30"))
+# Connections in the asyncio pool (requires the "async" extra; PostgreSQL only)
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_POOL_SIZE", "10"))
+# Rows fetched per round trip when streaming query results through a server-side cursor
+QUERY_ITERSIZE = int(os.getenv("QUERY_ITERSIZE", "2000"))
+# Bulk rate ingestion: "copy" (COPY into a staging table) or "values" (multi-row INSERT)
+RATE_INGEST_METHOD = os.getenv("RATE_INGEST_METHOD", "copy")
+# Rate storage: "snapshot" writes a row per scrape; "interval" writes a row only when buy or
+# sell changes and extends the current row's last_seen_at on unchanged scrapes
+RATE_STORAGE_MODE = os.getenv("RATE_STORAGE_MODE", "snapshot")
+
+# Streaming pipeline: scraped pages are stored and committed in chunks of about this many records
+PIPELINE_CHUNK_RECORDS = int(os.getenv("PIPELINE_CHUNK_RECORDS", "500"))
+# A chunk is also committed once its oldest page has waited this long, so a slow page never holds back the others
+PIPELINE_CHUNK_MAX_AGE_SECONDS = float(os.getenv("PIPELINE_CHUNK_MAX_AGE_SECONDS", "10"))
+# Pipeline runner: "threads" (scraper thread pools, chunks stored between pages) or "asyncio"
+# (fetches, parsing in worker processes and batched writes run as concurrent stages)
+PIPELINE_RUNNER = os.getenv("PIPELINE_RUNNER", "threads")
+# Parser processes for the asyncio runner; 0 parses in threads of the event loop
+PIPELINE_PARSE_WORKERS = int(os.getenv("PIPELINE_PARSE_WORKERS", "2"))
+
+# Raw page archive: every fetched page, gzipped and content-addressed
+ARCHIVE_PAGES = os.getenv("ARCHIVE_PAGES", "true").lower() == "true"
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", BASE_DIR / "archive"))
+
+# Monthly exchange_rates partitions: created this many months ahead; raw partitions older
+# than the retention window are detached, exported to PARTITION_ARCHIVE_DIR and dropped
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "2"))
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "24"))
+PARTITION_ARCHIVE_DIR = Path(os.getenv("PARTITION_ARCHIVE_DIR", ARCHIVE_DIR / "partitions"))
+
+# Columnar history export (requires the "analytics" extra): one file per currency and month,
+# "arrow" (IPC, memory-mapped without copying when analysed) or "parquet" (smaller on disk)
+EXPORT_DIR = Path(os.getenv("EXPORT_DIR", BASE_DIR / "export"))
+EXPORT_FORMAT = os.getenv("EXPORT_FORMAT", "arrow")
+EXPORT_BATCH_ROWS = 50_000
 
 # Timezone
 TIMEZONE = ZoneInfo("Europe/Bucharest")
@@ -19,6 +61,37 @@ TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M"
 # Scraper URLs
 BNR_URL = "https://www.cursbnr.ro/curs-valutar-banci"
 VALUTARE_URL = "https://www.valutare.ro/curs/curs-valutar-{}-case-de-schimb.html"
+BNR_HTTP_URL = os.getenv("BNR_HTTP_URL", BNR_URL + "?valuta={}")
+
+# Fetching: "http" pulls pages with a pooled HTTP client and falls back to Selenium
+# when a page cannot be fetched or parsed; "selenium" always drives Chrome.
+SCRAPER_FETCH_MODE = os.getenv("SCRAPER_FETCH_MODE", "http")
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "15"))
+HTTP_POOL_SIZE = 10
+
+# Parsing: "bs4" (BeautifulSoup, always available) or "lxml" (requires the "fast" extra)
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "bs4")
+
+# Valutare in-browser extraction: "script" returns rows as JSON from one execute_script
+# call; "html" transfers driver.page_source and parses it in Python.
+VALUTARE_EXTRACTION_MODE = os.getenv("VALUTARE_EXTRACTION_MODE", "script")
+
+# Concurrent scraping: worker threads and wall-clock budget per source
+BNR_MAX_WORKERS = 3
+BNR_TIMEOUT_SECONDS = 90.0
+VALUTARE_MAX_WORKERS = 3
+VALUTARE_TIMEOUT_SECONDS = 120.0
+
+# Page waits: upper bounds for condition-based waits (seconds)
+WAIT_TIMEOUT_SECONDS = 15.0
+# Browser calls: a page load or script that hangs raises instead of blocking its worker thread,
+# which a source timeout can abandon but not stop
+DRIVER_PAGE_LOAD_TIMEOUT_SECONDS = 30.0
+DRIVER_SCRIPT_TIMEOUT_SECONDS = 15.0
+WAIT_POLL_INTERVAL_SECONDS = 0.1
+WAIT_SETTLE_SECONDS = 0.3
+SCROLL_WAIT_SECONDS = 1.0
+MAX_SCROLL_ATTEMPTS = 10
 
 # Chrome options
 CHROME_OPTIONS = [
@@ -29,6 +102,48 @@ CHROME_OPTIONS = [
 ]
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 
+# Resource blocking: Chrome skips images via preferences and refuses URLs matching
+# BLOCKED_URL_PATTERNS (DevTools Network.setBlockedURLs). A source can re-allow
+# patterns it needs through RESOURCE_ALLOWLIST.
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "true").lower() == "true"
+BLOCKED_URL_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.css",
+    "*.mp4",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googletagservices.com*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*facebook.net*",
+    "*hotjar.com*",
+    "*adservice.google.*",
+]
+RESOURCE_ALLOWLIST = {
+    # Lazy loading is triggered by scroll position, which depends on the page's own layout
+    "Valutare": ["*.css"],
+    "BNR": [],
+}
+
+# Warm driver pool (daemon mode): drivers are recycled after DRIVER_MAX_USES checkouts
+# or once the page's JS heap grows past DRIVER_MAX_HEAP_MB. One browser per scraper worker by
+# default, so no worker waits; a checkout that waits DRIVER_ACQUIRE_TIMEOUT_SECONDS fails the page.
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", str(BNR_MAX_WORKERS + VALUTARE_MAX_WORKERS)))
+DRIVER_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("DRIVER_ACQUIRE_TIMEOUT_SECONDS", "60"))
+DRIVER_MAX_USES = 50
+DRIVER_MAX_HEAP_MB = 512.0
+DAEMON_INTERVAL_SECONDS = float(os.getenv("DAEMON_INTERVAL_SECONDS", "300"))
+
 # Own Office
 OWN_OFFICE_NAME = os.getenv("OWN_OFFICE_NAME")
 OWN_OFFICE_CITY = os.getenv("OWN_OFFICE_CITY")
@@ -0,0 +1,59 @@
+from contextlib import asynccontextmanager
+
+try:
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:  # optional "async" extra
+    AsyncConnectionPool = None
+
+from app.core.config import ASYNC_POOL_SIZE, DATABASE_URL, TIMEZONE
+from app.database.backend import is_sqlite_url
+
+_async_pool = None
+
+
+def require_psycopg():
+    if AsyncConnectionPool is None:
+        raise RuntimeError("psycopg is not installed; install the 'async' extra: pip install .[async]")
+
+
+async def _get_async_pool():
+    """Lazily open and return the asyncio connection pool of the running event loop."""
+    global _async_pool
+    if _async_pool is None or _async_pool.closed:
+        require_psycopg()
+        if is_sqlite_url(DATABASE_URL):
+            raise RuntimeError("The async database layer needs PostgreSQL; DATABASE_URL points at SQLite.")
+        pool = AsyncConnectionPool(
+            DATABASE_URL,
+            min_size=1,
+            max_size=ASYNC_POOL_SIZE,
+            kwargs={"options": f"-c timezone={TIMEZONE.key}"},
+            open=False,
+        )
+        await pool.open()
+        _async_pool = pool
+    return _async_pool
+
+
+@asynccontextmanager
+async def get_async_connection():
+    """
+    Async context manager to acquire and release a psycopg connection from the pool.
+
+    Like get_connection, it neither commits nor rolls back; a connection returned
+    mid-transaction is rolled back by the pool.
+    """
+    pool = await _get_async_pool()
+    conn = await pool.getconn()
+    try:
+        yield conn
+    finally:
+        await pool.putconn(conn)
+
+
+async def close_async_pool():
+    """Close all connections in the asyncio pool."""
+    global _async_pool
+    if _async_pool is not None and not _async_pool.closed:
+        await _async_pool.close()
+    _async_pool = None
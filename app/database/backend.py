@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import functools
+import sqlite3
+from types import ModuleType
+
+SQLITE_SCHEME = "sqlite:///"
+
+
+def is_sqlite_url(url: str) -> bool:
+    """Whether DATABASE_URL points at an embedded SQLite file, e.g. sqlite:///data/market_watch.db."""
+    return url.startswith(SQLITE_SCHEME)
+
+
+def sqlite_path(url: str) -> str:
+    """File path of a sqlite:/// URL; sqlite:////abs/path is absolute and sqlite:///:memory: in-memory."""
+    return url.removeprefix(SQLITE_SCHEME)
+
+
+def is_sqlite(conn) -> bool:
+    """Whether `conn` is an embedded SQLite connection rather than a psycopg2 one."""
+    return isinstance(conn, sqlite3.Connection)
+
+
+def sqlite_variant(module: ModuleType):
+    """
+    Route calls made with a SQLite connection to the same-named function of `module`.
+
+    Repository functions keep one public signature for both backends; the decorated
+    function is the Postgres implementation.
+    """
+
+    def decorate(func):
+        embedded = getattr(module, func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            if is_sqlite(conn):
+                return embedded(conn, *args, **kwargs)
+            return func(conn, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -1,27 +1,79 @@
-from contextlib import contextmanager
+from __future__ import annotations
 
-import psycopg2.pool
+import sqlite3
+import threading
+from contextlib import contextmanager
 
-from app.core.config import DATABASE_URL
+from app.core.config import (
+    DATABASE_URL,
+    DB_POOL_MAX_CONNECTIONS,
+    DB_POOL_MIN_CONNECTIONS,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_VALIDATE_IDLE_SECONDS,
+    TIMEZONE,
+)
+from app.database.backend import is_sqlite_url, sqlite_path
+from app.database.pool import ConnectionPool, PoolStats
 
 _pool = None
+_sqlite_conn = None
+_sqlite_lock = threading.RLock()
+_pool_lock = threading.Lock()
 
 
 def _get_pool():
     """Lazily initialise and return the connection pool."""
     global _pool
-    if _pool is None or _pool.closed:
-        _pool = psycopg2.pool.SimpleConnectionPool(
-            minconn=1,
-            maxconn=5,
-            dsn=DATABASE_URL,
-        )
-    return _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = ConnectionPool(
+                DATABASE_URL,
+                minconn=DB_POOL_MIN_CONNECTIONS,
+                maxconn=DB_POOL_MAX_CONNECTIONS,
+                timeout=DB_POOL_TIMEOUT_SECONDS,
+                validate_idle_seconds=DB_POOL_VALIDATE_IDLE_SECONDS,
+                options=f"-c timezone={TIMEZONE.key}",
+            )
+        return _pool
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """Open an embedded database file (or ":memory:") with the settings the repositories rely on."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA foreign_keys = ON")
+    # WAL lets readers such as query_rates.py run while the pipeline writes
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA busy_timeout = 5000")
+    return conn
+
+
+def _get_sqlite_conn():
+    """Lazily open the process-wide embedded connection."""
+    global _sqlite_conn
+    if _sqlite_conn is None:
+        _sqlite_conn = connect_sqlite(sqlite_path(DATABASE_URL))
+    return _sqlite_conn
 
 
 @contextmanager
 def get_connection():
-    """Context manager to acquire and automatically release a connection to the pool."""
+    """
+    Context manager to acquire and automatically release a connection to the pool.
+
+    It never commits; whatever the caller left uncommitted, including a transaction
+    aborted by an error, is rolled back when the connection goes back to the pool.
+    """
+    if is_sqlite_url(DATABASE_URL):
+        # SQLite allows one writer at a time, so threads take turns on a single connection
+        with _sqlite_lock:
+            conn = _get_sqlite_conn()
+            try:
+                yield conn
+            finally:
+                conn.rollback()
+        return
+
     pool = _get_pool()
     conn = pool.getconn()
     try:
@@ -30,9 +82,20 @@ def get_connection():
         pool.putconn(conn)
 
 
+def get_pool_stats() -> PoolStats | None:
+    """Wait and checkout-duration counters of the PostgreSQL pool, or None if it isn't open."""
+    if _pool is None or _pool.closed:
+        return None
+    return _pool.stats()
+
+
 def close_pool():
     """Close all connections in the pool."""
-    global _pool
+    global _pool, _sqlite_conn
     if _pool is not None and not _pool.closed:
         _pool.closeall()
         _pool = None
+    if _sqlite_conn is not None:
+        _sqlite_conn.close()
+        _sqlite_conn = None
+        _sqlite_conn = None
@@ -1,22 +1,88 @@
+import sqlite3
 from pathlib import Path
 
 import psycopg2
 
+from app.database.backend import is_sqlite
 from app.database.connection import get_connection
 
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+# Converts the NUMERIC/VARCHAR/TIMESTAMP layout to the compact one of schema.sql; it only
+# applies to the old layout and every later migration only to the compact one
+COMPACT_LAYOUT_MIGRATION = "001_compact_exchange_rates"
+
+SCHEMA_PATH = Path(__file__).resolve().parent / "schema.sql"
+SQLITE_SCHEMA_PATH = Path(__file__).resolve().parent / "schema_sqlite.sql"
+
+
+def apply_schema(conn):
+    """Create or update the schema: schema.sql on Postgres, schema_sqlite.sql on an embedded database."""
+    if is_sqlite(conn):
+        conn.executescript(SQLITE_SCHEMA_PATH.read_text())
+        return
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_PATH.read_text())
+
 
 def init_db():
     try:
         with get_connection() as conn:
-            with conn.cursor() as cur:
-                schema_path = Path(__file__).resolve().parent / "schema.sql"
-                with open(schema_path, "r") as f:
-                    cur.execute(f.read())
+            apply_schema(conn)
             conn.commit()
-            print("Connected to PostgreSQL database successfully. Schema initialised.")
-    except psycopg2.OperationalError as e:
+            backend = "SQLite" if is_sqlite(conn) else "PostgreSQL"
+            print(f"Connected to {backend} database successfully. Schema initialised.")
+    except (psycopg2.OperationalError, sqlite3.OperationalError) as e:
         print("Failed to connect to database: ", e)
 
 
+def list_migrations() -> list[str]:
+    """Return the available migration names, in the order they should be applied."""
+    return sorted(path.stem for path in MIGRATIONS_DIR.glob("*.sql"))
+
+
+def _has_compact_layout(cur) -> bool:
+    cur.execute(
+        """
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'exchange_rates' AND column_name = 'currency_id'
+        """
+    )
+    return cur.fetchone() is not None
+
+
+def apply_migration(conn, name: str):
+    """
+    Run one migration on the layout it was written for, then schema.sql so functions,
+    triggers and views match.
+    """
+    if is_sqlite(conn):
+        raise ValueError("Migrations apply to PostgreSQL only; an embedded database is created by init_db.")
+    name = name.removesuffix(".sql")
+    path = MIGRATIONS_DIR / f"{name}.sql"
+    if not path.exists():
+        raise ValueError(f"Unknown migration '{name}'. Available: {', '.join(list_migrations())}")
+
+    with conn.cursor() as cur:
+        compact = _has_compact_layout(cur)
+        if name == COMPACT_LAYOUT_MIGRATION and compact:
+            raise ValueError(f"Migration '{name}' has already converted this database to the compact layout.")
+        if name != COMPACT_LAYOUT_MIGRATION and not compact:
+            raise ValueError(f"Migration '{name}' needs the compact layout; apply {COMPACT_LAYOUT_MIGRATION} first.")
+
+        cur.execute(path.read_text())
+        cur.execute(SCHEMA_PATH.read_text())
+
+
+def run_migration(name: str):
+    """Apply one migration from the migrations directory in a single transaction."""
+    with get_connection() as conn:
+        try:
+            apply_migration(conn, name)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,98 @@
+-- Convert exchange_rates from the NUMERIC/VARCHAR/TIMESTAMP layout (plain or partitioned)
+-- to the compact, monthly-partitioned layout of schema.sql: currency codes move to the
+-- currencies table, rates become integer micro-RON and timestamps become timestamptz.
+-- Naive timestamps are read in the session time zone, which the app's connections set to
+-- TIMEZONE. Row ids are kept. Runs in one transaction; writers wait while the rows are copied.
+-- current_rates and rate_rollups are not filled here: on a database that didn't have them,
+-- schema.sql (re-applied after this migration) creates them empty. Run
+-- 003_rebuild_current_rates and 004_rebuild_rate_rollups next.
+
+ALTER TABLE exchange_rates ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP;
+LOCK TABLE exchange_rates IN EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS currencies (
+    id SMALLSERIAL PRIMARY KEY,
+    code VARCHAR(10) NOT NULL UNIQUE
+);
+
+INSERT INTO currencies (code)
+SELECT DISTINCT currency
+FROM exchange_rates
+ORDER BY currency
+ON CONFLICT (code) DO NOTHING;
+
+CREATE TEMP TABLE exchange_rates_migrating ON COMMIT DROP AS
+SELECT
+    er.id,
+    er.entity_id,
+    c.id AS currency_id,
+    round(er.buy_rate * 1000000)::INTEGER AS buy_micros,
+    round(er.sell_rate * 1000000)::INTEGER AS sell_micros,
+    er.scraped_at::TIMESTAMPTZ AS scraped_at,
+    er.last_seen_at::TIMESTAMPTZ AS last_seen_at
+FROM exchange_rates er
+JOIN currencies c ON c.code = er.currency;
+
+-- Drops the old partitions, indexes and triggers with it; schema.sql recreates the triggers
+DROP TABLE exchange_rates;
+
+CREATE TABLE exchange_rates (
+    id SERIAL,
+    entity_id INTEGER NOT NULL,
+    currency_id SMALLINT NOT NULL,
+    buy_micros INTEGER NOT NULL,
+    sell_micros INTEGER NOT NULL,
+    scraped_at TIMESTAMPTZ NOT NULL,
+    last_seen_at TIMESTAMPTZ,
+    PRIMARY KEY (id, scraped_at),
+    FOREIGN KEY (entity_id) REFERENCES entities(id),
+    FOREIGN KEY (currency_id) REFERENCES currencies(id),
+    UNIQUE(entity_id, currency_id, scraped_at)
+) PARTITION BY RANGE (scraped_at);
+
+CREATE TABLE exchange_rates_default PARTITION OF exchange_rates DEFAULT;
+
+-- One partition per month with history; schema.sql adds the current and upcoming months
+DO $$
+DECLARE
+    month_first DATE;
+BEGIN
+    FOR month_first IN
+        SELECT generate_series(
+            date_trunc('month', MIN(scraped_at)),
+            date_trunc('month', MAX(scraped_at)),
+            INTERVAL '1 month'
+        )::date
+        FROM exchange_rates_migrating
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF exchange_rates FOR VALUES FROM (%L) TO (%L)',
+            'exchange_rates_p' || to_char(month_first, 'YYYY_MM'),
+            month_first,
+            (month_first + INTERVAL '1 month')::date
+        );
+    END LOOP;
+END;
+$$;
+
+INSERT INTO exchange_rates
+(id, entity_id, currency_id, buy_micros, sell_micros, scraped_at, last_seen_at)
+SELECT id, entity_id, currency_id, buy_micros, sell_micros, scraped_at, last_seen_at
+FROM exchange_rates_migrating;
+
+SELECT setval(pg_get_serial_sequence('exchange_rates', 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL)
+FROM exchange_rates;
+
+ALTER TABLE IF EXISTS page_fingerprints
+    ALTER COLUMN changed_at TYPE TIMESTAMPTZ,
+    ALTER COLUMN last_seen_at TYPE TIMESTAMPTZ;
+
+ALTER TABLE IF EXISTS current_rates
+    ALTER COLUMN scraped_at TYPE TIMESTAMPTZ,
+    ALTER COLUMN last_seen_at TYPE TIMESTAMPTZ;
+
+ALTER TABLE IF EXISTS rate_rollups
+    ALTER COLUMN open_at TYPE TIMESTAMPTZ,
+    ALTER COLUMN close_at TYPE TIMESTAMPTZ;
+
+ANALYZE exchange_rates;
@@ -0,0 +1,45 @@
+-- Compact snapshot history into change-only intervals (RATE_STORAGE_MODE=interval).
+-- Consecutive rows of an entity/currency with the same buy and sell rates collapse into
+-- the first row of the run, whose last_seen_at becomes the run's last sighting.
+-- current_rates and rate_rollups follow the deleted rows through their delete triggers.
+
+WITH ordered AS (
+    SELECT
+        id,
+        entity_id,
+        currency_id,
+        scraped_at,
+        COALESCE(last_seen_at, scraped_at) AS last_seen_at,
+        (buy_micros, sell_micros) IS DISTINCT FROM (
+            LAG(buy_micros) OVER w,
+            LAG(sell_micros) OVER w
+        ) AS starts_run
+    FROM exchange_rates
+    WINDOW w AS (PARTITION BY entity_id, currency_id ORDER BY scraped_at)
+),
+runs AS (
+    SELECT
+        id,
+        entity_id,
+        currency_id,
+        last_seen_at,
+        starts_run,
+        SUM(starts_run::int) OVER (PARTITION BY entity_id, currency_id ORDER BY scraped_at) AS run
+    FROM ordered
+),
+run_bounds AS (
+    SELECT MIN(id) FILTER (WHERE starts_run) AS keep_id, MAX(last_seen_at) AS last_seen_at
+    FROM runs
+    GROUP BY entity_id, currency_id, run
+),
+extended AS (
+    UPDATE exchange_rates er
+    SET last_seen_at = rb.last_seen_at
+    FROM run_bounds rb
+    WHERE er.id = rb.keep_id
+)
+DELETE FROM exchange_rates er
+USING runs r
+WHERE er.id = r.id AND NOT r.starts_run;
+
+ANALYZE exchange_rates;
@@ -0,0 +1,13 @@
+-- Rebuild current_rates from the full history, e.g. after 001_compact_exchange_rates
+-- converted a database created before the table existed.
+
+TRUNCATE current_rates;
+
+INSERT INTO current_rates
+(entity_id, currency, rate_id, buy_rate, sell_rate, scraped_at, last_seen_at)
+SELECT DISTINCT ON (entity_id, currency)
+    entity_id, currency, id, buy_rate, sell_rate, scraped_at, last_seen_at
+FROM exchange_rates_decoded
+ORDER BY entity_id, currency, scraped_at DESC;
+
+ANALYZE current_rates;
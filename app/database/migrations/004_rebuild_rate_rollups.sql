@@ -0,0 +1,34 @@
+-- Rebuild rate_rollups from the full history in local hour and day buckets, e.g. after
+-- 001_compact_exchange_rates converted a database created before the table existed.
+-- Later inserts are merged in by the exchange_rates_rollups_insert trigger.
+
+TRUNCATE rate_rollups;
+
+INSERT INTO rate_rollups (
+    grain, entity_id, currency, bucket, open_at, close_at,
+    open_buy, high_buy, low_buy, close_buy, sum_buy,
+    open_sell, high_sell, low_sell, close_sell, sum_sell, samples
+)
+SELECT
+    g.grain,
+    er.entity_id,
+    er.currency,
+    date_trunc(g.grain, er.scraped_at::timestamp),
+    MIN(er.scraped_at),
+    MAX(er.scraped_at),
+    (array_agg(er.buy_rate ORDER BY er.scraped_at))[1],
+    MAX(er.buy_rate),
+    MIN(er.buy_rate),
+    (array_agg(er.buy_rate ORDER BY er.scraped_at DESC))[1],
+    SUM(er.buy_rate),
+    (array_agg(er.sell_rate ORDER BY er.scraped_at))[1],
+    MAX(er.sell_rate),
+    MIN(er.sell_rate),
+    (array_agg(er.sell_rate ORDER BY er.scraped_at DESC))[1],
+    SUM(er.sell_rate),
+    COUNT(*)
+FROM exchange_rates_decoded er
+CROSS JOIN (VALUES ('hour'), ('day')) AS g (grain)
+GROUP BY g.grain, er.entity_id, er.currency, date_trunc(g.grain, er.scraped_at::timestamp);
+
+ANALYZE rate_rollups;
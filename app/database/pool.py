@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError
+
+
+@dataclass
+class PoolStats:
+    """Counters since the pool was created; times are in seconds."""
+
+    size: int = 0
+    idle: int = 0
+    checkouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    total_held: float = 0.0
+    max_held: float = 0.0
+    timeouts: int = 0
+    reconnects: int = 0
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.checkouts if self.checkouts else 0.0
+
+    @property
+    def avg_held(self) -> float:
+        return self.total_held / self.checkouts if self.checkouts else 0.0
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    getconn blocks up to `timeout` seconds when all `maxconn` connections are checked out.
+    A connection that is closed, or has been idle for `validate_idle_seconds` or more and
+    fails a SELECT 1, is replaced on checkout. putconn rolls back whatever the caller left
+    open and drops broken connections. Idle connections are reused newest first, so the
+    ones in steady use stay warm.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        minconn: int = 1,
+        maxconn: int = 5,
+        timeout: float = 30.0,
+        validate_idle_seconds: float = 30.0,
+        **connect_kwargs,
+    ):
+        if not 0 <= minconn <= maxconn or maxconn < 1:
+            raise ValueError(f"Invalid pool size: minconn={minconn}, maxconn={maxconn}.")
+        self.dsn = dsn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate_idle_seconds = validate_idle_seconds
+        self.connect_kwargs = connect_kwargs
+        self.closed = False
+
+        self._cond = threading.Condition()
+        self._idle: list[tuple[psycopg2.extensions.connection, float]] = []
+        self._checked_out: dict[int, float] = {}
+        self._stats = PoolStats()
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+        self._stats.size = minconn
+
+    def _connect(self):
+        return psycopg2.connect(self.dsn, **self.connect_kwargs)
+
+    def getconn(self):
+        """Check out a validated connection, waiting for one to be returned if the pool is full."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            while True:
+                if self.closed:
+                    raise PoolError("connection pool is closed")
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    break
+                if self._stats.size < self.maxconn:
+                    conn, idle_since = None, None
+                    self._stats.size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats.timeouts += 1
+                    raise PoolError(f"no connection available within {self.timeout}s ({self.maxconn} in use)")
+                self._cond.wait(remaining)
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif not self._usable(conn, idle_since):
+                conn.close()
+                conn = self._connect()
+                with self._cond:
+                    self._stats.reconnects += 1
+        except BaseException:
+            with self._cond:
+                self._stats.size -= 1
+                self._cond.notify()
+            raise
+
+        checked_out = time.monotonic()
+        with self._cond:
+            wait = checked_out - start
+            self._checked_out[id(conn)] = checked_out
+            self._stats.checkouts += 1
+            self._stats.total_wait += wait
+            self._stats.max_wait = max(self._stats.max_wait, wait)
+        return conn
+
+    def _usable(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.validate_idle_seconds:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def putconn(self, conn, close: bool = False):
+        """Return a connection, rolling back any open transaction; broken connections are dropped."""
+        if not close and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+        close = close or bool(conn.closed)
+
+        with self._cond:
+            checked_out = self._checked_out.pop(id(conn), None)
+            if checked_out is not None:
+                held = time.monotonic() - checked_out
+                self._stats.total_held += held
+                self._stats.max_held = max(self._stats.max_held, held)
+            if close or self.closed:
+                self._stats.size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if close or self.closed:
+            conn.close()
+
+    def stats(self) -> PoolStats:
+        """A snapshot of the pool's size and counters."""
+        with self._cond:
+            return PoolStats(**{**vars(self._stats), "idle": len(self._idle)})
+
+    def closeall(self):
+        """Close idle connections now and checked-out ones when they are returned."""
+        with self._cond:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._stats.size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            conn.close()
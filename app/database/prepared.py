@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import re
+import threading
+import weakref
+from dataclasses import dataclass
+
+# Names already prepared on each psycopg2 connection; PREPARE outlives transactions, so a
+# statement stays prepared until its connection closes
+_prepared: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+_PLACEHOLDER = re.compile(r"%s")
+
+
+@dataclass(frozen=True)
+class PreparedStatement:
+    """
+    A hot statement planned server-side once per connection, then run with EXECUTE.
+
+    `sql` uses %s placeholders like any other query; `types` declares one PostgreSQL
+    type per placeholder, so parameters never need to be inferred from context.
+    """
+
+    name: str
+    sql: str
+    types: tuple[str, ...]
+
+    def __post_init__(self):
+        if "%%" in self.sql or len(_PLACEHOLDER.findall(self.sql)) != len(self.types):
+            raise ValueError(f"Prepared statement '{self.name}' needs exactly one type per %s placeholder.")
+
+    def execute(self, cursor, params: tuple):
+        """Run the statement on cursor's connection, preparing it first if that connection hasn't."""
+        conn = cursor.connection
+        with _lock:
+            names = _prepared.setdefault(conn, set())
+        if self.name not in names:
+            numbered = iter(range(1, len(self.types) + 1))
+            body = _PLACEHOLDER.sub(lambda _: f"${next(numbered)}", self.sql)
+            cursor.execute(f"PREPARE {self.name}{_arguments(self.types)} AS {body}")
+            names.add(self.name)
+        cursor.execute(f"EXECUTE {self.name}{_arguments(['%s'] * len(self.types))}", params)
+
+
+def _arguments(items) -> str:
+    return f" ({', '.join(items)})" if items else ""
+
+
+def prepared_names(conn) -> set[str]:
+    """Statements prepared so far on conn."""
+    with _lock:
+        return set(_prepared.get(conn, ()))
@@ -7,16 +7,336 @@ CREATE TABLE IF NOT EXISTS entities (
     UNIQUE(platform_source, name, city)
 );
 
+-- Currency codes, referenced by a SMALLINT from every exchange_rates row
+CREATE TABLE IF NOT EXISTS currencies (
+    id SMALLSERIAL PRIMARY KEY,
+    code VARCHAR(10) NOT NULL UNIQUE
+);
+
+-- Compact layout: rates are integer micro-RON (rate * 1,000,000, so at most ~2147 RON) and
+-- timestamps are timestamptz. Partitioned by month on scraped_at; see create_rate_partition below.
 CREATE TABLE IF NOT EXISTS exchange_rates (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
+    entity_id INTEGER NOT NULL,
+    currency_id SMALLINT NOT NULL,
+    buy_micros INTEGER NOT NULL,
+    sell_micros INTEGER NOT NULL,
+    scraped_at TIMESTAMPTZ NOT NULL,
+    -- Interval storage: scraped_at is when a rate first appeared, last_seen_at the latest
+    -- scrape that still showed it (NULL when it was only seen once)
+    last_seen_at TIMESTAMPTZ,
+    PRIMARY KEY (id, scraped_at),
+    FOREIGN KEY (entity_id) REFERENCES entities(id),
+    FOREIGN KEY (currency_id) REFERENCES currencies(id),
+    UNIQUE(entity_id, currency_id, scraped_at)
+) PARTITION BY RANGE (scraped_at);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'exchange_rates' AND column_name = 'currency_id'
+    ) THEN
+        RAISE EXCEPTION 'exchange_rates uses the old layout; run: python -m scripts.migrate 001_compact_exchange_rates';
+    END IF;
+END;
+$$;
+
+-- One partition per calendar month (in the session time zone), named exchange_rates_pYYYY_MM.
+-- Rows for the month already in the default partition (e.g. replays of old pages) would make
+-- CREATE ... PARTITION OF fail, so the default partition is detached while they are moved.
+CREATE OR REPLACE FUNCTION create_rate_partition(month_start DATE, parent TEXT DEFAULT 'exchange_rates')
+RETURNS TEXT AS $$
+DECLARE
+    month_first DATE := date_trunc('month', month_start)::date;
+    month_end DATE := (month_first + INTERVAL '1 month')::date;
+    partition_name TEXT := 'exchange_rates_p' || to_char(month_first, 'YYYY_MM');
+    default_partition REGCLASS;
+    has_rows BOOLEAN := FALSE;
+BEGIN
+    IF to_regclass(quote_ident(partition_name)) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    SELECT NULLIF(pt.partdefid, 0)::regclass INTO default_partition
+    FROM pg_partitioned_table pt
+    WHERE pt.partrelid = parent::regclass;
+    IF default_partition IS NOT NULL THEN
+        EXECUTE format(
+            'SELECT EXISTS (SELECT 1 FROM %s WHERE scraped_at >= %L AND scraped_at < %L)',
+            default_partition, month_first, month_end
+        ) INTO has_rows;
+    END IF;
+
+    IF NOT has_rows THEN
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            partition_name, parent, month_first, month_end
+        );
+        RETURN partition_name;
+    END IF;
+
+    -- Rows move between the partitions directly, so the parent's triggers don't see them
+    EXECUTE format('ALTER TABLE %I DETACH PARTITION %s', parent, default_partition);
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, parent, month_first, month_end
+    );
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM %s WHERE scraped_at >= %L AND scraped_at < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        default_partition, month_first, month_end, partition_name
+    );
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %s DEFAULT', parent, default_partition);
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rows outside every monthly partition (e.g. replays of old pages) land in the default one
+CREATE TABLE IF NOT EXISTS exchange_rates_default PARTITION OF exchange_rates DEFAULT;
+
+SELECT create_rate_partition((date_trunc('month', LOCALTIMESTAMP) + make_interval(months => m))::date)
+FROM generate_series(0, 2) AS m;
+
+-- exchange_rates with decoded currency codes and NUMERIC rates, for reads and reporting
+CREATE OR REPLACE VIEW exchange_rates_decoded AS
+SELECT
+    er.id,
+    er.entity_id,
+    c.code AS currency,
+    (er.buy_micros / 1000000.0)::NUMERIC(12, 6) AS buy_rate,
+    (er.sell_micros / 1000000.0)::NUMERIC(12, 6) AS sell_rate,
+    er.scraped_at,
+    er.last_seen_at
+FROM exchange_rates er
+JOIN currencies c ON c.id = er.currency_id;
+
+CREATE TABLE IF NOT EXISTS page_fingerprints (
+    platform_source VARCHAR(255) NOT NULL,
+    currency VARCHAR(10) NOT NULL,
+    fingerprint CHAR(64) NOT NULL,
+    changed_at TIMESTAMPTZ NOT NULL,
+    last_seen_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (platform_source, currency)
+);
+
+-- Latest rate per entity and currency, kept current by the triggers below so
+-- latest-rate lookups never scan the history
+CREATE TABLE IF NOT EXISTS current_rates (
     entity_id INTEGER NOT NULL,
     currency VARCHAR(10) NOT NULL,
+    rate_id INTEGER NOT NULL,
     buy_rate NUMERIC(12, 6) NOT NULL,
     sell_rate NUMERIC(12, 6) NOT NULL,
-    scraped_at TIMESTAMP NOT NULL,
-    FOREIGN KEY (entity_id) REFERENCES entities(id),
-    UNIQUE(entity_id, currency, scraped_at)
+    scraped_at TIMESTAMPTZ NOT NULL,
+    last_seen_at TIMESTAMPTZ,
+    PRIMARY KEY (entity_id, currency),
+    FOREIGN KEY (entity_id) REFERENCES entities(id)
 );
 
-CREATE INDEX IF NOT EXISTS idx_rates_entity_currency_time
-ON exchange_rates(entity_id, currency, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_current_rates_currency
+ON current_rates(currency);
+
+CREATE OR REPLACE FUNCTION upsert_current_rates() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO current_rates
+    (entity_id, currency, rate_id, buy_rate, sell_rate, scraped_at, last_seen_at)
+    SELECT DISTINCT ON (n.entity_id, n.currency_id)
+        n.entity_id, c.code, n.id, n.buy_micros / 1000000.0, n.sell_micros / 1000000.0,
+        n.scraped_at, n.last_seen_at
+    FROM changed_rates n
+    JOIN currencies c ON c.id = n.currency_id
+    ORDER BY n.entity_id, n.currency_id, n.scraped_at DESC
+    ON CONFLICT (entity_id, currency) DO UPDATE
+    SET rate_id = EXCLUDED.rate_id,
+        buy_rate = EXCLUDED.buy_rate,
+        sell_rate = EXCLUDED.sell_rate,
+        scraped_at = EXCLUDED.scraped_at,
+        last_seen_at = EXCLUDED.last_seen_at
+    WHERE EXCLUDED.scraped_at >= current_rates.scraped_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rebuild_deleted_current_rates() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM current_rates cr
+    USING changed_rates d
+    WHERE cr.rate_id = d.id;
+
+    INSERT INTO current_rates
+    (entity_id, currency, rate_id, buy_rate, sell_rate, scraped_at, last_seen_at)
+    SELECT DISTINCT ON (er.entity_id, er.currency_id)
+        er.entity_id, c.code, er.id, er.buy_micros / 1000000.0, er.sell_micros / 1000000.0,
+        er.scraped_at, er.last_seen_at
+    FROM exchange_rates er
+    JOIN (SELECT DISTINCT entity_id, currency_id FROM changed_rates) k
+        ON k.entity_id = er.entity_id AND k.currency_id = er.currency_id
+    JOIN currencies c ON c.id = er.currency_id
+    ORDER BY er.entity_id, er.currency_id, er.scraped_at DESC
+    ON CONFLICT (entity_id, currency) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS exchange_rates_current_insert ON exchange_rates;
+CREATE TRIGGER exchange_rates_current_insert
+AFTER INSERT ON exchange_rates
+REFERENCING NEW TABLE AS changed_rates
+FOR EACH STATEMENT EXECUTE FUNCTION upsert_current_rates();
+
+DROP TRIGGER IF EXISTS exchange_rates_current_update ON exchange_rates;
+CREATE TRIGGER exchange_rates_current_update
+AFTER UPDATE ON exchange_rates
+REFERENCING NEW TABLE AS changed_rates
+FOR EACH STATEMENT EXECUTE FUNCTION upsert_current_rates();
+
+DROP TRIGGER IF EXISTS exchange_rates_current_delete ON exchange_rates;
+CREATE TRIGGER exchange_rates_current_delete
+AFTER DELETE ON exchange_rates
+REFERENCING OLD TABLE AS changed_rates
+FOR EACH STATEMENT EXECUTE FUNCTION rebuild_deleted_current_rates();
+
+-- OHLC rollups per entity, currency and hour/day bucket, merged incrementally from
+-- each batch of inserted rates. Buckets are local (session time zone) hours and days.
+-- Rollups are change-based: every stored row is one sample in the bucket of its
+-- scraped_at, so with interval storage or skipped unchanged pages a bucket in which no
+-- rate changed has no row. Averages are sum_* / samples.
+CREATE TABLE IF NOT EXISTS rate_rollups (
+    grain VARCHAR(4) NOT NULL CHECK (grain IN ('hour', 'day')),
+    entity_id INTEGER NOT NULL,
+    currency VARCHAR(10) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    open_at TIMESTAMPTZ NOT NULL,
+    close_at TIMESTAMPTZ NOT NULL,
+    open_buy NUMERIC(12, 6) NOT NULL,
+    high_buy NUMERIC(12, 6) NOT NULL,
+    low_buy NUMERIC(12, 6) NOT NULL,
+    close_buy NUMERIC(12, 6) NOT NULL,
+    sum_buy NUMERIC(18, 6) NOT NULL,
+    open_sell NUMERIC(12, 6) NOT NULL,
+    high_sell NUMERIC(12, 6) NOT NULL,
+    low_sell NUMERIC(12, 6) NOT NULL,
+    close_sell NUMERIC(12, 6) NOT NULL,
+    sum_sell NUMERIC(18, 6) NOT NULL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (grain, entity_id, currency, bucket),
+    FOREIGN KEY (entity_id) REFERENCES entities(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rate_rollups_currency_bucket
+ON rate_rollups(grain, currency, bucket);
+
+CREATE OR REPLACE FUNCTION merge_rate_rollups() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO rate_rollups AS r (
+        grain, entity_id, currency, bucket, open_at, close_at,
+        open_buy, high_buy, low_buy, close_buy, sum_buy,
+        open_sell, high_sell, low_sell, close_sell, sum_sell, samples
+    )
+    SELECT
+        g.grain,
+        n.entity_id,
+        c.code,
+        date_trunc(g.grain, n.scraped_at::timestamp),
+        MIN(n.scraped_at),
+        MAX(n.scraped_at),
+        (array_agg(n.buy_micros ORDER BY n.scraped_at))[1] / 1000000.0,
+        MAX(n.buy_micros) / 1000000.0,
+        MIN(n.buy_micros) / 1000000.0,
+        (array_agg(n.buy_micros ORDER BY n.scraped_at DESC))[1] / 1000000.0,
+        SUM(n.buy_micros) / 1000000.0,
+        (array_agg(n.sell_micros ORDER BY n.scraped_at))[1] / 1000000.0,
+        MAX(n.sell_micros) / 1000000.0,
+        MIN(n.sell_micros) / 1000000.0,
+        (array_agg(n.sell_micros ORDER BY n.scraped_at DESC))[1] / 1000000.0,
+        SUM(n.sell_micros) / 1000000.0,
+        COUNT(*)
+    FROM changed_rates n
+    JOIN currencies c ON c.id = n.currency_id
+    CROSS JOIN (VALUES ('hour'), ('day')) AS g (grain)
+    GROUP BY g.grain, n.entity_id, c.code, date_trunc(g.grain, n.scraped_at::timestamp)
+    ON CONFLICT (grain, entity_id, currency, bucket) DO UPDATE
+    SET open_at = LEAST(r.open_at, EXCLUDED.open_at),
+        close_at = GREATEST(r.close_at, EXCLUDED.close_at),
+        open_buy = CASE WHEN EXCLUDED.open_at < r.open_at THEN EXCLUDED.open_buy ELSE r.open_buy END,
+        open_sell = CASE WHEN EXCLUDED.open_at < r.open_at THEN EXCLUDED.open_sell ELSE r.open_sell END,
+        close_buy = CASE WHEN EXCLUDED.close_at > r.close_at THEN EXCLUDED.close_buy ELSE r.close_buy END,
+        close_sell = CASE WHEN EXCLUDED.close_at > r.close_at THEN EXCLUDED.close_sell ELSE r.close_sell END,
+        high_buy = GREATEST(r.high_buy, EXCLUDED.high_buy),
+        high_sell = GREATEST(r.high_sell, EXCLUDED.high_sell),
+        low_buy = LEAST(r.low_buy, EXCLUDED.low_buy),
+        low_sell = LEAST(r.low_sell, EXCLUDED.low_sell),
+        sum_buy = r.sum_buy + EXCLUDED.sum_buy,
+        sum_sell = r.sum_sell + EXCLUDED.sum_sell,
+        samples = r.samples + EXCLUDED.samples;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS exchange_rates_rollups_insert ON exchange_rates;
+CREATE TRIGGER exchange_rates_rollups_insert
+AFTER INSERT ON exchange_rates
+REFERENCING NEW TABLE AS changed_rates
+FOR EACH STATEMENT EXECUTE FUNCTION merge_rate_rollups();
+
+-- Deleted rows (e.g. by interval compaction) have their buckets recomputed from the
+-- rows left in them, so rollups always match a rebuild from history
+CREATE OR REPLACE FUNCTION rebuild_deleted_rate_rollups() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM rate_rollups r
+    USING changed_rates d
+    JOIN currencies c ON c.id = d.currency_id
+    CROSS JOIN (VALUES ('hour'), ('day')) AS g (grain)
+    WHERE r.grain = g.grain
+        AND r.entity_id = d.entity_id
+        AND r.currency = c.code
+        AND r.bucket = date_trunc(g.grain, d.scraped_at::timestamp);
+
+    INSERT INTO rate_rollups (
+        grain, entity_id, currency, bucket, open_at, close_at,
+        open_buy, high_buy, low_buy, close_buy, sum_buy,
+        open_sell, high_sell, low_sell, close_sell, sum_sell, samples
+    )
+    SELECT
+        b.grain,
+        b.entity_id,
+        c.code,
+        b.bucket,
+        MIN(er.scraped_at),
+        MAX(er.scraped_at),
+        (array_agg(er.buy_micros ORDER BY er.scraped_at))[1] / 1000000.0,
+        MAX(er.buy_micros) / 1000000.0,
+        MIN(er.buy_micros) / 1000000.0,
+        (array_agg(er.buy_micros ORDER BY er.scraped_at DESC))[1] / 1000000.0,
+        SUM(er.buy_micros) / 1000000.0,
+        (array_agg(er.sell_micros ORDER BY er.scraped_at))[1] / 1000000.0,
+        MAX(er.sell_micros) / 1000000.0,
+        MIN(er.sell_micros) / 1000000.0,
+        (array_agg(er.sell_micros ORDER BY er.scraped_at DESC))[1] / 1000000.0,
+        SUM(er.sell_micros) / 1000000.0,
+        COUNT(*)
+    FROM (
+        SELECT DISTINCT g.grain, d.entity_id, d.currency_id, date_trunc(g.grain, d.scraped_at::timestamp) AS bucket
+        FROM changed_rates d
+        CROSS JOIN (VALUES ('hour'), ('day')) AS g (grain)
+    ) b
+    JOIN exchange_rates er
+        ON er.entity_id = b.entity_id
+        AND er.currency_id = b.currency_id
+        -- A local bucket can span an extra hour around a DST change; the range keeps the index usable
+        AND er.scraped_at >= b.bucket::timestamptz - INTERVAL '1 hour'
+        AND er.scraped_at < (b.bucket + ('1 ' || b.grain)::interval)::timestamptz + INTERVAL '1 hour'
+        AND date_trunc(b.grain, er.scraped_at::timestamp) = b.bucket
+    JOIN currencies c ON c.id = b.currency_id
+    GROUP BY b.grain, b.entity_id, c.code, b.bucket;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS exchange_rates_rollups_delete ON exchange_rates;
+CREATE TRIGGER exchange_rates_rollups_delete
+AFTER DELETE ON exchange_rates
+REFERENCING OLD TABLE AS changed_rates
+FOR EACH STATEMENT EXECUTE FUNCTION rebuild_deleted_rate_rollups();
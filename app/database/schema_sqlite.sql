@@ -0,0 +1,119 @@
+-- Embedded (SQLite) counterpart of schema.sql, used when DATABASE_URL starts with sqlite:///.
+-- Rates are integer micro-RON like in Postgres; timestamps are UTC text in the fixed
+-- 'YYYY-MM-DD HH:MM:SS.ffffff' format so they sort chronologically. No partitions or rollups.
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY,
+    platform_source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    city TEXT,
+    type TEXT NOT NULL,
+    UNIQUE(platform_source, name, city)
+);
+
+CREATE TABLE IF NOT EXISTS currencies (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS exchange_rates (
+    id INTEGER PRIMARY KEY,
+    entity_id INTEGER NOT NULL REFERENCES entities(id),
+    currency_id INTEGER NOT NULL REFERENCES currencies(id),
+    buy_micros INTEGER NOT NULL,
+    sell_micros INTEGER NOT NULL,
+    scraped_at TEXT NOT NULL,
+    last_seen_at TEXT,
+    UNIQUE(entity_id, currency_id, scraped_at)
+);
+
+CREATE INDEX IF NOT EXISTS idx_exchange_rates_scraped_at
+ON exchange_rates(scraped_at);
+
+CREATE VIEW IF NOT EXISTS exchange_rates_decoded AS
+SELECT
+    er.id,
+    er.entity_id,
+    c.code AS currency,
+    er.buy_micros / 1000000.0 AS buy_rate,
+    er.sell_micros / 1000000.0 AS sell_rate,
+    er.scraped_at,
+    er.last_seen_at
+FROM exchange_rates er
+JOIN currencies c ON c.id = er.currency_id;
+
+CREATE TABLE IF NOT EXISTS page_fingerprints (
+    platform_source TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    last_seen_at TEXT NOT NULL,
+    PRIMARY KEY (platform_source, currency)
+);
+
+-- Latest rate per entity and currency, kept current by the row-level triggers below
+CREATE TABLE IF NOT EXISTS current_rates (
+    entity_id INTEGER NOT NULL REFERENCES entities(id),
+    currency TEXT NOT NULL,
+    rate_id INTEGER NOT NULL,
+    buy_micros INTEGER NOT NULL,
+    sell_micros INTEGER NOT NULL,
+    scraped_at TEXT NOT NULL,
+    last_seen_at TEXT,
+    PRIMARY KEY (entity_id, currency)
+);
+
+CREATE INDEX IF NOT EXISTS idx_current_rates_currency
+ON current_rates(currency);
+
+CREATE INDEX IF NOT EXISTS idx_current_rates_rate_id
+ON current_rates(rate_id);
+
+CREATE TRIGGER IF NOT EXISTS exchange_rates_current_insert
+AFTER INSERT ON exchange_rates
+BEGIN
+    INSERT INTO current_rates
+    (entity_id, currency, rate_id, buy_micros, sell_micros, scraped_at, last_seen_at)
+    SELECT NEW.entity_id, c.code, NEW.id, NEW.buy_micros, NEW.sell_micros, NEW.scraped_at, NEW.last_seen_at
+    FROM currencies c
+    WHERE c.id = NEW.currency_id
+    ON CONFLICT (entity_id, currency) DO UPDATE
+    SET rate_id = excluded.rate_id,
+        buy_micros = excluded.buy_micros,
+        sell_micros = excluded.sell_micros,
+        scraped_at = excluded.scraped_at,
+        last_seen_at = excluded.last_seen_at
+    WHERE excluded.scraped_at >= current_rates.scraped_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS exchange_rates_current_update
+AFTER UPDATE ON exchange_rates
+BEGIN
+    INSERT INTO current_rates
+    (entity_id, currency, rate_id, buy_micros, sell_micros, scraped_at, last_seen_at)
+    SELECT NEW.entity_id, c.code, NEW.id, NEW.buy_micros, NEW.sell_micros, NEW.scraped_at, NEW.last_seen_at
+    FROM currencies c
+    WHERE c.id = NEW.currency_id
+    ON CONFLICT (entity_id, currency) DO UPDATE
+    SET rate_id = excluded.rate_id,
+        buy_micros = excluded.buy_micros,
+        sell_micros = excluded.sell_micros,
+        scraped_at = excluded.scraped_at,
+        last_seen_at = excluded.last_seen_at
+    WHERE excluded.scraped_at >= current_rates.scraped_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS exchange_rates_current_delete
+AFTER DELETE ON exchange_rates
+WHEN EXISTS (SELECT 1 FROM current_rates WHERE rate_id = OLD.id)
+BEGIN
+    DELETE FROM current_rates WHERE rate_id = OLD.id;
+
+    INSERT INTO current_rates
+    (entity_id, currency, rate_id, buy_micros, sell_micros, scraped_at, last_seen_at)
+    SELECT er.entity_id, c.code, er.id, er.buy_micros, er.sell_micros, er.scraped_at, er.last_seen_at
+    FROM exchange_rates er
+    JOIN currencies c ON c.id = er.currency_id
+    WHERE er.entity_id = OLD.entity_id AND er.currency_id = OLD.currency_id
+    ORDER BY er.scraped_at DESC
+    LIMIT 1;
+END;
@@ -9,3 +9,8 @@ class Entity:
     name: str
     city: str | None
     type: str
+
+    @property
+    def key(self) -> tuple[str, str, str | None]:
+        """Natural key matching the entities table's unique constraint."""
+        return (self.platform_source, self.name, self.city)
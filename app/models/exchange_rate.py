@@ -1,4 +1,10 @@
 from dataclasses import dataclass
+from datetime import datetime
+
+from app.core.config import TIMEZONE
+
+# Rates are stored as integer micro-RON: rate * RATE_SCALE
+RATE_SCALE = 1_000_000
 
 
 @dataclass
@@ -11,3 +17,19 @@ class ExchangeRate:
     def __post_init__(self):
         if self.buy <= 0 or self.sell <= 0:
             raise ValueError(f"Invalid rates: buy={self.buy}, sell={self.sell}")
+
+    @property
+    def buy_micros(self) -> int:
+        return round(self.buy * RATE_SCALE)
+
+    @property
+    def sell_micros(self) -> int:
+        return round(self.sell * RATE_SCALE)
+
+    @property
+    def scraped_at(self) -> datetime:
+        """The timestamp as an aware datetime; naive timestamps are local (TIMEZONE) times."""
+        scraped_at = datetime.fromisoformat(self.timestamp)
+        if scraped_at.tzinfo is None:
+            scraped_at = scraped_at.replace(tzinfo=TIMEZONE)
+        return scraped_at
@@ -1,6 +1,19 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+
+@dataclass
+class RateDistribution:
+    """Robust summary of one side (buy or sell) of the competitor rates."""
+
+    median: float
+    trimmed_mean: float
+    winsorized_mean: float
+    std: float
+    mad: float
+    iqr: float
+    percentiles: dict[float, float] = field(default_factory=dict)
 
 
 @dataclass
@@ -11,6 +24,8 @@ class MarketStats:
     avg_buy: float
     avg_sell: float
     competitor_count: int
+    buy: RateDistribution | None = None
+    sell: RateDistribution | None = None
 
 
 @dataclass
@@ -34,3 +49,12 @@ class OwnRateRanking:
     total_competitors: int
     buy_rank_text: str
     sell_rank_text: str
+
+
+@dataclass
+class MarketReport:
+    currency: str
+    stats: MarketStats | None
+    recommendation: RateRecommendation | None
+    ranking: OwnRateRanking
+    error: str | None = None
@@ -0,0 +1 @@
+"""asyncio versions of repository functions, for psycopg AsyncConnection objects (PostgreSQL only)."""
@@ -0,0 +1,32 @@
+from app.models.entity import Entity
+
+# psycopg binds parameters server-side, where a bare "%s IS NULL" has no type to infer
+ENTITY_ID_SQL = """
+    SELECT id FROM entities
+    WHERE platform_source = %s
+    AND name = %s
+    AND city IS NOT DISTINCT FROM %s
+"""
+
+INSERT_ENTITY_SQL = """
+    INSERT INTO entities (platform_source, name, city, type)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (platform_source, name, city) DO NOTHING
+    RETURNING id
+"""
+
+
+async def get_entity_id(conn, entity: Entity):
+    """Check if an entity exists and return its ID, or None if it doesn't exist."""
+    cursor = conn.cursor()
+    await cursor.execute(ENTITY_ID_SQL, entity.key)
+    result = await cursor.fetchone()
+    return result[0] if result else None
+
+
+async def insert_entity(conn, entity: Entity):
+    """Insert a new entity and return its ID."""
+    cursor = conn.cursor()
+    await cursor.execute(INSERT_ENTITY_SQL, (entity.platform_source, entity.name, entity.city, entity.type))
+    result = await cursor.fetchone()
+    return result[0] if result else None
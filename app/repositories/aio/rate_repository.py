@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from app.models.exchange_rate import ExchangeRate
+from app.repositories.rate_repository import (
+    ENSURE_CURRENCIES_SQL,
+    INSERT_RATE_SQL,
+    insert_rate_params,
+    latest_rate_rows,
+    latest_rates_query,
+)
+
+
+async def ensure_currencies(conn, codes) -> None:
+    """Register any currency codes not yet in the currencies table."""
+    cursor = conn.cursor()
+    await cursor.execute(ENSURE_CURRENCIES_SQL, (sorted(set(codes)),))
+
+
+async def insert_exchange_rate(conn, entity_id: int, rate: ExchangeRate):
+    """Insert a new exchange rate record, returning its ID or None if it already exists."""
+    await ensure_currencies(conn, [rate.currency])
+    cursor = conn.cursor()
+    await cursor.execute(INSERT_RATE_SQL, insert_rate_params(entity_id, rate))
+    result = await cursor.fetchone()
+    return result[0] if result else None
+
+
+async def get_latest_rates_by_currency(
+    conn,
+    currency: str,
+    exclude_entity_id: int | None = None,
+    max_age_hours: float | None = None,
+):
+    """Fetch the most recent exchange rate per entity for a given currency from current_rates."""
+    cursor = conn.cursor()
+    await cursor.execute(*latest_rates_query(currency, exclude_entity_id, max_age_hours))
+    return latest_rate_rows(await cursor.fetchall())
@@ -1,37 +1,129 @@
+from __future__ import annotations
+
+from psycopg2.extras import execute_values
+
+from app.database.backend import sqlite_variant
+from app.database.prepared import PreparedStatement
 from app.models.entity import Entity
+from app.repositories.sqlite import entity_repository as embedded
+
+_GET_ENTITY_ID = PreparedStatement(
+    "entity_id_by_key",
+    """
+    SELECT id FROM entities
+    WHERE platform_source = %s
+    AND name = %s
+    AND (city = %s OR (city IS NULL AND %s IS NULL))
+    """,
+    ("varchar", "varchar", "varchar", "varchar"),
+)
 
+_INSERT_ENTITY = PreparedStatement(
+    "insert_entity",
+    """
+    INSERT INTO entities (platform_source, name, city, type)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (platform_source, name, city) DO NOTHING
+    RETURNING id
+    """,
+    ("varchar", "varchar", "varchar", "varchar"),
+)
 
+
+@sqlite_variant(embedded)
 def get_entity_id(conn, entity: Entity):
     """Check if an entity exists and return its ID, or None if it doesn't exist."""
     cursor = conn.cursor()
-
-    cursor.execute(
-        """
-        SELECT id FROM entities
-        WHERE platform_source = %s
-        AND name = %s
-        AND (city = %s OR (city IS NULL AND %s IS NULL))
-        """,
-        (entity.platform_source, entity.name, entity.city, entity.city),
-    )
+    _GET_ENTITY_ID.execute(cursor, (entity.platform_source, entity.name, entity.city, entity.city))
 
     result = cursor.fetchone()
     return result[0] if result else None
 
 
+@sqlite_variant(embedded)
 def insert_entity(conn, entity: Entity):
     """Insert a new entity and return its ID."""
     cursor = conn.cursor()
+    _INSERT_ENTITY.execute(cursor, (entity.platform_source, entity.name, entity.city, entity.type))
+
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+
+@sqlite_variant(embedded)
+def get_entity_ids(conn, entities: list[Entity]):
+    """Look up IDs for many entities in one query, keyed by Entity.key; missing ones are absent."""
+    if not entities:
+        return {}
+    cursor = conn.cursor()
 
-    cursor.execute(
+    rows = execute_values(
+        cursor,
         """
-        INSERT INTO entities (platform_source, name, city, type)
-        VALUES (%s, %s, %s, %s)
-        ON CONFLICT (platform_source, name, city) DO NOTHING
-        RETURNING id
+        SELECT e.id, e.platform_source, e.name, e.city
+        FROM (VALUES %s) AS v (platform_source, name, city)
+        JOIN entities e
+        ON e.platform_source = v.platform_source
+        AND e.name = v.name
+        AND (e.city = v.city OR (e.city IS NULL AND v.city IS NULL))
         """,
-        (entity.platform_source, entity.name, entity.city, entity.type),
+        [entity.key for entity in entities],
+        page_size=len(entities),
+        fetch=True,
     )
+    return {(r[1], r[2], r[3]): r[0] for r in rows}
 
-    result = cursor.fetchone()
-    return result[0] if result else None
+
+@sqlite_variant(embedded)
+def upsert_entities(conn, entities: list[Entity]):
+    """
+    Resolve IDs for many entities in one statement, inserting the ones that don't exist yet.
+
+    Returns a dict keyed by Entity.key. Entities are de-duplicated first, since NULL
+    cities never conflict under the unique constraint.
+    """
+    unique = list({entity.key: entity for entity in entities}.values())
+    if not unique:
+        return {}
+    cursor = conn.cursor()
+
+    rows = execute_values(
+        cursor,
+        """
+        WITH v (platform_source, name, city, type) AS (VALUES %s),
+        existing AS (
+            SELECT e.id, e.platform_source, e.name, e.city
+            FROM v
+            JOIN entities e
+            ON e.platform_source = v.platform_source
+            AND e.name = v.name
+            AND (e.city = v.city OR (e.city IS NULL AND v.city IS NULL))
+        ),
+        inserted AS (
+            INSERT INTO entities (platform_source, name, city, type)
+            SELECT v.platform_source, v.name, v.city, v.type
+            FROM v
+            WHERE NOT EXISTS (
+                SELECT 1 FROM existing x
+                WHERE x.platform_source = v.platform_source
+                AND x.name = v.name
+                AND x.city IS NOT DISTINCT FROM v.city
+            )
+            ON CONFLICT (platform_source, name, city) DO NOTHING
+            RETURNING id, platform_source, name, city
+        )
+        SELECT id, platform_source, name, city FROM existing
+        UNION ALL
+        SELECT id, platform_source, name, city FROM inserted
+        """,
+        [(e.platform_source, e.name, e.city, e.type) for e in unique],
+        page_size=len(unique),
+        fetch=True,
+    )
+    ids = {(r[1], r[2], r[3]): r[0] for r in rows}
+
+    # Rows inserted concurrently by another transaction are skipped by ON CONFLICT; look them up
+    missing = [e for e in unique if e.key not in ids]
+    if missing:
+        ids.update(get_entity_ids(conn, missing))
+    return ids
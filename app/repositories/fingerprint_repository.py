@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from app.database.backend import sqlite_variant
+from app.repositories.sqlite import fingerprint_repository as embedded
+
+
+@sqlite_variant(embedded)
+def get_fingerprints(conn):
+    """Fetch the last stored fingerprint for every (platform_source, currency) page."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT platform_source, currency, fingerprint FROM page_fingerprints")
+    return {(r[0], r[1]): r[2] for r in cursor.fetchall()}
+
+
+@sqlite_variant(embedded)
+def save_fingerprint(conn, platform_source: str, currency: str, fingerprint: str, seen_at: datetime):
+    """Record a changed page: its new fingerprint, valid from seen_at."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT INTO page_fingerprints
+        (platform_source, currency, fingerprint, changed_at, last_seen_at)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (platform_source, currency) DO UPDATE
+        SET fingerprint = EXCLUDED.fingerprint,
+            changed_at = EXCLUDED.changed_at,
+            last_seen_at = EXCLUDED.last_seen_at
+        """,
+        (platform_source, currency, fingerprint, seen_at, seen_at),
+    )
+
+
+@sqlite_variant(embedded)
+def touch_fingerprint(conn, platform_source: str, currency: str, seen_at: datetime):
+    """Record that an unchanged page was still valid at seen_at."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        UPDATE page_fingerprints
+        SET last_seen_at = GREATEST(last_seen_at, %s)
+        WHERE platform_source = %s AND currency = %s
+        """,
+        (seen_at, platform_source, currency),
+    )
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from datetime import date, timedelta
+
+from app.core.config import ARCHIVE_DIR, ARCHIVE_PAGES
+
+_index_lock = threading.Lock()
+
+
+def archive_page(source: str, currency: str, timestamp: str, payload: str, kind: str = "html") -> str | None:
+    """
+    Store a fetched payload and index it; returns its hash, or None when archiving is off.
+
+    Payloads are gzipped and stored once per SHA-256 under objects/<sha[:2]>/<sha>.gz.
+    Every fetch appends a line to index/<YYYY-MM-DD>.jsonl with its source, currency,
+    scrape timestamp, payload kind ("html" page source or in-page "rows" JSON) and hash.
+    """
+    if not ARCHIVE_PAGES:
+        return None
+
+    data = payload.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = _object_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent writers of the same page never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(gzip.compress(data))
+        os.replace(tmp, path)
+
+    entry = {"source": source, "currency": currency, "timestamp": timestamp, "kind": kind, "sha256": digest}
+    index_path = ARCHIVE_DIR / "index" / f"{timestamp[:10]}.jsonl"
+    with _index_lock:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    return digest
+
+
+def iter_entries(since: date, until: date, source: str | None = None) -> Iterator[dict]:
+    """Yield index entries scraped between `since` and `until` (inclusive), oldest first."""
+    day = since
+    while day <= until:
+        index_path = ARCHIVE_DIR / "index" / f"{day.isoformat()}.jsonl"
+        if index_path.exists():
+            with open(index_path, encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+            entries.sort(key=lambda e: e["timestamp"])
+            for entry in entries:
+                if source is None or entry["source"] == source:
+                    yield entry
+        day += timedelta(days=1)
+
+
+def load_payload(digest: str) -> str:
+    """Return the decompressed payload stored under `digest`."""
+    return gzip.decompress(_object_path(digest).read_bytes()).decode("utf-8")
+
+
+def _object_path(digest: str):
+    return ARCHIVE_DIR / "objects" / digest[:2] / f"{digest}.gz"
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import gzip
+import re
+from datetime import date
+from pathlib import Path
+
+from psycopg2 import sql
+
+from app.database.backend import is_sqlite
+
+_MONTHLY_PARTITION = re.compile(r"^exchange_rates_p(\d{4})_(\d{2})$")
+
+
+def is_partitioned(conn) -> bool:
+    """Whether exchange_rates is a partitioned table (databases older than migration 004 are not)."""
+    if is_sqlite(conn):
+        # The embedded schema keeps one unpartitioned table
+        return False
+    cursor = conn.cursor()
+    cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = 'exchange_rates'::regclass")
+    return cursor.fetchone()[0]
+
+
+def list_rate_partitions(conn) -> dict[str, date]:
+    """Return the monthly partitions of exchange_rates, by name, with the first day of their month."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'exchange_rates'::regclass
+        """
+    )
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = _MONTHLY_PARTITION.match(name)
+        if match:
+            partitions[name] = date(int(match[1]), int(match[2]), 1)
+    return dict(sorted(partitions.items(), key=lambda item: item[1]))
+
+
+def create_rate_partition(conn, month: date) -> str:
+    """
+    Create the partition holding `month` if it doesn't exist yet and return its name.
+
+    Rows for that month already stored in the default partition are moved into it.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT create_rate_partition(%s)", (month,))
+    return cursor.fetchone()[0]
+
+
+def export_rate_partition(conn, name: str, path: Path) -> int:
+    """Detach a monthly partition and write its rows to a gzipped CSV file, returning the row count."""
+    partition = sql.Identifier(name)
+    cursor = conn.cursor()
+    cursor.execute(sql.SQL("ALTER TABLE exchange_rates DETACH PARTITION {}").format(partition))
+    cursor.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(partition))
+    rows = cursor.fetchone()[0]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        # Archives keep currency codes and decimal rates so they can be read without the database
+        cursor.copy_expert(
+            sql.SQL(
+                """
+                COPY (
+                    SELECT p.id, p.entity_id, c.code AS currency,
+                        (p.buy_micros / 1000000.0)::NUMERIC(12, 6) AS buy_rate,
+                        (p.sell_micros / 1000000.0)::NUMERIC(12, 6) AS sell_rate,
+                        p.scraped_at, p.last_seen_at
+                    FROM {} p
+                    JOIN currencies c ON c.id = p.currency_id
+                    ORDER BY p.scraped_at, p.id
+                ) TO STDOUT WITH (FORMAT csv, HEADER)
+                """
+            )
+            .format(partition)
+            .as_string(conn),
+            f,
+        )
+    return rows
+
+
+def drop_rate_partition(conn, name: str):
+    """Drop a detached partition table."""
+    cursor = conn.cursor()
+    cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
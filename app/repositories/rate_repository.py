@@ -1,87 +1,387 @@
 from __future__ import annotations
 
+import io
 from datetime import datetime, timedelta
+from functools import cache
 
-from app.core.config import TIMESTAMP_FORMAT, TIMEZONE
+from psycopg2.extras import execute_values
+
+from app.core.config import QUERY_ITERSIZE, RATE_INGEST_METHOD, TIMEZONE
+from app.database.backend import sqlite_variant
+from app.database.prepared import PreparedStatement
 from app.models.exchange_rate import ExchangeRate
+from app.repositories.sqlite import rate_repository as embedded
+
+# Shared with the asyncio versions in app.repositories.aio.rate_repository
+# NOT EXISTS first so known codes don't use up SMALLSERIAL values on conflict
+ENSURE_CURRENCIES_SQL = """
+    INSERT INTO currencies (code)
+    SELECT k.code
+    FROM unnest(%s::varchar[]) AS k (code)
+    WHERE NOT EXISTS (SELECT 1 FROM currencies c WHERE c.code = k.code)
+    ON CONFLICT (code) DO NOTHING
+"""
+
+INSERT_RATE_SQL = """
+    INSERT INTO exchange_rates
+    (entity_id, currency_id, buy_micros, sell_micros, scraped_at)
+    SELECT %s, c.id, %s, %s, %s
+    FROM currencies c
+    WHERE c.code = %s
+    ON CONFLICT (entity_id, currency_id, scraped_at) DO NOTHING
+    RETURNING id
+"""
+
+_ENSURE_CURRENCIES = PreparedStatement("ensure_currencies", ENSURE_CURRENCIES_SQL, ("varchar[]",))
+_INSERT_RATE = PreparedStatement(
+    "insert_rate", INSERT_RATE_SQL, ("integer", "integer", "integer", "timestamptz", "varchar")
+)
+
+_LATEST_RATE_FOR_ENTITY = PreparedStatement(
+    "latest_rate_for_entity",
+    """
+    SELECT buy_rate, sell_rate
+    FROM current_rates
+    WHERE entity_id = %s AND currency = %s
+    """,
+    ("integer", "varchar"),
+)
+
+_LATEST_RATES_FOR_KEYS = PreparedStatement(
+    "latest_rates_for_keys",
+    """
+    SELECT cr.entity_id, cr.currency, cr.buy_rate, cr.sell_rate
+    FROM unnest(%s::integer[], %s::varchar[]) AS k (entity_id, currency)
+    JOIN current_rates cr ON cr.entity_id = k.entity_id AND cr.currency = k.currency
+    """,
+    ("integer[]", "varchar[]"),
+)
+
+_CURRENT_INTERVALS = PreparedStatement(
+    "current_intervals",
+    """
+    SELECT cr.entity_id, cr.currency, cr.rate_id, cr.scraped_at, cr.buy_rate, cr.sell_rate,
+        COALESCE(cr.last_seen_at, cr.scraped_at)
+    FROM unnest(%s::integer[], %s::varchar[]) AS k (entity_id, currency)
+    JOIN current_rates cr ON cr.entity_id = k.entity_id AND cr.currency = k.currency
+    """,
+    ("integer[]", "varchar[]"),
+)
+
+
+def insert_rate_params(entity_id: int, rate: ExchangeRate) -> tuple:
+    return (entity_id, rate.buy_micros, rate.sell_micros, rate.scraped_at, rate.currency)
 
 
+@sqlite_variant(embedded)
+def ensure_currencies(conn, codes) -> None:
+    """Register any currency codes not yet in the currencies table."""
+    cursor = conn.cursor()
+    _ENSURE_CURRENCIES.execute(cursor, (sorted(set(codes)),))
+
+
+@sqlite_variant(embedded)
 def insert_exchange_rate(conn, entity_id: int, rate: ExchangeRate):
     """Insert a new exchange rate record."""
+    ensure_currencies(conn, [rate.currency])
     cursor = conn.cursor()
-
-    cursor.execute(
-        """
-        INSERT INTO exchange_rates
-        (entity_id, currency, buy_rate, sell_rate, scraped_at)
-        VALUES (%s, %s, %s, %s, %s)
-        ON CONFLICT (entity_id, currency, scraped_at) DO NOTHING
-        RETURNING id
-        """,
-        (entity_id, rate.currency, rate.buy, rate.sell, rate.timestamp),
-    )
+    _INSERT_RATE.execute(cursor, insert_rate_params(entity_id, rate))
 
     result = cursor.fetchone()
     return result[0] if result else None
 
 
-def get_rates(conn):
-    """Fetch all exchange rates joined with entity info, ordered by most recent."""
+@sqlite_variant(embedded)
+def bulk_insert_exchange_rates(
+    conn,
+    rates: list[tuple[int, ExchangeRate]],
+    method: str = RATE_INGEST_METHOD,
+) -> tuple[int, int]:
+    """
+    Insert many (entity_id, rate) pairs at once and return (inserted, duplicates).
+
+    "copy" streams the batch into a temporary staging table with COPY and merges it with
+    one INSERT ... SELECT; "values" sends multi-row INSERTs via execute_values. Both skip
+    rows that already exist, like insert_exchange_rate.
+    """
+    if not rates:
+        return 0, 0
+    ensure_currencies(conn, [rate.currency for _, rate in rates])
+    if method == "copy":
+        inserted = _insert_via_copy(conn, rates)
+    elif method == "values":
+        inserted = _insert_via_values(conn, rates)
+    else:
+        raise ValueError(f"Unknown ingest method '{method}'. Supported methods: 'copy', 'values'.")
+    return inserted, len(rates) - inserted
+
+
+def _insert_via_copy(conn, rates: list[tuple[int, ExchangeRate]]) -> int:
     cursor = conn.cursor()
+    cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS exchange_rates_staging (
+            entity_id INTEGER,
+            currency VARCHAR(10),
+            buy_micros INTEGER,
+            sell_micros INTEGER,
+            scraped_at TIMESTAMPTZ
+        ) ON COMMIT DELETE ROWS
+        """
+    )
+
+    buffer = io.StringIO()
+    for entity_id, rate in rates:
+        buffer.write(
+            f"{entity_id}\t{rate.currency}\t{rate.buy_micros}\t{rate.sell_micros}\t{rate.scraped_at.isoformat()}\n"
+        )
+    buffer.seek(0)
+    cursor.copy_expert(
+        "COPY exchange_rates_staging (entity_id, currency, buy_micros, sell_micros, scraped_at) FROM STDIN",
+        buffer,
+    )
 
     cursor.execute(
         """
-        SELECT er.id, platform_source, currency, buy_rate, sell_rate, scraped_at
-        FROM exchange_rates er
-        JOIN entities e ON er.entity_id=e.id
-        ORDER BY scraped_at DESC
+        INSERT INTO exchange_rates
+        (entity_id, currency_id, buy_micros, sell_micros, scraped_at)
+        SELECT s.entity_id, c.id, s.buy_micros, s.sell_micros, s.scraped_at
+        FROM exchange_rates_staging s
+        JOIN currencies c ON c.code = s.currency
+        ON CONFLICT (entity_id, currency_id, scraped_at) DO NOTHING
         """
     )
+    inserted = cursor.rowcount
+    # Several batches may share one transaction
+    cursor.execute("TRUNCATE exchange_rates_staging")
+    return inserted
 
+
+def _insert_via_values(conn, rates: list[tuple[int, ExchangeRate]]) -> int:
+    cursor = conn.cursor()
+    ids = execute_values(
+        cursor,
+        """
+        INSERT INTO exchange_rates
+        (entity_id, currency_id, buy_micros, sell_micros, scraped_at)
+        SELECT v.entity_id, c.id, v.buy_micros, v.sell_micros, v.scraped_at
+        FROM (VALUES %s) AS v (entity_id, currency, buy_micros, sell_micros, scraped_at)
+        JOIN currencies c ON c.code = v.currency
+        ON CONFLICT (entity_id, currency_id, scraped_at) DO NOTHING
+        RETURNING id
+        """,
+        [
+            (entity_id, rate.currency, rate.buy_micros, rate.sell_micros, rate.scraped_at)
+            for entity_id, rate in rates
+        ],
+        page_size=1000,
+        fetch=True,
+    )
+    return len(ids)
+
+
+RATE_QUERY_COLUMNS = (
+    "id", "platform_source", "name", "city", "currency", "buy_rate", "sell_rate", "scraped_at", "last_seen_at"
+)
+
+
+def _rate_filters(
+    currency: str | None = None,
+    platform_source: str | None = None,
+    entity: str | None = None,
+    city: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> tuple[str, list]:
+    """Build the WHERE clause and parameters shared by get_rates and iter_rates."""
+    conditions, params = [], []
+    if currency is not None:
+        conditions.append("er.currency = %s")
+        params.append(currency.upper())
+    if platform_source is not None:
+        conditions.append("e.platform_source = %s")
+        params.append(platform_source)
+    if entity is not None:
+        conditions.append("e.name ILIKE %s")
+        params.append(f"%{entity}%")
+    if city is not None:
+        conditions.append("lower(e.city) = lower(%s)")
+        params.append(city)
+    if since is not None:
+        conditions.append("er.scraped_at >= %s")
+        params.append(since)
+    if until is not None:
+        conditions.append("er.scraped_at < %s")
+        params.append(until)
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return where_clause, params
+
+
+def _rate_query_sql(where_clause: str, limited: bool) -> str:
+    """SELECT of RATE_QUERY_COLUMNS shared by get_rates and iter_rates."""
+    return f"""
+        SELECT er.id, e.platform_source, e.name, e.city, er.currency, er.buy_rate, er.sell_rate,
+            er.scraped_at, COALESCE(er.last_seen_at, er.scraped_at)
+        FROM exchange_rates_decoded er
+        JOIN entities e ON er.entity_id = e.id
+        {where_clause}
+        ORDER BY er.scraped_at DESC, er.id DESC
+        {"LIMIT %s" if limited else ""}
+    """
+
+
+@sqlite_variant(embedded)
+def get_rates(conn, **filters):
+    """
+    Fetch filtered exchange rates, most recent first, as tuples of RATE_QUERY_COLUMNS.
+
+    last_seen_at, the latest scrape that still showed the rate, equals scraped_at unless
+    the row was written in interval storage mode. Accepts the same filters as iter_rates;
+    use iter_rates for large results.
+    """
+    cursor = conn.cursor()
+    where_clause, params = _rate_filters(**filters)
+    cursor.execute(_rate_query_sql(where_clause, False), tuple(params))
     return cursor.fetchall()
 
 
-def get_latest_rates_by_currency(
-    conn,
-    currency: str,
-    exclude_entity_id: int | None = None,
-    max_age_hours: float | None = None,
-):
-    """Fetch the most recent exchange rate per entity for a given currency using Postgres DISTINCT ON."""
+@sqlite_variant(embedded)
+def iter_rates(conn, limit: int | None = None, itersize: int = QUERY_ITERSIZE, **filters):
+    """
+    Stream filtered exchange rates, most recent first, as tuples of RATE_QUERY_COLUMNS.
+
+    Filters: currency, platform_source, entity (case-insensitive name substring), city and a
+    [since, until) range on scraped_at. Rows come from a named server-side cursor that fetches
+    itersize rows per round trip, so memory use does not depend on the result size.
+    """
+    where_clause, params = _rate_filters(**filters)
+    if limit is not None:
+        params.append(limit)
+
+    cursor = conn.cursor(name="rate_query")
+    cursor.itersize = itersize
+    try:
+        cursor.execute(_rate_query_sql(where_clause, limit is not None), tuple(params))
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+@sqlite_variant(embedded)
+def get_history_bounds(conn) -> tuple[datetime | None, datetime | None]:
+    """Return the first and last scraped_at in exchange_rates, or (None, None) when it is empty."""
     cursor = conn.cursor()
+    cursor.execute("SELECT MIN(scraped_at), MAX(scraped_at) FROM exchange_rates")
+    return cursor.fetchone()
 
-    conditions = ["er.currency = %s"]
-    params = [currency.upper()]
 
-    if exclude_entity_id is not None:
-        conditions.append("er.entity_id != %s")
-        params.append(exclude_entity_id)
+@sqlite_variant(embedded)
+def iter_rate_history(conn, start: datetime, end: datetime, batch_rows: int):
+    """
+    Stream rates scraped in [start, end) with entity info, in lists of up to batch_rows rows.
 
-    if max_age_hours is not None:
-        cutoff = datetime.now(TIMEZONE) - timedelta(hours=max_age_hours)
-        conditions.append("er.scraped_at >= %s")
-        params.append(cutoff.strftime(TIMESTAMP_FORMAT))
+    Rows come from a server-side cursor, so memory use does not depend on the range's size.
+    Each row is (entity_id, platform_source, name, city, currency, buy_rate, sell_rate,
+    scraped_at, last_seen_at), with rates as floats and timestamps as epoch microseconds.
+    """
+    cursor = conn.cursor(name="rate_history")
+    cursor.itersize = batch_rows
+    try:
+        cursor.execute(
+            """
+            SELECT er.entity_id, e.platform_source, e.name, e.city, c.code,
+                er.buy_micros / 1000000.0::float8, er.sell_micros / 1000000.0::float8,
+                (extract(epoch FROM er.scraped_at) * 1000000)::bigint,
+                (extract(epoch FROM er.last_seen_at) * 1000000)::bigint
+            FROM exchange_rates er
+            JOIN entities e ON er.entity_id = e.id
+            JOIN currencies c ON c.id = er.currency_id
+            WHERE er.scraped_at >= %s AND er.scraped_at < %s
+            """,
+            (start, end),
+        )
+        while rows := cursor.fetchmany(batch_rows):
+            yield rows
+    finally:
+        cursor.close()
+
+
+# Currency condition of the current_rates queries: one code, a list of codes, or every currency
+_CURRENCY_FILTERS = {
+    "one": ("cr.currency = %s", ("varchar",)),
+    "many": ("cr.currency = ANY(%s)", ("varchar[]",)),
+    "all": (None, ()),
+}
 
-    where_clause = " WHERE " + " AND ".join(conditions)
 
-    query = f"""
-        SELECT DISTINCT ON (er.entity_id)
-            er.id,
-            er.entity_id,
+def _latest_rates_sql(currency_filter: str, exclude_entity: bool, fresh_only: bool) -> str:
+    currency_condition, _ = _CURRENCY_FILTERS[currency_filter]
+    conditions = [currency_condition] if currency_condition else []
+    if exclude_entity:
+        conditions.append("cr.entity_id != %s")
+    if fresh_only:
+        # A rate is also fresh if its page was last seen unchanged within the window
+        # and the rate was stored when that page content first appeared.
+        conditions.append(
+            "(COALESCE(cr.last_seen_at, cr.scraped_at) >= %s"
+            " OR (pf.last_seen_at >= %s AND cr.scraped_at >= pf.changed_at))"
+        )
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    return f"""
+        SELECT
+            cr.rate_id,
+            cr.entity_id,
             e.name,
             e.platform_source,
-            er.currency,
-            er.buy_rate,
-            er.sell_rate,
-            er.scraped_at
-        FROM exchange_rates er
-        JOIN entities e ON er.entity_id = e.id
+            cr.currency,
+            cr.buy_rate,
+            cr.sell_rate,
+            cr.scraped_at,
+            COALESCE(cr.last_seen_at, cr.scraped_at),
+            e.city
+        FROM current_rates cr
+        JOIN entities e ON cr.entity_id = e.id
+        LEFT JOIN page_fingerprints pf
+            ON pf.platform_source = e.platform_source AND pf.currency = cr.currency
         {where_clause}
-        ORDER BY er.entity_id, er.scraped_at DESC
+        ORDER BY cr.currency, cr.entity_id
     """
-    cursor.execute(query, tuple(params))
 
-    rows = cursor.fetchall()
+
+@cache
+def _latest_rates_statement(currency_filter: str, exclude_entity: bool, fresh_only: bool) -> PreparedStatement:
+    """One prepared variant per combination of filters."""
+    _, currency_types = _CURRENCY_FILTERS[currency_filter]
+    types = currency_types + ("integer",) * exclude_entity + ("timestamptz", "timestamptz") * fresh_only
+    name = f"latest_rates_{currency_filter}" + "_excluding" * exclude_entity + "_fresh" * fresh_only
+    return PreparedStatement(name, _latest_rates_sql(currency_filter, exclude_entity, fresh_only), types)
+
+
+def _freshness_params(max_age_hours: float | None) -> list:
+    if max_age_hours is None:
+        return []
+    cutoff = datetime.now(TIMEZONE) - timedelta(hours=max_age_hours)
+    return [cutoff] * 2
+
+
+def latest_rates_query(
+    currency: str,
+    exclude_entity_id: int | None = None,
+    max_age_hours: float | None = None,
+) -> tuple[str, tuple]:
+    """Build the current_rates query behind get_latest_rates_by_currency and its asyncio version."""
+    params = [currency.upper()]
+    if exclude_entity_id is not None:
+        params.append(exclude_entity_id)
+    params.extend(_freshness_params(max_age_hours))
+
+    query = _latest_rates_sql("one", exclude_entity_id is not None, max_age_hours is not None)
+    return query, tuple(params)
+
+
+def latest_rate_rows(rows) -> list[dict]:
+    """Turn rows of latest_rates_query into dicts with float rates."""
     return [
         {
             "id": r[0],
@@ -92,25 +392,63 @@ def get_latest_rates_by_currency(
             "buy_rate": float(r[5]),
             "sell_rate": float(r[6]),
             "scraped_at": r[7],
+            "last_seen_at": r[8],
+            "city": r[9],
         }
         for r in rows
     ]
 
 
+@sqlite_variant(embedded)
+def get_latest_rates_by_currency(
+    conn,
+    currency: str,
+    exclude_entity_id: int | None = None,
+    max_age_hours: float | None = None,
+):
+    """Fetch the most recent exchange rate per entity for a given currency from current_rates."""
+    cursor = conn.cursor()
+    _, params = latest_rates_query(currency, exclude_entity_id, max_age_hours)
+    statement = _latest_rates_statement("one", exclude_entity_id is not None, max_age_hours is not None)
+    statement.execute(cursor, params)
+    return latest_rate_rows(cursor.fetchall())
+
+
+@sqlite_variant(embedded)
+def get_latest_rates_for_currencies(
+    conn,
+    currencies: list[str] | None = None,
+    max_age_hours: float | None = None,
+) -> dict[str, list[dict]]:
+    """
+    Fetch the most recent rate per entity for many currencies in one query, keyed by currency.
+
+    None fetches every currency in current_rates. Rows are shaped like those of
+    get_latest_rates_by_currency and include every entity, own office too; currencies
+    without fresh rates are absent.
+    """
+    params = []
+    currency_filter = "all"
+    if currencies is not None:
+        currency_filter = "many"
+        params.append(sorted({currency.upper() for currency in currencies}))
+    params.extend(_freshness_params(max_age_hours))
+
+    cursor = conn.cursor()
+    _latest_rates_statement(currency_filter, False, max_age_hours is not None).execute(cursor, tuple(params))
+
+    by_currency = {}
+    for row in latest_rate_rows(cursor.fetchall()):
+        by_currency.setdefault(row["currency"], []).append(row)
+    return by_currency
+
+
+@sqlite_variant(embedded)
 def get_latest_rate_for_entity(conn, entity_id: int, currency: str):
     """Fetch the most recent exchange rate for a specific entity and currency."""
     cursor = conn.cursor()
-    cursor.execute(
-        """
-        SELECT buy_rate, sell_rate
-        FROM exchange_rates
-        WHERE entity_id = %s AND currency = %s
-        ORDER BY scraped_at DESC
-        LIMIT 1
-        """,
-        (entity_id, currency.upper()),
-    )
-    
+    _LATEST_RATE_FOR_ENTITY.execute(cursor, (entity_id, currency.upper()))
+
     row = cursor.fetchone()
     if row:
         return {
@@ -119,3 +457,79 @@ def get_latest_rate_for_entity(conn, entity_id: int, currency: str):
         }
     return None
 
+
+@sqlite_variant(embedded)
+def get_latest_rates_for_keys(conn, keys: list[tuple[int, str]]):
+    """Fetch the most recent (buy_rate, sell_rate) for many (entity_id, currency) pairs in one query."""
+    if not keys:
+        return {}
+    cursor = conn.cursor()
+    _LATEST_RATES_FOR_KEYS.execute(cursor, ([k[0] for k in keys], [k[1].upper() for k in keys]))
+    return {(r[0], r[1]): (float(r[2]), float(r[3])) for r in cursor.fetchall()}
+
+
+@sqlite_variant(embedded)
+def get_current_intervals(conn, keys: list[tuple[int, str]]):
+    """Fetch the newest stored row for many (entity_id, currency) pairs, with its last sighting."""
+    if not keys:
+        return {}
+    cursor = conn.cursor()
+    _CURRENT_INTERVALS.execute(cursor, ([k[0] for k in keys], [k[1].upper() for k in keys]))
+    return {
+        (r[0], r[1]): {
+            "id": r[2],
+            "scraped_at": r[3],
+            "buy_rate": float(r[4]),
+            "sell_rate": float(r[5]),
+            "last_seen_at": r[6],
+        }
+        for r in cursor.fetchall()
+    }
+
+
+@sqlite_variant(embedded)
+def insert_rate_intervals(conn, intervals: list[tuple[int, ExchangeRate, datetime]]) -> int:
+    """Insert (entity_id, rate, last_seen_at) rows whose scraped_at is the rate's first sighting."""
+    if not intervals:
+        return 0
+    ensure_currencies(conn, [rate.currency for _, rate, _ in intervals])
+    cursor = conn.cursor()
+    ids = execute_values(
+        cursor,
+        """
+        INSERT INTO exchange_rates
+        (entity_id, currency_id, buy_micros, sell_micros, scraped_at, last_seen_at)
+        SELECT v.entity_id, c.id, v.buy_micros, v.sell_micros, v.scraped_at, v.last_seen_at
+        FROM (VALUES %s) AS v (entity_id, currency, buy_micros, sell_micros, scraped_at, last_seen_at)
+        JOIN currencies c ON c.code = v.currency
+        ON CONFLICT (entity_id, currency_id, scraped_at) DO NOTHING
+        RETURNING id
+        """,
+        [
+            (entity_id, rate.currency, rate.buy_micros, rate.sell_micros, rate.scraped_at, last_seen_at)
+            for entity_id, rate, last_seen_at in intervals
+        ],
+        page_size=1000,
+        fetch=True,
+    )
+    return len(ids)
+
+
+@sqlite_variant(embedded)
+def extend_rate_intervals(conn, last_seen: dict[tuple[int, datetime], datetime]):
+    """Move last_seen_at forward for existing rows, keyed by (id, scraped_at) so partitions are pruned."""
+    if not last_seen:
+        return
+    cursor = conn.cursor()
+    execute_values(
+        cursor,
+        """
+        UPDATE exchange_rates er
+        SET last_seen_at = v.last_seen_at
+        FROM (VALUES %s) AS v (id, scraped_at, last_seen_at)
+        WHERE er.id = v.id AND er.scraped_at = v.scraped_at
+        """,
+        [(row_id, scraped_at, seen_at) for (row_id, scraped_at), seen_at in last_seen.items()],
+        template="(%s, %s::timestamptz, %s::timestamptz)",
+        page_size=1000,
+    )
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+GRAINS = ("hour", "day")
+
+
+def _window(conditions: list[str], params: list, since: datetime | str | None, until: datetime | str | None):
+    if since is not None:
+        conditions.append("r.bucket >= %s")
+        params.append(since)
+    if until is not None:
+        conditions.append("r.bucket < %s")
+        params.append(until)
+
+
+def _check_grain(grain: str):
+    if grain not in GRAINS:
+        raise ValueError(f"Unknown grain '{grain}'. Supported grains: {', '.join(GRAINS)}.")
+
+
+def get_rollups(
+    conn,
+    currency: str,
+    grain: str = "hour",
+    since: datetime | str | None = None,
+    until: datetime | str | None = None,
+    entity_id: int | None = None,
+):
+    """Fetch OHLC buckets for a currency in [since, until), oldest first, optionally for one entity."""
+    _check_grain(grain)
+    cursor = conn.cursor()
+
+    conditions = ["r.grain = %s", "r.currency = %s"]
+    params = [grain, currency.upper()]
+    if entity_id is not None:
+        conditions.append("r.entity_id = %s")
+        params.append(entity_id)
+    _window(conditions, params, since, until)
+
+    cursor.execute(
+        f"""
+        SELECT
+            r.entity_id, e.name, e.platform_source, r.bucket,
+            r.open_buy, r.high_buy, r.low_buy, r.close_buy, r.sum_buy / r.samples,
+            r.open_sell, r.high_sell, r.low_sell, r.close_sell, r.sum_sell / r.samples,
+            r.samples
+        FROM rate_rollups r
+        JOIN entities e ON r.entity_id = e.id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY r.bucket, r.entity_id
+        """,
+        tuple(params),
+    )
+
+    return [
+        {
+            "entity_id": r[0],
+            "name": r[1],
+            "platform_source": r[2],
+            "bucket": r[3],
+            "open_buy": float(r[4]),
+            "high_buy": float(r[5]),
+            "low_buy": float(r[6]),
+            "close_buy": float(r[7]),
+            "avg_buy": float(r[8]),
+            "open_sell": float(r[9]),
+            "high_sell": float(r[10]),
+            "low_sell": float(r[11]),
+            "close_sell": float(r[12]),
+            "avg_sell": float(r[13]),
+            "samples": r[14],
+        }
+        for r in cursor.fetchall()
+    ]
+
+
+def get_market_trend(
+    conn,
+    currency: str,
+    grain: str = "day",
+    since: datetime | str | None = None,
+    until: datetime | str | None = None,
+    exclude_entity_id: int | None = None,
+):
+    """Summarise every bucket across entities: best and average buy/sell rates, oldest first."""
+    _check_grain(grain)
+    cursor = conn.cursor()
+
+    conditions = ["r.grain = %s", "r.currency = %s"]
+    params = [grain, currency.upper()]
+    if exclude_entity_id is not None:
+        conditions.append("r.entity_id != %s")
+        params.append(exclude_entity_id)
+    _window(conditions, params, since, until)
+
+    cursor.execute(
+        f"""
+        SELECT
+            r.bucket,
+            MAX(r.high_buy),
+            MIN(r.low_sell),
+            SUM(r.sum_buy) / SUM(r.samples),
+            SUM(r.sum_sell) / SUM(r.samples),
+            COUNT(*)
+        FROM rate_rollups r
+        WHERE {" AND ".join(conditions)}
+        GROUP BY r.bucket
+        ORDER BY r.bucket
+        """,
+        tuple(params),
+    )
+
+    return [
+        {
+            "bucket": r[0],
+            "best_buy": float(r[1]),
+            "best_sell": float(r[2]),
+            "avg_buy": float(r[3]),
+            "avg_sell": float(r[4]),
+            "entity_count": r[5],
+        }
+        for r in cursor.fetchall()
+    ]
@@ -0,0 +1,25 @@
+"""Embedded SQLite implementations of the repository functions, selected for sqlite3 connections."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.core.config import TIMEZONE
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def to_db_timestamp(moment: datetime | None) -> str | None:
+    """Store a datetime as fixed-width UTC text; naive values are local (TIMEZONE) times."""
+    if moment is None:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=TIMEZONE)
+    return moment.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def from_db_timestamp(value: str | None) -> datetime | None:
+    """Read a stored timestamp back as an aware datetime in TIMEZONE, like timestamptz columns."""
+    if value is None:
+        return None
+    return datetime.strptime(value, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).astimezone(TIMEZONE)
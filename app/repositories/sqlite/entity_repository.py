@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from app.models.entity import Entity
+
+
+def get_entity_id(conn, entity: Entity):
+    cursor = conn.cursor()
+    # IS compares NULL cities as equal
+    cursor.execute(
+        "SELECT id FROM entities WHERE platform_source = ? AND name = ? AND city IS ?",
+        entity.key,
+    )
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+
+def insert_entity(conn, entity: Entity):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT INTO entities (platform_source, name, city, type)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (platform_source, name, city) DO NOTHING
+        RETURNING id
+        """,
+        (entity.platform_source, entity.name, entity.city, entity.type),
+    )
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+
+def get_entity_ids(conn, entities: list[Entity]):
+    # In-process lookups are cheap enough that one indexed query per entity beats building a VALUES join
+    ids = {}
+    for entity in entities:
+        entity_id = get_entity_id(conn, entity)
+        if entity_id is not None:
+            ids[entity.key] = entity_id
+    return ids
+
+
+def upsert_entities(conn, entities: list[Entity]):
+    unique = list({entity.key: entity for entity in entities}.values())
+    ids = get_entity_ids(conn, unique)
+    for entity in unique:
+        if entity.key not in ids:
+            # NULL cities never conflict, so the lookup above is what keeps them unique
+            ids[entity.key] = insert_entity(conn, entity)
+    return ids
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from app.repositories.sqlite import to_db_timestamp
+
+
+def get_fingerprints(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT platform_source, currency, fingerprint FROM page_fingerprints")
+    return {(r[0], r[1]): r[2] for r in cursor.fetchall()}
+
+
+def save_fingerprint(conn, platform_source: str, currency: str, fingerprint: str, seen_at: datetime):
+    seen = to_db_timestamp(seen_at)
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT INTO page_fingerprints
+        (platform_source, currency, fingerprint, changed_at, last_seen_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (platform_source, currency) DO UPDATE
+        SET fingerprint = excluded.fingerprint,
+            changed_at = excluded.changed_at,
+            last_seen_at = excluded.last_seen_at
+        """,
+        (platform_source, currency, fingerprint, seen, seen),
+    )
+
+
+def touch_fingerprint(conn, platform_source: str, currency: str, seen_at: datetime):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        UPDATE page_fingerprints
+        SET last_seen_at = MAX(last_seen_at, ?)
+        WHERE platform_source = ? AND currency = ?
+        """,
+        (to_db_timestamp(seen_at), platform_source, currency),
+    )
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+
+from app.core.config import QUERY_ITERSIZE, RATE_INGEST_METHOD, TIMEZONE
+from app.models.exchange_rate import RATE_SCALE, ExchangeRate
+from app.repositories.sqlite import TIMESTAMP_FORMAT, from_db_timestamp, to_db_timestamp
+
+_EPOCH = datetime(1970, 1, 1)
+
+_INSERT_RATE = """
+    INSERT INTO exchange_rates
+    (entity_id, currency_id, buy_micros, sell_micros, scraped_at, last_seen_at)
+    SELECT ?, c.id, ?, ?, ?, ?
+    FROM currencies c
+    WHERE c.code = ?
+    ON CONFLICT (entity_id, currency_id, scraped_at) DO NOTHING
+"""
+
+
+def _rate_params(entity_id: int, rate: ExchangeRate, last_seen_at: datetime | None = None) -> tuple:
+    return (
+        entity_id,
+        rate.buy_micros,
+        rate.sell_micros,
+        to_db_timestamp(rate.scraped_at),
+        to_db_timestamp(last_seen_at),
+        rate.currency,
+    )
+
+
+def _keys_json(keys: list[tuple[int, str]]) -> str:
+    """(entity_id, currency) pairs as a JSON array, joined through json_each in one query."""
+    return json.dumps([[entity_id, currency.upper()] for entity_id, currency in keys])
+
+
+def ensure_currencies(conn, codes) -> None:
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO currencies (code) VALUES (?) ON CONFLICT (code) DO NOTHING",
+        [(code,) for code in sorted(set(codes))],
+    )
+
+
+def insert_exchange_rate(conn, entity_id: int, rate: ExchangeRate):
+    ensure_currencies(conn, [rate.currency])
+    cursor = conn.cursor()
+    cursor.execute(_INSERT_RATE + " RETURNING id", _rate_params(entity_id, rate))
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+
+def bulk_insert_exchange_rates(
+    conn,
+    rates: list[tuple[int, ExchangeRate]],
+    method: str = RATE_INGEST_METHOD,
+) -> tuple[int, int]:
+    # There is no COPY; both methods are one prepared INSERT run for every row, in-process
+    if method not in ("copy", "values"):
+        raise ValueError(f"Unknown ingest method '{method}'. Supported methods: 'copy', 'values'.")
+    if not rates:
+        return 0, 0
+    ensure_currencies(conn, [rate.currency for _, rate in rates])
+    cursor = conn.cursor()
+    cursor.executemany(_INSERT_RATE, [_rate_params(entity_id, rate) for entity_id, rate in rates])
+    # rowcount sums the rows each execution inserted, without the triggers' writes
+    inserted = cursor.rowcount
+    return inserted, len(rates) - inserted
+
+
+def _rate_filters(
+    currency: str | None = None,
+    platform_source: str | None = None,
+    entity: str | None = None,
+    city: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> tuple[str, list]:
+    conditions, params = [], []
+    if currency is not None:
+        conditions.append("er.currency = ?")
+        params.append(currency.upper())
+    if platform_source is not None:
+        conditions.append("e.platform_source = ?")
+        params.append(platform_source)
+    if entity is not None:
+        # LIKE is case-insensitive for ASCII, like ILIKE
+        conditions.append("e.name LIKE ?")
+        params.append(f"%{entity}%")
+    if city is not None:
+        conditions.append("lower(e.city) = lower(?)")
+        params.append(city)
+    if since is not None:
+        conditions.append("er.scraped_at >= ?")
+        params.append(to_db_timestamp(since))
+    if until is not None:
+        conditions.append("er.scraped_at < ?")
+        params.append(to_db_timestamp(until))
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return where_clause, params
+
+
+def _rate_query_sql(where_clause: str, limited: bool) -> str:
+    return f"""
+        SELECT er.id, e.platform_source, e.name, e.city, er.currency, er.buy_rate, er.sell_rate,
+            er.scraped_at, COALESCE(er.last_seen_at, er.scraped_at)
+        FROM exchange_rates_decoded er
+        JOIN entities e ON er.entity_id = e.id
+        {where_clause}
+        ORDER BY er.scraped_at DESC, er.id DESC
+        {"LIMIT ?" if limited else ""}
+    """
+
+
+def _rate_row(r) -> tuple:
+    return (*r[:7], from_db_timestamp(r[7]), from_db_timestamp(r[8]))
+
+
+def get_rates(conn, **filters):
+    cursor = conn.cursor()
+    where_clause, params = _rate_filters(**filters)
+    cursor.execute(_rate_query_sql(where_clause, False), params)
+    return [_rate_row(r) for r in cursor.fetchall()]
+
+
+def iter_rates(conn, limit: int | None = None, itersize: int = QUERY_ITERSIZE, **filters):
+    where_clause, params = _rate_filters(**filters)
+    if limit is not None:
+        params.append(limit)
+
+    # SQLite steps through the result as it is read, so only arraysize rows are held at once
+    cursor = conn.cursor()
+    cursor.arraysize = itersize
+    try:
+        cursor.execute(_rate_query_sql(where_clause, limit is not None), params)
+        while rows := cursor.fetchmany():
+            for r in rows:
+                yield _rate_row(r)
+    finally:
+        cursor.close()
+
+
+def get_history_bounds(conn) -> tuple[datetime | None, datetime | None]:
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(scraped_at), MAX(scraped_at) FROM exchange_rates")
+    first, last = cursor.fetchone()
+    return from_db_timestamp(first), from_db_timestamp(last)
+
+
+def _epoch_micros(value: str | None) -> int | None:
+    if value is None:
+        return None
+    # Stored text is UTC, so it is read as naive UTC against the naive epoch
+    return (datetime.strptime(value, TIMESTAMP_FORMAT) - _EPOCH) // timedelta(microseconds=1)
+
+
+def iter_rate_history(conn, start: datetime, end: datetime, batch_rows: int):
+    cursor = conn.cursor()
+    cursor.arraysize = batch_rows
+    try:
+        cursor.execute(
+            """
+            SELECT er.entity_id, e.platform_source, e.name, e.city, c.code,
+                er.buy_micros / 1000000.0, er.sell_micros / 1000000.0, er.scraped_at, er.last_seen_at
+            FROM exchange_rates er
+            JOIN entities e ON er.entity_id = e.id
+            JOIN currencies c ON c.id = er.currency_id
+            WHERE er.scraped_at >= ? AND er.scraped_at < ?
+            """,
+            (to_db_timestamp(start), to_db_timestamp(end)),
+        )
+        while rows := cursor.fetchmany():
+            yield [(*r[:7], _epoch_micros(r[7]), _epoch_micros(r[8])) for r in rows]
+    finally:
+        cursor.close()
+
+
+def _latest_rates(conn, conditions: list[str], params: list, max_age_hours: float | None) -> list[dict]:
+    if max_age_hours is not None:
+        # Same freshness rule as Postgres: seen recently, or stored when its unchanged page first appeared
+        cutoff = to_db_timestamp(datetime.now(TIMEZONE) - timedelta(hours=max_age_hours))
+        conditions.append(
+            "(COALESCE(cr.last_seen_at, cr.scraped_at) >= ?"
+            " OR (pf.last_seen_at >= ? AND cr.scraped_at >= pf.changed_at))"
+        )
+        params.extend([cutoff] * 2)
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT
+            cr.rate_id,
+            cr.entity_id,
+            e.name,
+            e.platform_source,
+            cr.currency,
+            cr.buy_micros,
+            cr.sell_micros,
+            cr.scraped_at,
+            COALESCE(cr.last_seen_at, cr.scraped_at),
+            e.city
+        FROM current_rates cr
+        JOIN entities e ON cr.entity_id = e.id
+        LEFT JOIN page_fingerprints pf
+            ON pf.platform_source = e.platform_source AND pf.currency = cr.currency
+        {where_clause}
+        ORDER BY cr.currency, cr.entity_id
+        """,
+        params,
+    )
+    return [
+        {
+            "id": r[0],
+            "entity_id": r[1],
+            "name": r[2],
+            "platform_source": r[3],
+            "currency": r[4],
+            "buy_rate": r[5] / RATE_SCALE,
+            "sell_rate": r[6] / RATE_SCALE,
+            "scraped_at": from_db_timestamp(r[7]),
+            "last_seen_at": from_db_timestamp(r[8]),
+            "city": r[9],
+        }
+        for r in cursor.fetchall()
+    ]
+
+
+def get_latest_rates_by_currency(
+    conn,
+    currency: str,
+    exclude_entity_id: int | None = None,
+    max_age_hours: float | None = None,
+):
+    conditions = ["cr.currency = ?"]
+    params = [currency.upper()]
+    if exclude_entity_id is not None:
+        conditions.append("cr.entity_id != ?")
+        params.append(exclude_entity_id)
+    return _latest_rates(conn, conditions, params, max_age_hours)
+
+
+def get_latest_rates_for_currencies(conn, currencies: list[str] | None = None, max_age_hours: float | None = None):
+    conditions, params = [], []
+    if currencies is not None:
+        conditions.append("cr.currency IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(sorted({currency.upper() for currency in currencies})))
+
+    by_currency = {}
+    for row in _latest_rates(conn, conditions, params, max_age_hours):
+        by_currency.setdefault(row["currency"], []).append(row)
+    return by_currency
+
+
+def get_latest_rate_for_entity(conn, entity_id: int, currency: str):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT buy_micros, sell_micros FROM current_rates WHERE entity_id = ? AND currency = ?",
+        (entity_id, currency.upper()),
+    )
+    row = cursor.fetchone()
+    if row:
+        return {"buy_rate": row[0] / RATE_SCALE, "sell_rate": row[1] / RATE_SCALE}
+    return None
+
+
+def get_latest_rates_for_keys(conn, keys: list[tuple[int, str]]):
+    if not keys:
+        return {}
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT cr.entity_id, cr.currency, cr.buy_micros, cr.sell_micros
+        FROM json_each(?) k
+        JOIN current_rates cr
+            ON cr.entity_id = json_extract(k.value, '$[0]') AND cr.currency = json_extract(k.value, '$[1]')
+        """,
+        (_keys_json(keys),),
+    )
+    return {
+        (r[0], r[1]): (r[2] / RATE_SCALE, r[3] / RATE_SCALE) for r in cursor.fetchall()
+    }
+
+
+def get_current_intervals(conn, keys: list[tuple[int, str]]):
+    if not keys:
+        return {}
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT cr.entity_id, cr.currency, cr.rate_id, cr.scraped_at, cr.buy_micros, cr.sell_micros,
+            COALESCE(cr.last_seen_at, cr.scraped_at)
+        FROM json_each(?) k
+        JOIN current_rates cr
+            ON cr.entity_id = json_extract(k.value, '$[0]') AND cr.currency = json_extract(k.value, '$[1]')
+        """,
+        (_keys_json(keys),),
+    )
+    return {
+        (r[0], r[1]): {
+            "id": r[2],
+            "scraped_at": from_db_timestamp(r[3]),
+            "buy_rate": r[4] / RATE_SCALE,
+            "sell_rate": r[5] / RATE_SCALE,
+            "last_seen_at": from_db_timestamp(r[6]),
+        }
+        for r in cursor.fetchall()
+    }
+
+
+def insert_rate_intervals(conn, intervals: list[tuple[int, ExchangeRate, datetime]]) -> int:
+    if not intervals:
+        return 0
+    ensure_currencies(conn, [rate.currency for _, rate, _ in intervals])
+    cursor = conn.cursor()
+    cursor.executemany(
+        _INSERT_RATE,
+        [_rate_params(entity_id, rate, last_seen_at) for entity_id, rate, last_seen_at in intervals],
+    )
+    return cursor.rowcount
+
+
+def extend_rate_intervals(conn, last_seen: dict[tuple[int, datetime], datetime]):
+    if not last_seen:
+        return
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE exchange_rates SET last_seen_at = ? WHERE id = ?",
+        [(to_db_timestamp(seen_at), row_id) for (row_id, _), seen_at in last_seen.items()],
+    )
@@ -1,90 +1,178 @@
-import time
-from datetime import datetime
+from __future__ import annotations
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select, WebDriverWait
 
-from app.core.config import BNR_URL, TIMESTAMP_FORMAT, TIMEZONE
+from app.core.config import (
+    BNR_HTTP_URL,
+    BNR_URL,
+    SCRAPER_FETCH_MODE,
+    WAIT_TIMEOUT_SECONDS,
+)
 from app.models.entity import Entity
 from app.models.exchange_rate import ExchangeRate
 from app.models.scraped_record import ScrapedRecord
-from app.scrapers.driver import get_driver
+from app.repositories.page_archive import archive_page
+from app.scrapers.driver_pool import driver_session
+from app.scrapers.http_client import fetch_html, scrape_with_fallback
+from app.scrapers.parsing import (
+    bs4_document,
+    lxml_document,
+    lxml_text,
+    now_timestamp,
+    parse_rate,
+    resolve_backend,
+)
+from app.scrapers.waits import wait_until_stable
 
 SOURCE_NAME = "BNR"
+CURRENCIES = ["EUR", "USD", "GBP"]
 
 
-def scrape_bnr() -> list[ScrapedRecord]:
-    """Scrape exchange rates from cursbnr.ro (EUR, USD, GBP)."""
-    driver = None
+def scrape_bnr(fetch_mode: str = SCRAPER_FETCH_MODE) -> list[ScrapedRecord]:
+    """Scrape exchange rates from cursbnr.ro (EUR, USD, GBP), skipping currencies that fail."""
     all_rates = []
-    currencies = ["EUR", "USD", "GBP"]
-    try:
-        driver = get_driver()
-        driver.get(BNR_URL)
-        wait_for_proper_loading(driver)
+    for currency in CURRENCIES:
+        try:
+            all_rates.extend(scrape_bnr_currency(currency, fetch_mode))
+        except Exception as e:  # noqa: BLE001
+            print(f"[ERROR] BNR {currency} scraping failed: {e}")
+    return all_rates
+
 
-        for currency in currencies:
-            html = fetch_page_source(driver, currency)
-            rates = parse_html(html, currency)
-            all_rates.extend(rates)
+def scrape_bnr_currency(currency: str, fetch_mode: str = SCRAPER_FETCH_MODE) -> list[ScrapedRecord]:
+    """Scrape a single currency with its own HTTP session or browser, raising on failure."""
+    return scrape_with_fallback(SOURCE_NAME, currency, fetch_mode, scrape_bnr_http, scrape_bnr_selenium)
 
-        return all_rates
 
-    except Exception as e:  # noqa: BLE001
-        print(f"[ERROR] BNR scraping failed: {e}")
-        return all_rates
+def scrape_bnr_http(currency: str) -> list[ScrapedRecord]:
+    """Scrape one currency over plain HTTP."""
+    return records_from_html(fetch_page_source_http(currency), currency)
 
-    finally:
-        if driver:
-            driver.quit()
+
+def scrape_bnr_selenium(currency: str) -> list[ScrapedRecord]:
+    """Scrape one currency by driving a headless Chrome."""
+    with driver_session(SOURCE_NAME) as driver:
+        driver.get(BNR_URL)
+        wait_for_proper_loading(driver)
+        return records_from_html(fetch_page_source(driver, currency), currency)
 
 
 def fetch_page_source(driver, currency: str) -> str:
     """Select currency and fetch page source HTML."""
     select_element = driver.find_element(By.ID, "c1")
     select = Select(select_element)
-    select.select_by_value(currency)
+    if select.first_selected_option.get_attribute("value") != currency:
+        before = table_text(driver)
+        select.select_by_value(currency)
+        # The table is redrawn in place: wait for new contents, then for them to settle. If they
+        # never change, the page still shows the previous currency, so don't parse it as this one.
+        wait_until_stable(
+            lambda: table_text(driver),
+            name=f"bnr_select_{currency}",
+            ready=lambda text: bool(text) and text != before,
+            raise_on_timeout=True,
+        )
 
-    time.sleep(2)
     wait_for_proper_loading(driver)
     return driver.page_source
 
 
-def parse_html(html: str, currency: str) -> list[ScrapedRecord]:
-    """Extract exchange rates from HTML using BeautifulSoup."""
+def fetch_page_source_http(currency: str) -> str:
+    """Fetch the rates page for a currency without a browser.
+
+    The currency selector is applied client-side in the browser, so the server-rendered
+    page must already show the requested currency. A page that shows another currency,
+    or none the dropdown can confirm, is rejected so the caller falls back to Selenium.
+    """
+    html = fetch_html(BNR_HTTP_URL.format(currency))
+    shown = selected_currency(html)
+    if shown is None:
+        raise ValueError(f"could not confirm that the page shows {currency}")
+    if shown.upper() != currency.upper():
+        raise ValueError(f"page shows {shown} instead of {currency}")
+    return html
+
+
+def selected_currency(html: str) -> str | None:
+    """Return the currency selected in the page's currency dropdown, if the page has one."""
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("select", id="c1"))
+    option = soup.select_one("option[selected]")
+    return option.get("value") if option else None
+
+
+def records_from_html(html: str, currency: str) -> list[ScrapedRecord]:
+    """Parse a freshly fetched page, archiving it only if it yielded records."""
+    timestamp = now_timestamp()
+    records = parse_html(html, currency, timestamp=timestamp)
+    if records:
+        archive_page(SOURCE_NAME, currency, timestamp, html)
+    return records
+
+
+def parse_html(
+    html: str,
+    currency: str,
+    backend: str | None = None,
+    timestamp: str | None = None,
+) -> list[ScrapedRecord]:
+    """Extract exchange rates from HTML with the configured parser backend."""
+    backend = resolve_backend(backend)
+    rows = extract_rows_lxml(html) if backend == "lxml" else extract_rows_bs4(html)
+    return build_records(rows, currency, timestamp)
+
+
+def extract_rows_bs4(html: str) -> list[tuple[str, str, str]]:
+    """Return (bank, buy, sell) cell texts for every table row with at least three cells."""
+    rows = []
+    for row in bs4_document(html).find_all("tr"):
+        cells = row.find_all("td")
+        if len(cells) >= 3:
+            rows.append(tuple(cell.get_text(strip=True) for cell in cells[:3]))
+    return rows
+
+
+def extract_rows_lxml(html: str) -> list[tuple[str, str, str]]:
+    """lxml equivalent of extract_rows_bs4."""
+    rows = []
+    for row in lxml_document(html).iter("tr"):
+        cells = row.xpath(".//td")
+        if len(cells) >= 3:
+            rows.append(tuple(lxml_text(cell) for cell in cells[:3]))
+    return rows
+
+
+def build_records(
+    rows: list[tuple[str, str, str]],
+    currency: str,
+    timestamp: str | None = None,
+) -> list[ScrapedRecord]:
+    """Turn extracted (bank, buy, sell) texts into records, skipping incomplete or invalid rows."""
     rates = []
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.find_all("tr")
+    timestamp = timestamp or now_timestamp()
 
-    for row in rows:
+    for bank_name, buy_rate, sell_rate in rows:
+        if not (buy_rate and sell_rate and bank_name):
+            continue
         try:
-            cells = row.find_all("td")
-            if len(cells) < 3:
-                continue
-
-            bank_name = cells[0].get_text(strip=True)
-            buy_rate = cells[1].get_text(strip=True)
-            sell_rate = cells[2].get_text(strip=True)
-
-            if buy_rate and sell_rate and bank_name:
-                rates.append(
-                    ScrapedRecord(
-                        entity=Entity(
-                            platform_source=SOURCE_NAME,
-                            name=bank_name,
-                            city=None,
-                            type="bank",
-                        ),
-                        rate=ExchangeRate(
-                            currency=currency,
-                            buy=float(buy_rate.replace(",", ".")),
-                            sell=float(sell_rate.replace(",", ".")),
-                            timestamp=datetime.now(TIMEZONE).strftime(TIMESTAMP_FORMAT),
-                        ),
-                    )
+            rates.append(
+                ScrapedRecord(
+                    entity=Entity(
+                        platform_source=SOURCE_NAME,
+                        name=bank_name,
+                        city=None,
+                        type="bank",
+                    ),
+                    rate=ExchangeRate(
+                        currency=currency,
+                        buy=parse_rate(buy_rate),
+                        sell=parse_rate(sell_rate),
+                        timestamp=timestamp,
+                    ),
                 )
+            )
         except ValueError as e:
             print(f"[WARNING] BNR scraping skipped row due to value error: {e}")
             continue
@@ -92,11 +180,23 @@ def parse_html(html: str, currency: str) -> list[ScrapedRecord]:
 
 
 def wait_for_proper_loading(driver):
-    """Wait for the table to load properly."""
-    WebDriverWait(driver, 15).until(
+    """Wait for the table to appear and its row count to stop changing."""
+    WebDriverWait(driver, WAIT_TIMEOUT_SECONDS).until(
         EC.presence_of_element_located((By.TAG_NAME, "table"))
     )
-    time.sleep(2)
+    wait_until_stable(lambda: row_count(driver), name="bnr_table")
+
+
+def row_count(driver) -> int:
+    """Count table rows in-page."""
+    return driver.execute_script("return document.querySelectorAll('table tr').length;")
+
+
+def table_text(driver) -> str:
+    """Return the rendered text of the rates table, or an empty string if it is missing."""
+    return driver.execute_script(
+        "const t = document.querySelector('table'); return t ? t.innerText : '';"
+    )
 
 
 if __name__ == "__main__":
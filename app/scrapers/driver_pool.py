@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+from app.core.config import (
+    DRIVER_ACQUIRE_TIMEOUT_SECONDS,
+    DRIVER_MAX_HEAP_MB,
+    DRIVER_MAX_USES,
+    DRIVER_POOL_SIZE,
+)
+from app.scrapers.driver import apply_resource_blocking, get_driver
+
+logger = logging.getLogger(__name__)
+
+_pool: DriverPool | None = None
+
+
+class DriverPool:
+    """
+    A bounded pool of warm Chrome drivers.
+
+    Drivers are health-checked on checkout and quit instead of returned once they have
+    served `max_uses` checkouts, their JS heap exceeds `max_heap_mb`, or the caller
+    raised while using them. A checkout that finds no free slot within `acquire_timeout`
+    seconds raises TimeoutError.
+    """
+
+    def __init__(
+        self,
+        size: int = DRIVER_POOL_SIZE,
+        max_uses: int = DRIVER_MAX_USES,
+        max_heap_mb: float = DRIVER_MAX_HEAP_MB,
+        factory=get_driver,
+        acquire_timeout: float = DRIVER_ACQUIRE_TIMEOUT_SECONDS,
+    ):
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self.max_heap_mb = max_heap_mb
+        self._factory = factory
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._uses = {}
+        self._closed = False
+
+    @contextmanager
+    def acquire(self, timeout: float | None = None):
+        """Check out a healthy driver, waiting up to `timeout` seconds (acquire_timeout if None) for a free slot."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No browser available in the driver pool after {timeout}s")
+
+        driver = None
+        try:
+            driver = self._checkout()
+            yield driver
+        except BaseException:
+            if driver is not None:
+                self._discard(driver, "caller raised")
+            raise
+        else:
+            self._checkin(driver)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Quit every idle driver and refuse further checkouts."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver, "pool closed")
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                driver = self._idle.pop() if self._idle else None
+
+            if driver is None:
+                driver = self._factory()
+                self._uses[id(driver)] = 0
+                return driver
+            if self._is_healthy(driver):
+                return driver
+            self._discard(driver, "failed health check")
+
+    def _checkin(self, driver):
+        self._uses[id(driver)] += 1
+        if self._uses[id(driver)] >= self.max_uses:
+            self._discard(driver, f"reached {self.max_uses} uses")
+            return
+
+        heap_mb = self._heap_mb(driver)
+        if heap_mb is None or heap_mb > self.max_heap_mb:
+            self._discard(driver, "memory limit exceeded or unreadable")
+            return
+
+        with self._lock:
+            if not self._closed:
+                self._idle.append(driver)
+                return
+        self._discard(driver, "pool closed")
+
+    def _discard(self, driver, reason: str):
+        logger.info(f"Recycling browser: {reason}")
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            logger.warning(f"Failed to quit browser: {e}")
+
+    @staticmethod
+    def _is_healthy(driver) -> bool:
+        try:
+            return driver.execute_script("return 1;") == 1
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def _heap_mb(driver) -> float | None:
+        """JS heap in use by the current page (Chrome only), or None if the browser is unresponsive."""
+        try:
+            used = driver.execute_script(
+                "return performance.memory ? performance.memory.usedJSHeapSize : 0;"
+            )
+            # Drop the page so the next checkout starts from a blank tab
+            driver.get("about:blank")
+        except WebDriverException:
+            return None
+        return used / (1024 * 1024)
+
+
+def install_pool(pool: DriverPool | None):
+    """Make scrapers check drivers out of `pool`; pass None to go back to one browser per call."""
+    global _pool
+    _pool = pool
+
+
+@contextmanager
+def driver_session(source: str | None = None):
+    """
+    Yield a driver from the installed pool, or a fresh one that is quit afterwards.
+
+    The driver's resource blocklist is set for `source` on every checkout, since pooled
+    drivers move between sources.
+    """
+    if _pool is not None:
+        with _pool.acquire() as driver:
+            apply_resource_blocking(driver, source)
+            yield driver
+        return
+
+    driver = get_driver()
+    try:
+        apply_resource_blocking(driver, source)
+        yield driver
+    finally:
+        driver.quit()
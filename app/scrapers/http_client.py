@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import HTTP_POOL_SIZE, HTTP_TIMEOUT_SECONDS, USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+T = TypeVar("T")
+
+
+def get_session() -> requests.Session:
+    """Return this thread's keep-alive HTTP session, creating it on first use."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(
+            {
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml",
+                "Accept-Encoding": "gzip, deflate",
+            }
+        )
+        _local.session = session
+    return session
+
+
+def fetch_html(url: str, session: requests.Session | None = None) -> str:
+    """GET a page and return its decoded HTML, raising on HTTP errors."""
+    session = session or get_session()
+    response = session.get(url, timeout=HTTP_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    if "charset" not in response.headers.get("Content-Type", ""):
+        response.encoding = "utf-8"
+    return response.text
+
+
+def close_session():
+    """Close this thread's HTTP session, if one was opened."""
+    session = getattr(_local, "session", None)
+    if session is not None:
+        session.close()
+        _local.session = None
+
+
+def scrape_with_fallback(
+    source: str,
+    currency: str,
+    fetch_mode: str,
+    scrape_http: Callable[[str], list[T]],
+    scrape_browser: Callable[[str], list[T]],
+) -> list[T]:
+    """
+    Scrape one currency page over HTTP when `fetch_mode` is "http", falling back to the browser.
+
+    The browser is used if the fetch fails, the page is rejected with a ValueError or it
+    yields no rows; with any other fetch mode it is used directly.
+    """
+    if fetch_mode == "http":
+        try:
+            records = scrape_http(currency)
+            if records:
+                return records
+            logger.warning(f"{source} {currency} HTTP page had no rows, falling back to Selenium")
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"{source} {currency} HTTP fetch failed, falling back to Selenium: {e}", exc_info=True)
+    return scrape_browser(currency)
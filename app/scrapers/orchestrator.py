@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable
+
+from app.core.config import (
+    BNR_MAX_WORKERS,
+    BNR_TIMEOUT_SECONDS,
+    VALUTARE_MAX_WORKERS,
+    VALUTARE_TIMEOUT_SECONDS,
+)
+from app.models.scraped_record import ScrapedRecord
+from app.scrapers import bnr_scraper, valutare_scraper
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScraperSource:
+    """
+    A scraper that can fetch one currency page per call, with its own worker budget.
+
+    fetch_html and parse_html split an HTTP scrape into its download and parsing steps,
+    for runners that fetch and parse on different executors; scrape_currency does both.
+    """
+
+    name: str
+    scrape_currency: Callable[..., list[ScrapedRecord]]
+    currencies: list[str]
+    max_workers: int
+    timeout: float
+    fetch_html: Callable[[str], str] | None = None
+    parse_html: Callable[..., list[ScrapedRecord]] | None = None
+
+
+@dataclass
+class PageResult:
+    """Outcome of scraping one (source, currency) page."""
+
+    source: str
+    currency: str
+    records: list[ScrapedRecord] = field(default_factory=list)
+    error: str | None = None
+    elapsed: float = 0.0
+
+
+def default_sources() -> list[ScraperSource]:
+    """Return the scrapers run by the pipeline, with their configured limits."""
+    return [
+        ScraperSource(
+            name=valutare_scraper.SOURCE_NAME,
+            scrape_currency=valutare_scraper.scrape_valutare_currency,
+            currencies=valutare_scraper.CURRENCIES,
+            max_workers=VALUTARE_MAX_WORKERS,
+            timeout=VALUTARE_TIMEOUT_SECONDS,
+            fetch_html=valutare_scraper.fetch_page_source_http,
+            parse_html=valutare_scraper.parse_html,
+        ),
+        ScraperSource(
+            name=bnr_scraper.SOURCE_NAME,
+            scrape_currency=bnr_scraper.scrape_bnr_currency,
+            currencies=bnr_scraper.CURRENCIES,
+            max_workers=BNR_MAX_WORKERS,
+            timeout=BNR_TIMEOUT_SECONDS,
+            fetch_html=bnr_scraper.fetch_page_source_http,
+            parse_html=bnr_scraper.parse_html,
+        ),
+    ]
+
+
+def _timed(scrape_currency, currency: str):
+    start = time.monotonic()
+    records = scrape_currency(currency)
+    return records, time.monotonic() - start
+
+
+def iter_sources(sources: list[ScraperSource] | None = None) -> Iterator[PageResult]:
+    """
+    Scrape every (source, currency) page concurrently, yielding each result as soon as it is ready.
+
+    Each source gets its own bounded thread pool, so every worker opens its own HTTP
+    session or browser. A page that raises is yielded as an error; once a source's
+    timeout expires, its unfinished pages are yielded as timed out, so a stalled
+    source never holds back pages from the others. A running thread can't be cancelled:
+    a timed-out page's worker is abandoned and keeps its HTTP session or browser until
+    HTTP_TIMEOUT_SECONDS or the driver's page-load and script timeouts end its scrape.
+    """
+    sources = default_sources() if sources is None else sources
+    start = time.monotonic()
+
+    pages = {}
+    executors = []
+    for source in sources:
+        executor = ThreadPoolExecutor(max_workers=source.max_workers, thread_name_prefix=source.name)
+        executors.append(executor)
+        for currency in source.currencies:
+            pages[executor.submit(_timed, source.scrape_currency, currency)] = (source, currency)
+
+    try:
+        while pages:
+            next_deadline = min(start + source.timeout for source, _ in pages.values())
+            done, _ = wait(pages, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            expired = {future for future, (source, _) in pages.items() if start + source.timeout <= now}
+            for future in done | expired:
+                source, currency = pages.pop(future)
+                result = PageResult(source=source.name, currency=currency)
+                if not future.done():
+                    future.cancel()
+                    result.error = f"timed out after {source.timeout}s"
+                elif future.exception() is not None:
+                    result.error = str(future.exception())
+                else:
+                    result.records, result.elapsed = future.result()
+
+                if result.error:
+                    logger.error(f"Scraper {source.name} {currency} failed: {result.error}")
+                yield result
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_sources(sources: list[ScraperSource] | None = None) -> list[PageResult]:
+    """Scrape every (source, currency) page concurrently and return one result per page."""
+    return list(iter_sources(sources))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:  # optional "fast" extra
+    lxml = None
+
+from app.core.config import HTML_PARSER_BACKEND, TIMESTAMP_FORMAT, TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("bs4", "lxml")
+
+
+def available_backends() -> list[str]:
+    """Return the parser backends that can be used in this environment."""
+    return [b for b in BACKENDS if b != "lxml" or lxml is not None]
+
+
+def resolve_backend(backend: str | None = None) -> str:
+    """Pick the requested backend, falling back to bs4 when lxml is not installed."""
+    backend = backend or HTML_PARSER_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend '{backend}'. Supported backends: {', '.join(BACKENDS)}.")
+    if backend == "lxml" and lxml is None:
+        logger.warning("lxml is not installed, parsing with BeautifulSoup instead")
+        return "bs4"
+    return backend
+
+
+def bs4_document(html: str):
+    return BeautifulSoup(html, "html.parser")
+
+
+def lxml_document(html: str):
+    return lxml.html.document_fromstring(html)
+
+
+def lxml_text(element) -> str:
+    """Element text with each fragment stripped, matching bs4's get_text(strip=True)."""
+    if element is None:
+        return ""
+    return "".join(s.strip() for s in element.itertext())
+
+
+def class_xpath(class_name: str) -> str:
+    """XPath predicate matching elements whose class list contains class_name, like CSS '.name'."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def parse_rate(text: str) -> float:
+    """Convert a scraped rate string with a comma or dot decimal separator to float."""
+    return float(text.replace(",", "."))
+
+
+def now_timestamp() -> str:
+    """Current local time in the format records are stamped with."""
+    return datetime.now(TIMEZONE).strftime(TIMESTAMP_FORMAT)
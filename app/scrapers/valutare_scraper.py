@@ -1,95 +1,209 @@
-import time
-from datetime import datetime
+from __future__ import annotations
+
+import json
 
-from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
-from app.core.config import TIMESTAMP_FORMAT, TIMEZONE, VALUTARE_URL
+from app.core.config import (
+    MAX_SCROLL_ATTEMPTS,
+    SCRAPER_FETCH_MODE,
+    SCROLL_WAIT_SECONDS,
+    VALUTARE_EXTRACTION_MODE,
+    VALUTARE_URL,
+    WAIT_TIMEOUT_SECONDS,
+)
 from app.models.entity import Entity
 from app.models.exchange_rate import ExchangeRate
 from app.models.scraped_record import ScrapedRecord
-from app.scrapers.driver import get_driver
+from app.repositories.page_archive import archive_page
+from app.scrapers.driver_pool import driver_session
+from app.scrapers.http_client import fetch_html, scrape_with_fallback
+from app.scrapers.parsing import (
+    bs4_document,
+    class_xpath,
+    lxml_document,
+    lxml_text,
+    now_timestamp,
+    parse_rate,
+    resolve_backend,
+)
+from app.scrapers.waits import wait_until_stable
 
 SOURCE_NAME = "Valutare"
+CURRENCIES = ["EUR", "USD", "GBP"]
 
 
-def scrape_valutare() -> list[ScrapedRecord]:
-    """Scrape exchange rates from valutare.ro (EUR, USD, GBP)."""
-    driver = None
+def scrape_valutare(fetch_mode: str = SCRAPER_FETCH_MODE) -> list[ScrapedRecord]:
+    """Scrape exchange rates from valutare.ro (EUR, USD, GBP), skipping currencies that fail."""
     all_rates = []
-    currencies = ["EUR", "USD", "GBP"]
-    try:
-        driver = get_driver()
-        for currency in currencies:
-            html = fetch_page_source(driver, currency)
-            rates = parse_html(html, currency)
-            all_rates.extend(rates)
+    for currency in CURRENCIES:
+        try:
+            all_rates.extend(scrape_valutare_currency(currency, fetch_mode))
+        except Exception as e:  # noqa: BLE001
+            print(f"[ERROR] Valutare {currency} scraping failed: {e}")
+    return all_rates
 
-        return all_rates
 
-    except Exception as e:  # noqa: BLE001
-        print(f"[ERROR] Valutare scraping failed: {e}")
-        return all_rates
+def scrape_valutare_currency(currency: str, fetch_mode: str = SCRAPER_FETCH_MODE) -> list[ScrapedRecord]:
+    """Scrape a single currency with its own HTTP session or browser, raising on failure."""
+    return scrape_with_fallback(SOURCE_NAME, currency, fetch_mode, scrape_valutare_http, scrape_valutare_selenium)
 
-    finally:
-        if driver:
-            driver.quit()
 
+def scrape_valutare_http(currency: str) -> list[ScrapedRecord]:
+    """Scrape one currency over plain HTTP."""
+    return records_from_html(fetch_page_source_http(currency), currency)
 
-def fetch_page_source(driver, currency: str) -> str:
-    """Fetch page source HTML after lazy loading."""
+
+def scrape_valutare_selenium(currency: str) -> list[ScrapedRecord]:
+    """Scrape one currency by driving a headless Chrome."""
+    with driver_session(SOURCE_NAME) as driver:
+        return scrape_page(driver, currency)
+
+
+def scrape_page(driver, currency: str, extraction_mode: str = VALUTARE_EXTRACTION_MODE) -> list[ScrapedRecord]:
+    """Load a currency page in the browser and extract its records in-page or from the HTML."""
+    if extraction_mode == "script":
+        load_page(driver, currency)
+        return records_from_rows(extract_rows_in_page(driver), currency)
+    return records_from_html(fetch_page_source(driver, currency), currency)
+
+
+def load_page(driver, currency: str):
+    """Open a currency page and scroll until lazy loading stops."""
     url = VALUTARE_URL.format(currency.lower())
     driver.get(url)
     wait_for_proper_loading(driver)
     handle_lazy_loading(driver)
+
+
+def fetch_page_source(driver, currency: str) -> str:
+    """Fetch page source HTML after lazy loading."""
+    load_page(driver, currency)
     return driver.page_source
 
 
-def parse_html(html: str, currency: str) -> list[ScrapedRecord]:
-    """Extract exchange rates from HTML using BeautifulSoup."""
+# Mirrors extract_rows_bs4: each field is the first matching descendant's text nodes,
+# trimmed and concatenated the way BeautifulSoup's get_text(strip=True) does.
+_EXTRACT_ROWS_JS = """
+const text = (row, selector) => {
+    const el = row.querySelector(selector);
+    if (!el) return "";
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    let out = "";
+    while (walker.nextNode()) out += walker.currentNode.nodeValue.trim();
+    return out;
+};
+return Array.from(document.querySelectorAll(".exchange-row"), row => ({
+    name: text(row, ".exchange-name-txt"),
+    city: text(row, ".oras"),
+    buy: text(row, ".buy-rate"),
+    sell: text(row, ".sell-rate"),
+}));
+"""
+
+
+def records_from_rows(rows: list[tuple[str, str, str, str]], currency: str) -> list[ScrapedRecord]:
+    """Build records from rows extracted in-page, archiving the rows as JSON if any records came out."""
+    timestamp = now_timestamp()
+    records = build_records(rows, currency, timestamp)
+    if records:
+        archive_page(SOURCE_NAME, currency, timestamp, json.dumps(rows, ensure_ascii=False), kind="rows")
+    return records
+
+
+def extract_rows_in_page(driver) -> list[tuple[str, str, str, str]]:
+    """Extract (name, city, buy, sell) texts for every row with a single script call."""
+    return [(r["name"], r["city"], r["buy"], r["sell"]) for r in driver.execute_script(_EXTRACT_ROWS_JS)]
+
+
+def fetch_page_source_http(currency: str) -> str:
+    """Fetch the server-rendered page for a currency without a browser."""
+    return fetch_html(VALUTARE_URL.format(currency.lower()))
+
+
+def records_from_html(html: str, currency: str) -> list[ScrapedRecord]:
+    """Parse a freshly fetched page, archiving it only if it yielded records."""
+    timestamp = now_timestamp()
+    records = parse_html(html, currency, timestamp=timestamp)
+    if records:
+        archive_page(SOURCE_NAME, currency, timestamp, html)
+    return records
+
+
+def parse_html(
+    html: str,
+    currency: str,
+    backend: str | None = None,
+    timestamp: str | None = None,
+) -> list[ScrapedRecord]:
+    """Extract exchange rates from HTML with the configured parser backend."""
+    backend = resolve_backend(backend)
+    rows = extract_rows_lxml(html) if backend == "lxml" else extract_rows_bs4(html)
+    return build_records(rows, currency, timestamp)
+
+
+def extract_rows_bs4(html: str) -> list[tuple[str, str, str, str]]:
+    """Return (name, city, buy, sell) texts for every .exchange-row; missing fields are empty."""
+    rows = []
+    for row in bs4_document(html).select(".exchange-row"):
+        texts = []
+        for selector in (".exchange-name-txt", ".oras", ".buy-rate", ".sell-rate"):
+            el = row.select_one(selector)
+            texts.append(el.get_text(strip=True) if el else "")
+        rows.append(tuple(texts))
+    return rows
+
+
+_FIELD_CLASSES = ("exchange-name-txt", "oras", "buy-rate", "sell-rate")
+
+
+def extract_rows_lxml(html: str) -> list[tuple[str, str, str, str]]:
+    """lxml equivalent of extract_rows_bs4, finding each row's fields in one descendant pass."""
+    rows = []
+    for row in lxml_document(html).xpath(f"//*[{class_xpath('exchange-row')}]"):
+        found = {}
+        for el in row.iterdescendants():
+            for cls in (el.get("class") or "").split():
+                if cls in _FIELD_CLASSES and cls not in found:
+                    found[cls] = el
+        rows.append(tuple(lxml_text(found.get(cls)) for cls in _FIELD_CLASSES))
+    return rows
+
+
+def build_records(
+    rows: list[tuple[str, str, str, str]],
+    currency: str,
+    timestamp: str | None = None,
+) -> list[ScrapedRecord]:
+    """Turn extracted (name, city, buy, sell) texts into records, skipping incomplete or invalid rows."""
     rates = []
-    soup = BeautifulSoup(html, "html.parser")
-    exchange_rows = soup.select(".exchange-row")
+    timestamp = timestamp or now_timestamp()
 
-    for row in exchange_rows:
+    for exchange_name, city_name, buy_text, sell_text in rows:
+        # Rates are rendered with a unit suffix, e.g. "4.9500 RON"
+        buy_rate = buy_text.split()[0] if buy_text else ""
+        sell_rate = sell_text.split()[0] if sell_text else ""
+        if not (buy_rate and sell_rate):
+            continue
         try:
-            # Get exchange name
-            name_el = row.select_one(".exchange-name-txt")
-            exchange_name = name_el.get_text(strip=True) if name_el else ""
-
-            # Get exchange city
-            city_el = row.select_one(".oras")
-            city_name = city_el.get_text(strip=True) if city_el else ""
-
-            # Get buy rate
-            buy_el = row.select_one(".buy-rate")
-            buy_text = buy_el.get_text(strip=True) if buy_el else ""
-            buy_rate = buy_text.split()[0] if buy_text else ""
-
-            # Get sell rate
-            sell_el = row.select_one(".sell-rate")
-            sell_text = sell_el.get_text(strip=True) if sell_el else ""
-            sell_rate = sell_text.split()[0] if sell_text else ""
-
-            if buy_rate and sell_rate:
-                rates.append(
-                    ScrapedRecord(
-                        entity=Entity(
-                            platform_source=SOURCE_NAME,
-                            name=exchange_name,
-                            city=city_name,
-                            type="exchange_office",
-                        ),
-                        rate=ExchangeRate(
-                            currency=currency,
-                            buy=float(buy_rate.replace(",", ".")),
-                            sell=float(sell_rate.replace(",", ".")),
-                            timestamp=datetime.now(TIMEZONE).strftime(TIMESTAMP_FORMAT),
-                        ),
-                    )
+            rates.append(
+                ScrapedRecord(
+                    entity=Entity(
+                        platform_source=SOURCE_NAME,
+                        name=exchange_name,
+                        city=city_name,
+                        type="exchange_office",
+                    ),
+                    rate=ExchangeRate(
+                        currency=currency,
+                        buy=parse_rate(buy_rate),
+                        sell=parse_rate(sell_rate),
+                        timestamp=timestamp,
+                    ),
                 )
+            )
         except ValueError as e:
             print(f"[WARNING] Valutare scraping skipped row due to value error: {e}")
             continue
@@ -98,29 +212,35 @@ def parse_html(html: str, currency: str) -> list[ScrapedRecord]:
 
 def handle_lazy_loading(driver):
     """Handle lazy loading by scrolling down until no new rows are loaded."""
-    max_scroll_attempts = 10
-    scroll_attempts = 0
-
-    while scroll_attempts < max_scroll_attempts:
-        current_rows = driver.find_elements(By.CLASS_NAME, "exchange-row")
-        current_count = len(current_rows)
+    current_count = row_count(driver)
 
+    for attempt in range(MAX_SCROLL_ATTEMPTS):
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(1)
 
-        new_rows = driver.find_elements(By.CLASS_NAME, "exchange-row")
-        if len(new_rows) == current_count and current_count > 0:
+        # Return as soon as new rows arrive; a full SCROLL_WAIT_SECONDS means the list is exhausted
+        new_count = wait_until_stable(
+            lambda: row_count(driver),
+            name=f"valutare_scroll_{attempt}",
+            ready=lambda n, previous=current_count: n > previous,
+            timeout=SCROLL_WAIT_SECONDS,
+            settle=0,
+        )
+        if new_count == current_count and current_count > 0:
             break
+        current_count = new_count
+
 
-        scroll_attempts += 1
+def row_count(driver) -> int:
+    """Count loaded exchange rows in-page."""
+    return driver.execute_script("return document.getElementsByClassName('exchange-row').length;")
 
 
 def wait_for_proper_loading(driver):
-    """Wait for the table to load properly."""
-    WebDriverWait(driver, 15).until(
+    """Wait for the grid to appear and its row count to stop changing."""
+    WebDriverWait(driver, WAIT_TIMEOUT_SECONDS).until(
         EC.presence_of_element_located((By.CLASS_NAME, "exchangegrid"))
     )
-    time.sleep(2)
+    wait_until_stable(lambda: row_count(driver), name="valutare_grid")
 
 
 if __name__ == "__main__":
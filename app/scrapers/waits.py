@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+from app.core.config import (
+    WAIT_POLL_INTERVAL_SECONDS,
+    WAIT_SETTLE_SECONDS,
+    WAIT_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Only the most recent waits are kept, so a long-running daemon doesn't accumulate them
+MAX_WAIT_TIMINGS = 1000
+
+_timings: deque[WaitTiming] = deque(maxlen=MAX_WAIT_TIMINGS)
+_timings_lock = threading.Lock()
+
+
+@dataclass
+class WaitTiming:
+    """How long a named wait actually took, and whether it hit its upper bound."""
+
+    name: str
+    elapsed: float
+    timed_out: bool
+
+
+def wait_until_stable(
+    probe: Callable[[], T],
+    name: str,
+    ready: Callable[[T], bool] = bool,
+    timeout: float = WAIT_TIMEOUT_SECONDS,
+    settle: float = WAIT_SETTLE_SECONDS,
+    poll_interval: float = WAIT_POLL_INTERVAL_SECONDS,
+    raise_on_timeout: bool = False,
+) -> T:
+    """
+    Poll `probe` until its value satisfies `ready` and stays unchanged for `settle` seconds.
+
+    Returns the last probed value. By default reaching `timeout` is not an error: the wait
+    is recorded as timed out and the caller carries on with whatever the page shows. With
+    `raise_on_timeout`, a TimeoutError is raised instead, for waits whose result the caller
+    can't use unless the condition was met.
+    """
+    start = time.monotonic()
+    value = probe()
+    stable_since = start
+
+    while True:
+        now = time.monotonic()
+        if ready(value) and now - stable_since >= settle:
+            _record(name, now - start, timed_out=False)
+            return value
+        if now - start >= timeout:
+            _record(name, now - start, timed_out=True)
+            if raise_on_timeout:
+                raise TimeoutError(f"wait {name} timed out after {timeout}s")
+            return value
+
+        time.sleep(poll_interval)
+        new_value = probe()
+        if new_value != value:
+            value = new_value
+            stable_since = time.monotonic()
+
+
+def _record(name: str, elapsed: float, timed_out: bool):
+    with _timings_lock:
+        _timings.append(WaitTiming(name=name, elapsed=elapsed, timed_out=timed_out))
+    logger.info(f"WAIT {name}: {elapsed:.2f}s{' (timed out)' if timed_out else ''}")
+
+
+def get_wait_timings() -> list[WaitTiming]:
+    """Return the waits recorded since the last reset, at most the latest MAX_WAIT_TIMINGS."""
+    with _timings_lock:
+        return list(_timings)
+
+
+def reset_wait_timings():
+    """Forget all recorded waits."""
+    with _timings_lock:
+        _timings.clear()
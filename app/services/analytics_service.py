@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # optional "analytics" extra
+    pa = None
+
+from app.core.config import EXPORT_DIR
+from app.services.export_service import FORMATS, history_schema, require_pyarrow
+
+GRAINS = ("hour", "day", "week", "month")
+
+
+def load_history(
+    export_dir: Path = EXPORT_DIR,
+    currencies: list[str] | None = None,
+    since: date | None = None,
+    until: date | None = None,
+):
+    """
+    Load exported history files into one Arrow table, optionally limited to currencies and months.
+
+    Arrow IPC files are memory-mapped and read without copying, so the table's columns point
+    straight into the page cache; Parquet files are memory-mapped and decoded.
+    """
+    require_pyarrow()
+    wanted = {c.upper() for c in currencies} if currencies else None
+    tables = []
+    for path in sorted(export_dir.glob("currency=*/*")):
+        if path.suffix not in FORMATS.values():
+            continue
+        currency = path.parent.name.removeprefix("currency=")
+        month = date.fromisoformat(f"{path.stem}-01")
+        if wanted is not None and currency not in wanted:
+            continue
+        if (since and month < date(since.year, since.month, 1)) or (until and month > until):
+            continue
+        tables.append(_read(path))
+    if not tables:
+        return history_schema().empty_table()
+    return pa.concat_tables(tables)
+
+
+def _read(path: Path):
+    if path.suffix == FORMATS["parquet"]:
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+
+
+def spreads_over_time(history, grain: str = "day"):
+    """Average, narrowest and widest sell - buy spread per currency and local time bucket."""
+    _check_grain(grain)
+    spread = pc.subtract(history["sell_rate"], history["buy_rate"])
+    mid = pc.divide(pc.add(history["sell_rate"], history["buy_rate"]), 2)
+    table = pa.table(
+        {
+            "currency": history["currency"],
+            "bucket": pc.floor_temporal(history["scraped_at"], unit=grain),
+            "spread": spread,
+            "spread_pct": pc.multiply(pc.divide(spread, mid), 100),
+        }
+    )
+    result = table.group_by(["currency", "bucket"]).aggregate(
+        [("spread", "mean"), ("spread", "min"), ("spread", "max"), ("spread_pct", "mean"), ("spread", "count")]
+    )
+    return _named(
+        result,
+        {
+            "currency": "currency",
+            "bucket": "bucket",
+            "spread_mean": "avg_spread",
+            "spread_min": "min_spread",
+            "spread_max": "max_spread",
+            "spread_pct_mean": "avg_spread_pct",
+            "spread_count": "samples",
+        },
+    ).sort_by([("currency", "ascending"), ("bucket", "ascending")])
+
+
+def source_volatility(history):
+    """
+    Per source and currency, the standard deviation of log changes in buy and sell rates.
+
+    Changes are taken between consecutive stored rates of the same entity, so with interval
+    storage they measure the size of actual moves rather than scrape-to-scrape noise.
+    """
+    ordered = history.take(
+        pc.sort_indices(
+            history,
+            sort_keys=[("entity_id", "ascending"), ("currency", "ascending"), ("scraped_at", "ascending")],
+        )
+    )
+    entity_ids = ordered["entity_id"].to_numpy()
+    currency_codes = pc.dictionary_encode(ordered["currency"]).combine_chunks().indices.to_numpy()
+    same_series = (entity_ids[1:] == entity_ids[:-1]) & (currency_codes[1:] == currency_codes[:-1])
+
+    changes = pa.table(
+        {
+            "platform_source": ordered["platform_source"].slice(1),
+            "currency": ordered["currency"].slice(1),
+            "buy_change": np.diff(np.log(ordered["buy_rate"].to_numpy())),
+            "sell_change": np.diff(np.log(ordered["sell_rate"].to_numpy())),
+        }
+    ).filter(pa.array(same_series))
+
+    result = changes.group_by(["platform_source", "currency"]).aggregate(
+        [("buy_change", "stddev"), ("sell_change", "stddev"), ("buy_change", "count")]
+    )
+    return _named(
+        result,
+        {
+            "platform_source": "platform_source",
+            "currency": "currency",
+            "buy_change_stddev": "buy_volatility",
+            "sell_change_stddev": "sell_volatility",
+            "buy_change_count": "changes",
+        },
+    ).sort_by([("platform_source", "ascending"), ("currency", "ascending")])
+
+
+def entity_coverage(history):
+    """
+    Per entity and currency: first and last sighting, stored rates and the share of days with data.
+
+    Coverage is the number of local days with a stored rate over the days the whole history
+    spans; with interval storage a day without a change counts as missing.
+    """
+    days = pc.floor_temporal(history["scraped_at"], unit="day")
+    table = pa.table(
+        {
+            "entity_id": history["entity_id"],
+            "name": history["name"],
+            "platform_source": history["platform_source"],
+            "currency": history["currency"],
+            "scraped_at": history["scraped_at"],
+            "last_seen_at": pc.coalesce(history["last_seen_at"], history["scraped_at"]),
+            "day": days,
+        }
+    )
+    result = table.group_by(["entity_id", "name", "platform_source", "currency"]).aggregate(
+        [("scraped_at", "min"), ("last_seen_at", "max"), ("scraped_at", "count"), ("day", "count_distinct")]
+    )
+
+    span_days = 1
+    if history.num_rows:
+        first_day, last_day = pc.min_max(days).values()
+        # Local days are 23 or 25 hours long across DST changes
+        span_days += round((last_day.value - first_day.value) / 86_400_000_000)
+    result = _named(
+        result,
+        {
+            "entity_id": "entity_id",
+            "name": "name",
+            "platform_source": "platform_source",
+            "currency": "currency",
+            "scraped_at_min": "first_seen",
+            "last_seen_at_max": "last_seen",
+            "scraped_at_count": "samples",
+            "day_count_distinct": "days_seen",
+        },
+    )
+    coverage = pc.divide(pc.cast(result["days_seen"], pa.float64()), span_days)
+    return result.append_column("coverage", coverage).sort_by(
+        [("currency", "ascending"), ("coverage", "descending"), ("entity_id", "ascending")]
+    )
+
+
+def _named(table, columns: dict[str, str]):
+    """Select and rename group_by output columns, whose order differs between pyarrow versions."""
+    return table.select(list(columns)).rename_columns(list(columns.values()))
+
+
+def _check_grain(grain: str):
+    if grain not in GRAINS:
+        raise ValueError(f"Unknown grain '{grain}'. Supported grains: {', '.join(GRAINS)}.")
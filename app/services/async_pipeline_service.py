@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import requests
+
+from app.core.config import (
+    DRIVER_POOL_SIZE,
+    PIPELINE_CHUNK_MAX_AGE_SECONDS,
+    PIPELINE_CHUNK_RECORDS,
+    PIPELINE_PARSE_WORKERS,
+    SCRAPER_FETCH_MODE,
+)
+from app.models.scraped_record import ScrapedRecord
+from app.repositories.page_archive import archive_page
+from app.scrapers.orchestrator import ScraperSource, default_sources
+from app.scrapers.parsing import now_timestamp
+from app.services.pipeline_service import store_chunk
+
+logger = logging.getLogger(__name__)
+
+
+async def run_pipeline(
+    sources: list[ScraperSource] | None = None,
+    chunk_size: int = PIPELINE_CHUNK_RECORDS,
+    chunk_max_age: float = PIPELINE_CHUNK_MAX_AGE_SECONDS,
+    parse_workers: int = PIPELINE_PARSE_WORKERS,
+    fetch_mode: str = SCRAPER_FETCH_MODE,
+) -> int:
+    """
+    Scrape and store every (source, currency) page with fetching, parsing and writing overlapped.
+
+    Page downloads run on a thread pool, at most max_workers per source at a time, and
+    Selenium scrapes on a separate pool of DRIVER_POOL_SIZE threads, so fallbacks queue for a
+    browser without holding download threads; HTML is
+    parsed in `parse_workers` processes (threads when 0) while other pages download; a single
+    writer stores pages in chunks of about `chunk_size` records as they are parsed (sooner once
+    the oldest page in a chunk has waited `chunk_max_age` seconds), on its own thread, so the
+    run takes about as long as its slowest stage. Failed or timed-out pages
+    are logged and skipped. Returns the number of records in chunks that were committed.
+    """
+    sources = default_sources() if sources is None else sources
+    loop = asyncio.get_running_loop()
+    deadline_base = loop.time()
+    pages: asyncio.Queue[list[ScrapedRecord] | None] = asyncio.Queue()
+
+    fetch_pool = ThreadPoolExecutor(max_workers=sum(s.max_workers for s in sources) or 1, thread_name_prefix="fetch")
+    browser_pool = ThreadPoolExecutor(max_workers=DRIVER_POOL_SIZE, thread_name_prefix="browser")
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 0 else None
+    write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="writer")
+    try:
+        writer = asyncio.create_task(_write_pages(pages, write_pool, chunk_size, chunk_max_age))
+        scrapes = []
+        for source in sources:
+            limit = asyncio.Semaphore(source.max_workers)
+            for currency in source.currencies:
+                page = _scrape_page(source, currency, limit, (fetch_pool, browser_pool, parse_pool), fetch_mode)
+                scrapes.append(_page_into_queue(source, currency, page, deadline_base + source.timeout, pages))
+        await asyncio.gather(*scrapes)
+        await pages.put(None)
+        return await writer
+    finally:
+        # A stalled download must not hold up the run once its page has timed out; its thread
+        # runs on until the HTTP or driver timeouts end it, since threads can't be cancelled
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        browser_pool.shutdown(wait=False, cancel_futures=True)
+        if parse_pool is not None:
+            parse_pool.shutdown(wait=False, cancel_futures=True)
+        write_pool.shutdown(wait=True)
+
+
+async def _page_into_queue(source: ScraperSource, currency: str, page, deadline: float, pages: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+    try:
+        records = await asyncio.wait_for(page, timeout=max(0.0, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        logger.error(f"Scraper {source.name} {currency} failed: timed out after {source.timeout}s")
+        return
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Scraper {source.name} {currency} failed: {e}")
+        return
+    logger.info(
+        f"Scraper {source.name} {currency} returned {len(records)} records in {time.monotonic() - start:.1f}s."
+    )
+    await pages.put(records)
+
+
+async def _scrape_page(
+    source: ScraperSource,
+    currency: str,
+    limit: asyncio.Semaphore,
+    executors: tuple[Executor, Executor, Executor | None],
+    fetch_mode: str,
+) -> list[ScrapedRecord]:
+    """Fetch over HTTP and parse on separate executors, falling back to the source's own scrape."""
+    loop = asyncio.get_running_loop()
+    fetch_pool, browser_pool, parse_pool = executors
+    if fetch_mode == "http" and source.fetch_html is not None and source.parse_html is not None:
+        try:
+            async with limit:
+                html = await loop.run_in_executor(fetch_pool, source.fetch_html, currency)
+            timestamp = now_timestamp()
+            records = await loop.run_in_executor(
+                parse_pool, partial(source.parse_html, html, currency, timestamp=timestamp)
+            )
+            if records:
+                # Only pages that yielded records are archived, so replays never store empty pages
+                await loop.run_in_executor(fetch_pool, archive_page, source.name, currency, timestamp, html)
+                return records
+            logger.warning(f"{source.name} {currency} HTTP page had no rows, falling back to Selenium")
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"{source.name} {currency} HTTP fetch failed, falling back to Selenium: {e}")
+        scrape = partial(source.scrape_currency, currency, fetch_mode="selenium")
+    else:
+        scrape = partial(source.scrape_currency, currency)
+
+    async with limit:
+        return await loop.run_in_executor(browser_pool, scrape)
+
+
+async def _write_pages(pages: asyncio.Queue, write_pool: Executor, chunk_size: int, chunk_max_age: float) -> int:
+    """Store queued pages in chunks, never splitting a page, until a None arrives."""
+    loop = asyncio.get_running_loop()
+    stored = 0
+    chunk = []
+    flush_at = None
+    while True:
+        try:
+            timeout = None if flush_at is None else max(0.0, flush_at - loop.time())
+            records = await asyncio.wait_for(pages.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            stored += await loop.run_in_executor(write_pool, store_chunk, chunk)
+            chunk, flush_at = [], None
+            continue
+        if records is None:
+            break
+
+        if not chunk:
+            flush_at = loop.time() + chunk_max_age
+        chunk.extend(records)
+        if len(chunk) >= chunk_size:
+            stored += await loop.run_in_executor(write_pool, store_chunk, chunk)
+            chunk, flush_at = [], None
+    if chunk:
+        stored += await loop.run_in_executor(write_pool, store_chunk, chunk)
+    return stored
@@ -0,0 +1,35 @@
+import hashlib
+from collections import defaultdict
+
+from app.models.scraped_record import ScrapedRecord
+
+
+def group_by_page(records: list[ScrapedRecord]) -> dict[tuple[str, str], list[ScrapedRecord]]:
+    """Group records by the (platform_source, currency) page they were scraped from."""
+    pages = defaultdict(list)
+    for record in records:
+        pages[(record.entity.platform_source, record.rate.currency)].append(record)
+    return dict(pages)
+
+
+def page_fingerprint(records: list[ScrapedRecord]) -> str:
+    """
+    SHA-256 of a page's normalized table: one sorted line per entity and rate.
+
+    Scrape timestamps and row order are left out, so two scrapes showing the same
+    rates produce the same fingerprint.
+    """
+    lines = sorted(
+        "\t".join(
+            (
+                r.entity.name,
+                r.entity.city or "",
+                r.entity.type,
+                r.rate.currency,
+                f"{r.rate.buy:.6f}",
+                f"{r.rate.sell:.6f}",
+            )
+        )
+        for r in records
+    )
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+from app.core.config import ENTITY_CACHE_SIZE
+
+
+class EntityIdCache:
+    """Thread-safe LRU map from (platform_source, name, city) to entity ID."""
+
+    def __init__(self, maxsize: int = ENTITY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> int | None:
+        with self._lock:
+            entity_id = self._data.get(key)
+            if entity_id is not None:
+                self._data.move_to_end(key)
+            return entity_id
+
+    def put(self, key: tuple, entity_id: int):
+        with self._lock:
+            self._data[key] = entity_id
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Forget everything, e.g. after a rollback that may have discarded cached IDs."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Process-wide cache: in daemon mode it survives across pipeline runs
+entity_id_cache = EntityIdCache()
@@ -1,13 +1,60 @@
 from app.models.entity import Entity
-from app.repositories.entity_repository import get_entity_id, insert_entity
+from app.repositories.aio import entity_repository as aio_entities
+from app.repositories.entity_repository import (
+    get_entity_id,
+    insert_entity,
+    upsert_entities,
+)
+from app.services.entity_cache import entity_id_cache
 
 
 def get_or_create_entity(conn, entity: Entity):
     """Check if an entity exists and return its ID, or create it and return the new ID."""
+    entity_id = entity_id_cache.get(entity.key)
+    if entity_id is not None:
+        return entity_id
 
     entity_id = get_entity_id(conn, entity)
     if entity_id is None:
         entity_id = insert_entity(conn, entity)
         if entity_id is None:
             entity_id = get_entity_id(conn, entity)
+    if entity_id is not None:
+        entity_id_cache.put(entity.key, entity_id)
     return entity_id
+
+
+async def get_or_create_entity_async(conn, entity: Entity):
+    """asyncio version of get_or_create_entity for a psycopg AsyncConnection, sharing its cache."""
+    entity_id = entity_id_cache.get(entity.key)
+    if entity_id is not None:
+        return entity_id
+
+    entity_id = await aio_entities.get_entity_id(conn, entity)
+    if entity_id is None:
+        entity_id = await aio_entities.insert_entity(conn, entity)
+        if entity_id is None:
+            entity_id = await aio_entities.get_entity_id(conn, entity)
+    if entity_id is not None:
+        entity_id_cache.put(entity.key, entity_id)
+    return entity_id
+
+
+def resolve_entity_ids(conn, entities: list[Entity]):
+    """Return IDs keyed by Entity.key for all entities, creating missing ones in a single statement."""
+    ids = {}
+    misses = {}
+    for entity in entities:
+        if entity.key in ids or entity.key in misses:
+            continue
+        entity_id = entity_id_cache.get(entity.key)
+        if entity_id is None:
+            misses[entity.key] = entity
+        else:
+            ids[entity.key] = entity_id
+
+    if misses:
+        for key, entity_id in upsert_entities(conn, list(misses.values())).items():
+            entity_id_cache.put(key, entity_id)
+            ids[key] = entity_id
+    return ids
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # optional "analytics" extra
+    pa = None
+
+from app.core.config import EXPORT_BATCH_ROWS, EXPORT_DIR, EXPORT_FORMAT, TIMEZONE
+from app.repositories.rate_repository import get_history_bounds, iter_rate_history
+from app.services.partition_service import add_months
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed; install the 'analytics' extra: pip install .[analytics]")
+
+
+def history_schema():
+    """Arrow schema of exported history files."""
+    require_pyarrow()
+    return pa.schema(
+        [
+            ("entity_id", pa.int32()),
+            ("platform_source", pa.string()),
+            ("name", pa.string()),
+            ("city", pa.string()),
+            ("currency", pa.string()),
+            ("buy_rate", pa.float64()),
+            ("sell_rate", pa.float64()),
+            ("scraped_at", pa.timestamp("us", tz=TIMEZONE.key)),
+            ("last_seen_at", pa.timestamp("us", tz=TIMEZONE.key)),
+        ]
+    )
+
+
+def export_path(export_dir: Path, currency: str, month: date, fmt: str) -> Path:
+    """Location of one currency's history for one month, e.g. currency=EUR/2026-08.arrow."""
+    return export_dir / f"currency={currency}" / f"{month:%Y-%m}{FORMATS[fmt]}"
+
+
+def export_history(
+    conn,
+    export_dir: Path = EXPORT_DIR,
+    fmt: str = EXPORT_FORMAT,
+    since: date | None = None,
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> dict[Path, int]:
+    """
+    Export exchange_rates to one columnar file per currency and month, returning rows per file.
+
+    Months are read one at a time through a server-side cursor, so only a batch of rows is
+    held in memory. Files are rewritten whole; `since` (a month) skips earlier months, so
+    a scheduled export only redoes recent ones.
+    """
+    require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Supported formats: {', '.join(FORMATS)}.")
+
+    first, last = get_history_bounds(conn)
+    if first is None:
+        return {}
+    month = _local_month(first)
+    if since is not None:
+        month = max(month, date(since.year, since.month, 1))
+
+    written = {}
+    schema = history_schema()
+    while month <= _local_month(last):
+        next_month = add_months(month, 1)
+        writers = {}
+        try:
+            batches = iter_rate_history(conn, _month_start(month), _month_start(next_month), batch_rows)
+            with closing(batches):
+                for rows in batches:
+                    for currency, batch in _batches_by_currency(rows, schema).items():
+                        if currency not in writers:
+                            path = export_path(export_dir, currency, month, fmt)
+                            writers[currency] = (path, _open_writer(path.with_suffix(".tmp"), schema, fmt))
+                            written[path] = 0
+                        path, writer = writers[currency]
+                        writer.write_batch(batch)
+                        written[path] += batch.num_rows
+        finally:
+            for path, writer in writers.values():
+                writer.close()
+        conn.commit()
+        for path, _ in writers.values():
+            path.with_suffix(".tmp").replace(path)
+            logger.info(f"Exported {written[path]} rows to {path}.")
+        month = next_month
+    return written
+
+
+def _local_month(moment: datetime) -> date:
+    local = moment.astimezone(TIMEZONE)
+    return date(local.year, local.month, 1)
+
+
+def _month_start(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=TIMEZONE)
+
+
+def _open_writer(path: Path, schema, fmt: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        return pq.ParquetWriter(path, schema)
+    return pa.ipc.new_file(path, schema)
+
+
+def _batches_by_currency(rows: list[tuple], schema) -> dict[str, object]:
+    """Convert a batch of history rows to Arrow and split it into one record batch per currency."""
+    batch = pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for field, column in zip(schema, zip(*rows))],
+        schema=schema,
+    )
+    return {
+        currency: batch.filter(pc.equal(batch["currency"], currency))
+        for currency in pc.unique(batch["currency"]).to_pylist()
+    }
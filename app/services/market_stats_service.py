@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.models.recommendation import RateDistribution
+
+DEFAULT_PERCENTILES = (10.0, 25.0, 75.0, 90.0)
+# Share of rates cut from each end for the trimmed and winsorized means
+DEFAULT_TRIM = 0.1
+
+
+def describe_rates(
+    buy_rates,
+    sell_rates,
+    percentiles: tuple[float, ...] = DEFAULT_PERCENTILES,
+    trim: float = DEFAULT_TRIM,
+) -> tuple[RateDistribution, RateDistribution]:
+    """
+    Robust statistics of the buy and sell sides of a rate snapshot.
+
+    Both sides are stacked into one (2, n) array and sorted once; median, percentiles
+    (linear interpolation), trimmed and winsorized means, standard deviation, median
+    absolute deviation and interquartile range are then computed for both rows together.
+    """
+    if not 0 <= trim < 0.5:
+        raise ValueError(f"trim must be in [0, 0.5), got {trim}.")
+    rates = np.sort(np.vstack([np.asarray(buy_rates, dtype=float), np.asarray(sell_rates, dtype=float)]), axis=1)
+    n = rates.shape[1]
+    if n == 0:
+        raise ValueError("Cannot describe an empty rate snapshot.")
+
+    quantiles = np.array([50.0, 25.0, 75.0, *percentiles])
+    values = np.percentile(rates, quantiles, axis=1)
+    median, q1, q3 = values[0], values[1], values[2]
+
+    cut = int(n * trim)
+    kept = rates[:, cut : n - cut]
+    winsorized = np.clip(rates, rates[:, [cut]], rates[:, [n - cut - 1]])
+    mad = np.median(np.abs(rates - median[:, None]), axis=1)
+
+    summary = {
+        "median": median,
+        "trimmed_mean": kept.mean(axis=1),
+        "winsorized_mean": winsorized.mean(axis=1),
+        "std": rates.std(axis=1),
+        "mad": mad,
+        "iqr": q3 - q1,
+    }
+    return tuple(
+        RateDistribution(
+            **{name: round(float(column[side]), 4) for name, column in summary.items()},
+            percentiles={float(q): round(float(v), 4) for q, v in zip(percentiles, values[3:, side])},
+        )
+        for side in (0, 1)
+    )
@@ -3,12 +3,16 @@ from app.models.entity import Entity
 from app.services.entity_service import get_or_create_entity
 
 
-def get_own_office_entity_id(conn):
-    """Build an Entity for own office and get or create its ID in the database."""
-    entity = Entity(
+def own_office_entity() -> Entity:
+    """Build the Entity for own office from configuration."""
+    return Entity(
         platform_source=OWN_OFFICE_SOURCE,
         name=OWN_OFFICE_NAME,
         city=OWN_OFFICE_CITY,
         type="own_office",
     )
-    return get_or_create_entity(conn, entity)
+
+
+def get_own_office_entity_id(conn):
+    """Build an Entity for own office and get or create its ID in the database."""
+    return get_or_create_entity(conn, own_office_entity())
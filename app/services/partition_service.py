@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime
+from pathlib import Path
+
+from app.core.config import (
+    PARTITION_ARCHIVE_DIR,
+    PARTITION_MONTHS_AHEAD,
+    PARTITION_RETENTION_MONTHS,
+    TIMEZONE,
+)
+from app.database.connection import get_connection
+from app.repositories.partition_repository import (
+    create_rate_partition,
+    drop_rate_partition,
+    export_rate_partition,
+    is_partitioned,
+    list_rate_partitions,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after (or before, if negative) `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def ensure_partitions(conn, months_ahead: int = PARTITION_MONTHS_AHEAD, today: date | None = None) -> list[str]:
+    """Create the monthly partitions from the current month up to `months_ahead` months later."""
+    if not is_partitioned(conn):
+        return []
+    today = today or datetime.now(TIMEZONE).date()
+    this_month = date(today.year, today.month, 1)
+    existing = list_rate_partitions(conn)
+
+    created = []
+    for offset in range(months_ahead + 1):
+        name = create_rate_partition(conn, add_months(this_month, offset))
+        if name not in existing:
+            created.append(name)
+            logger.info(f"Created partition {name}.")
+    return created
+
+
+def archive_partitions(
+    conn,
+    retention_months: int = PARTITION_RETENTION_MONTHS,
+    archive_dir: Path = PARTITION_ARCHIVE_DIR,
+    today: date | None = None,
+) -> list[Path]:
+    """
+    Detach, export and drop every monthly partition that ended more than `retention_months` ago.
+
+    Each partition is handled in its own transaction: it is only dropped once its rows are
+    written to `archive_dir/<name>.csv.gz`. current_rates and rate_rollups are left as they are.
+    """
+    if not is_partitioned(conn):
+        return []
+    today = today or datetime.now(TIMEZONE).date()
+    cutoff = add_months(date(today.year, today.month, 1), -retention_months)
+
+    archived = []
+    for name, month in list_rate_partitions(conn).items():
+        if add_months(month, 1) > cutoff:
+            continue
+        path = archive_dir / f"{name}.csv.gz"
+        try:
+            rows = export_rate_partition(conn, name, path)
+            drop_rate_partition(conn, name)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info(f"Archived partition {name} ({rows} rows) to {path}.")
+        archived.append(path)
+    return archived
+
+
+def maintain_partitions(
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    retention_months: int | None = PARTITION_RETENTION_MONTHS,
+) -> tuple[list[str], list[Path]]:
+    """Create upcoming partitions and archive expired ones; retention_months=None keeps everything."""
+    with get_connection() as conn:
+        try:
+            created = ensure_partitions(conn, months_ahead)
+            conn.commit()
+            archived = [] if retention_months is None else archive_partitions(conn, retention_months)
+        except Exception:
+            conn.rollback()
+            raise
+    return created, archived
@@ -1,25 +1,141 @@
 import logging
+import queue
+import threading
+import time
+from collections.abc import Iterable
 
+from app.core.config import PIPELINE_CHUNK_MAX_AGE_SECONDS, PIPELINE_CHUNK_RECORDS
 from app.database.connection import get_connection
 from app.models.scraped_record import ScrapedRecord
-from app.services.entity_service import get_or_create_entity
-from app.services.rate_service import create_exchange_rate
-from app.services.validation_service import validate_rate
+from app.repositories.fingerprint_repository import (
+    get_fingerprints,
+    save_fingerprint,
+    touch_fingerprint,
+)
+from app.services.change_detection_service import group_by_page, page_fingerprint
+from app.services.entity_cache import entity_id_cache
+from app.services.entity_service import resolve_entity_ids
+from app.services.rate_service import create_exchange_rates
+from app.services.validation_service import validate_rates
 
 logger = logging.getLogger(__name__)
 
+
+def process_scraped_pages(
+    pages: Iterable[list[ScrapedRecord]],
+    chunk_size: int = PIPELINE_CHUNK_RECORDS,
+    chunk_max_age: float = PIPELINE_CHUNK_MAX_AGE_SECONDS,
+) -> int:
+    """
+    Store pages of scraped records as they arrive, committing every `chunk_size` records or so,
+    or once the oldest page in the chunk has waited `chunk_max_age` seconds.
+
+    Pages are read from `pages` on a separate thread, so a chunk is committed on time even
+    while the next page is slow to arrive. Pages are never split across chunks, so each
+    page's fingerprint is saved together with its rates. A chunk that fails is rolled back
+    and logged; chunks committed before it stay stored and later chunks are still
+    attempted. Returns the number of records in chunks that were committed.
+    """
+    arrived: queue.Queue = queue.Queue()
+    threading.Thread(target=_read_pages, args=(pages, arrived), name="pages", daemon=True).start()
+
+    stored = 0
+    chunk = []
+    flush_at = None
+    while True:
+        try:
+            records = arrived.get(timeout=None if flush_at is None else max(0.0, flush_at - time.monotonic()))
+        except queue.Empty:
+            stored += store_chunk(chunk)
+            chunk, flush_at = [], None
+            continue
+        if records is None:
+            break
+        if isinstance(records, BaseException):
+            raise records
+
+        if not chunk:
+            flush_at = time.monotonic() + chunk_max_age
+        chunk.extend(records)
+        if len(chunk) >= chunk_size:
+            stored += store_chunk(chunk)
+            chunk, flush_at = [], None
+    if chunk:
+        stored += store_chunk(chunk)
+    return stored
+
+
+def _read_pages(pages: Iterable[list[ScrapedRecord]], arrived: queue.Queue):
+    """Queue each page, then None; an error raised by `pages` is queued in place of the None."""
+    try:
+        for records in pages:
+            arrived.put(records)
+    except BaseException as e:  # noqa: BLE001
+        arrived.put(e)
+        return
+    arrived.put(None)
+
+
+def store_chunk(records: list[ScrapedRecord]) -> int:
+    """Store and commit one chunk of records, returning how many were committed; failures are logged."""
+    try:
+        process_scraped_data(records)
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Failed to store a chunk of {len(records)} records: {e}")
+        return 0
+    return len(records)
+
+
 def process_scraped_data(scraped_records: list[ScrapedRecord]):
+    """
+    Store scraped records, skipping pages whose table is unchanged since the last run.
+
+    An unchanged page only gets a heartbeat (last_seen_at) so its latest stored rates
+    keep counting as fresh; a changed page is fully validated and inserted.
+    """
     with get_connection() as conn:
-        for record in scraped_records:
-            entity_id = get_or_create_entity(conn, record.entity)
-
-            is_valid = validate_rate(conn, entity_id, record.rate)
-            if not is_valid:
-                logger.warning(
-                    f"REJECTED_RATE: Rate {record.rate.buy}/{record.rate.sell} for entity {entity_id} "
-                    f"currency {record.rate.currency} deviates too much from previous rate."
-                )
-                continue
-
-            create_exchange_rate(conn, entity_id, record.rate)
-        conn.commit()
+        try:
+            fingerprints = get_fingerprints(conn)
+
+            changed = []
+            for (source, currency), records in group_by_page(scraped_records).items():
+                fingerprint = page_fingerprint(records)
+                seen_at = records[0].rate.scraped_at
+
+                if fingerprints.get((source, currency)) == fingerprint:
+                    touch_fingerprint(conn, source, currency, seen_at)
+                    logger.info(f"UNCHANGED_PAGE: {source} {currency} still valid at {records[0].rate.timestamp}, skipped.")
+                    continue
+                changed.append((source, currency, fingerprint, records))
+
+            store_records(conn, [record for *_, records in changed for record in records])
+            for source, currency, fingerprint, records in changed:
+                save_fingerprint(conn, source, currency, fingerprint, records[0].rate.scraped_at)
+            conn.commit()
+        except Exception:
+            # Entity IDs created in this transaction are gone; don't keep them cached
+            conn.rollback()
+            entity_id_cache.clear()
+            raise
+
+
+def store_records(conn, records: list[ScrapedRecord], validate: bool = True) -> tuple[int, int]:
+    """
+    Resolve entities and bulk-insert rates without committing, optionally validating each rate.
+
+    Returns (inserted, duplicates) for the rates that passed validation.
+    """
+    entity_ids = resolve_entity_ids(conn, [record.entity for record in records])
+
+    rates = [(entity_ids[record.entity.key], record.rate) for record in records]
+    if validate:
+        rates, rejected = validate_rates(conn, rates)
+        for entity_id, rate in rejected:
+            logger.warning(
+                f"REJECTED_RATE: Rate {rate.buy}/{rate.sell} for entity {entity_id} "
+                f"currency {rate.currency} deviates too much from previous rate."
+            )
+
+    inserted, duplicates = create_exchange_rates(conn, rates)
+    logger.info(f"Stored {inserted} rates, skipped {duplicates} duplicates.")
+    return inserted, duplicates
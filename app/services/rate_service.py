@@ -1,7 +1,74 @@
+from app.core.config import RATE_STORAGE_MODE
 from app.models.exchange_rate import ExchangeRate
-from app.repositories.rate_repository import insert_exchange_rate
+from app.repositories.rate_repository import (
+    bulk_insert_exchange_rates,
+    extend_rate_intervals,
+    get_current_intervals,
+    insert_exchange_rate,
+    insert_rate_intervals,
+)
 
 
 def create_exchange_rate(conn, entity_id: int, rate: ExchangeRate):
     """Insert a new exchange rate record."""
     return insert_exchange_rate(conn, entity_id, rate)
+
+
+def create_exchange_rates(
+    conn,
+    rates: list[tuple[int, ExchangeRate]],
+    mode: str = RATE_STORAGE_MODE,
+) -> tuple[int, int]:
+    """Insert many (entity_id, rate) pairs, returning (inserted, duplicates) or (inserted, unchanged)."""
+    if mode == "snapshot":
+        return bulk_insert_exchange_rates(conn, rates)
+    if mode == "interval":
+        return store_rate_changes(conn, rates)
+    raise ValueError(f"Unknown storage mode '{mode}'. Supported modes: 'snapshot', 'interval'.")
+
+
+def store_rate_changes(conn, rates: list[tuple[int, ExchangeRate]]) -> tuple[int, int]:
+    """
+    Interval storage: insert a row only when an entity's buy or sell rate changes.
+
+    An unchanged rate extends the current row's last_seen_at instead. Scrapes at or
+    before a row's last sighting are skipped, so history is only ever appended.
+    Returns (inserted, unchanged).
+    """
+    if not rates:
+        return 0, 0
+
+    keys = list({(entity_id, rate.currency.upper()) for entity_id, rate in rates})
+    runs = {
+        key: {
+            "id": (row["id"], row["scraped_at"]),
+            "buy": row["buy_rate"],
+            "sell": row["sell_rate"],
+            "last_seen": row["last_seen_at"],
+        }
+        for key, row in get_current_intervals(conn, keys).items()
+    }
+
+    extended = {}
+    new_runs = []
+    for entity_id, rate in sorted(rates, key=lambda pair: pair[1].scraped_at):
+        key = (entity_id, rate.currency.upper())
+        seen_at = rate.scraped_at
+        buy, sell = round(rate.buy, 6), round(rate.sell, 6)
+        run = runs.get(key)
+
+        if run is not None and seen_at <= run["last_seen"]:
+            continue
+        if run is not None and (run["buy"], run["sell"]) == (buy, sell):
+            run["last_seen"] = seen_at
+            if run["id"] is not None:
+                extended[run["id"]] = seen_at
+            continue
+
+        runs[key] = {"id": None, "entity_id": entity_id, "rate": rate, "buy": buy, "sell": sell, "last_seen": seen_at}
+        new_runs.append(runs[key])
+
+    extend_rate_intervals(conn, extended)
+    inserted = insert_rate_intervals(conn, [(run["entity_id"], run["rate"], run["last_seen"]) for run in new_runs])
+    return inserted, len(rates) - inserted
+
@@ -1,20 +1,73 @@
 from __future__ import annotations
 
-from app.models.recommendation import MarketStats, OwnRateRanking, RateRecommendation
-from app.repositories.rate_repository import get_latest_rates_by_currency
-from app.services.own_office_service import get_own_office_entity_id
+import re
+
+import numpy as np
+
+from app.models.recommendation import (
+    MarketReport,
+    MarketStats,
+    OwnRateRanking,
+    RateRecommendation,
+)
+from app.repositories.rate_repository import (
+    get_latest_rates_by_currency,
+    get_latest_rates_for_currencies,
+)
+from app.services.market_stats_service import (
+    DEFAULT_PERCENTILES,
+    DEFAULT_TRIM,
+    describe_rates,
+)
+from app.services.own_office_service import get_own_office_entity_id, own_office_entity
 
 DEFAULT_MIN_SPREAD = 0.005
 DEFAULT_MAX_AGE_HOURS = 24.0
 
+_NAMED_STRATEGIES = ("beat_best", "match_average", "match_median", "match_trimmed_average")
+STRATEGIES = (*_NAMED_STRATEGIES, "match_p<N>")
+_PERCENTILE_STRATEGY = re.compile(r"match_p(\d{1,2}(?:\.\d+)?)")
+
+
+def strategy_percentiles(strategy: str) -> tuple[float, ...]:
+    """The buy and sell percentiles a 'match_p<N>' strategy reads: N of buy rates, 100 - N of sell rates."""
+    match = _PERCENTILE_STRATEGY.fullmatch(strategy)
+    if match is None:
+        return ()
+    q = float(match.group(1))
+    if not 0 < q < 100:
+        raise ValueError(f"Percentile strategy '{strategy}' needs a percentile between 0 and 100.")
+    return (q, 100.0 - q)
+
+
+def _unknown_strategy(strategy: str) -> ValueError:
+    supported = ", ".join(f"'{name}'" for name in STRATEGIES)
+    return ValueError(f"Unknown strategy '{strategy}'. Supported strategies: {supported}.")
+
+
+def _no_data_message(currency: str, max_age_hours: float | None) -> str:
+    age_info = f" in the last {max_age_hours} hours" if max_age_hours is not None else ""
+    return f"No competitor rate data available for currency '{currency.upper()}'{age_info}."
+
+
+def _with_strategy_percentiles(percentiles: tuple[float, ...], strategy: str) -> tuple[float, ...]:
+    return tuple(sorted({*percentiles, *strategy_percentiles(strategy)}))
+
 
 def get_market_stats(
     conn,
     currency: str,
     exclude_entity_id: int | None = None,
     max_age_hours: float | None = DEFAULT_MAX_AGE_HOURS,
+    percentiles: tuple[float, ...] = DEFAULT_PERCENTILES,
+    trim: float = DEFAULT_TRIM,
 ) -> MarketStats:
-    """Calculate best and average buy & sell rates across competitors within max_age_hours."""
+    """
+    Calculate best, average and robust buy & sell statistics across competitors within max_age_hours.
+
+    The robust part (median, `percentiles`, means with `trim` of each end cut or clamped,
+    and dispersion) is in the `buy` and `sell` distributions; see describe_rates.
+    """
     if exclude_entity_id is None:
         exclude_entity_id = get_own_office_entity_id(conn)
 
@@ -24,26 +77,32 @@ def get_market_stats(
         exclude_entity_id=exclude_entity_id,
         max_age_hours=max_age_hours,
     )
+    return _market_stats(currency, rates, max_age_hours, percentiles, trim)
 
-    if not rates:
-        age_info = f" in the last {max_age_hours} hours" if max_age_hours is not None else ""
-        raise ValueError(f"No competitor rate data available for currency '{currency.upper()}'{age_info}.")
 
-    buy_rates = [r["buy_rate"] for r in rates]
-    sell_rates = [r["sell_rate"] for r in rates]
+def _market_stats(
+    currency: str,
+    rates: list[dict],
+    max_age_hours: float | None,
+    percentiles: tuple[float, ...] = DEFAULT_PERCENTILES,
+    trim: float = DEFAULT_TRIM,
+) -> MarketStats:
+    if not rates:
+        raise ValueError(_no_data_message(currency, max_age_hours))
 
-    best_buy = max(buy_rates)
-    best_sell = min(sell_rates)
-    avg_buy = sum(buy_rates) / len(rates)
-    avg_sell = sum(sell_rates) / len(rates)
+    buy_rates = np.fromiter((r["buy_rate"] for r in rates), dtype=float, count=len(rates))
+    sell_rates = np.fromiter((r["sell_rate"] for r in rates), dtype=float, count=len(rates))
+    buy, sell = describe_rates(buy_rates, sell_rates, percentiles, trim)
 
     return MarketStats(
         currency=currency.upper(),
-        best_buy=round(best_buy, 4),
-        best_sell=round(best_sell, 4),
-        avg_buy=round(avg_buy, 4),
-        avg_sell=round(avg_sell, 4),
+        best_buy=round(float(buy_rates.max()), 4),
+        best_sell=round(float(sell_rates.min()), 4),
+        avg_buy=round(float(buy_rates.mean()), 4),
+        avg_sell=round(float(sell_rates.mean()), 4),
         competitor_count=len(rates),
+        buy=buy,
+        sell=sell,
     )
 
 
@@ -61,17 +120,45 @@ def recommend_rate(
     Strategies:
       - 'beat_best': recommended_buy = best_buy + margin, recommended_sell = best_sell - margin
       - 'match_average': recommended_buy = avg_buy, recommended_sell = avg_sell
+      - 'match_median': the median buy and sell rates
+      - 'match_trimmed_average': buy and sell means with the outer DEFAULT_TRIM of rates cut
+      - 'match_p<N>' (e.g. 'match_p75'): the N-th percentile of buy rates and the (100 - N)-th
+        of sell rates, i.e. a higher buy and a lower sell rate than about N% of competitors
 
     Safety Guard:
       If 'beat_best' shrinks spread (recommended_sell - recommended_buy) below min_spread,
-      falls back to the average-based strategy.
+      falls back to the average-based strategy; a percentile strategy falls back to the median.
     """
-    stats = get_market_stats(conn, currency, max_age_hours=max_age_hours)
+    percentiles = _with_strategy_percentiles(DEFAULT_PERCENTILES, strategy)
+    stats = get_market_stats(conn, currency, max_age_hours=max_age_hours, percentiles=percentiles)
+    return _recommendation(stats, strategy, margin, min_spread)
 
+
+def _recommendation(stats: MarketStats, strategy: str, margin: float, min_spread: float) -> RateRecommendation:
     is_fallback = False
     strategy_used = strategy
 
-    if strategy == "beat_best":
+    if percentile_sides := strategy_percentiles(strategy):
+        buy_q, sell_q = percentile_sides
+        rec_buy = stats.buy.percentiles[buy_q]
+        rec_sell = stats.sell.percentiles[sell_q]
+        spread = rec_sell - rec_buy
+
+        if spread < min_spread:
+            rec_buy = stats.buy.median
+            rec_sell = stats.sell.median
+            spread = rec_sell - rec_buy
+            is_fallback = True
+            strategy_used = "fallback_match_median"
+    elif strategy == "match_median":
+        rec_buy = stats.buy.median
+        rec_sell = stats.sell.median
+        spread = rec_sell - rec_buy
+    elif strategy == "match_trimmed_average":
+        rec_buy = stats.buy.trimmed_mean
+        rec_sell = stats.sell.trimmed_mean
+        spread = rec_sell - rec_buy
+    elif strategy == "beat_best":
         rec_buy = stats.best_buy + margin
         rec_sell = stats.best_sell - margin
         spread = rec_sell - rec_buy
@@ -88,10 +175,10 @@ def recommend_rate(
         rec_sell = stats.avg_sell
         spread = rec_sell - rec_buy
     else:
-        raise ValueError(f"Unknown strategy '{strategy}'. Supported strategies: 'beat_best', 'match_average'.")
+        raise _unknown_strategy(strategy)
 
     return RateRecommendation(
-        currency=currency.upper(),
+        currency=stats.currency,
         recommended_buy=round(rec_buy, 4),
         recommended_sell=round(rec_sell, 4),
         strategy_used=strategy_used,
@@ -112,7 +199,10 @@ def rank_own_rate(
 
     own_rates = [r for r in all_rates if r["entity_id"] == own_entity_id]
     competitor_rates = [r for r in all_rates if r["entity_id"] != own_entity_id]
+    return _ranking(currency, own_rates, competitor_rates)
+
 
+def _ranking(currency: str, own_rates: list[dict], competitor_rates: list[dict]) -> OwnRateRanking:
     total_competitors = len(competitor_rates)
 
     if not own_rates:
@@ -148,3 +238,44 @@ def rank_own_rate(
         sell_rank_text=f"#{sell_rank} of {total_competitors} on sell",
     )
 
+
+def build_market_reports(
+    conn,
+    currencies: list[str] | None = None,
+    strategy: str = "beat_best",
+    margin: float = 0.002,
+    min_spread: float = DEFAULT_MIN_SPREAD,
+    max_age_hours: float | None = DEFAULT_MAX_AGE_HOURS,
+    percentiles: tuple[float, ...] = DEFAULT_PERCENTILES,
+    trim: float = DEFAULT_TRIM,
+) -> list[MarketReport]:
+    """
+    Market stats, recommendation and own-rate ranking for many currencies from one snapshot.
+
+    All latest rates, own office's included, are read in a single query; None covers every
+    currency with fresh rates. Reports follow the order of `currencies` (sorted for None).
+    A currency without competitor data gets a report with `error` set instead of stats and
+    a recommendation.
+    """
+    if strategy not in _NAMED_STRATEGIES and not strategy_percentiles(strategy):
+        raise _unknown_strategy(strategy)
+    percentiles = _with_strategy_percentiles(percentiles, strategy)
+    snapshot = get_latest_rates_for_currencies(conn, currencies, max_age_hours=max_age_hours)
+    own_key = own_office_entity().key
+    if currencies is None:
+        currencies = sorted(snapshot)
+
+    reports = []
+    for currency in dict.fromkeys(c.upper() for c in currencies):
+        rates = snapshot.get(currency, [])
+        own_rates = [r for r in rates if (r["platform_source"], r["name"], r["city"]) == own_key]
+        competitor_rates = [r for r in rates if (r["platform_source"], r["name"], r["city"]) != own_key]
+
+        ranking = _ranking(currency, own_rates, competitor_rates)
+        if not competitor_rates:
+            reports.append(MarketReport(currency, None, None, ranking, error=_no_data_message(currency, max_age_hours)))
+            continue
+        stats = _market_stats(currency, competitor_rates, max_age_hours, percentiles, trim)
+        recommendation = _recommendation(stats, strategy, margin, min_spread)
+        reports.append(MarketReport(currency, stats, recommendation, ranking))
+    return reports
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+
+from app.database.connection import get_connection
+from app.models.scraped_record import ScrapedRecord
+from app.repositories.page_archive import iter_entries, load_payload
+from app.scrapers import bnr_scraper, valutare_scraper
+from app.services.entity_cache import entity_id_cache
+from app.services.pipeline_service import store_records
+
+logger = logging.getLogger(__name__)
+
+REPLAY_COMMIT_EVERY = 100
+
+_HTML_PARSERS = {
+    bnr_scraper.SOURCE_NAME: bnr_scraper.parse_html,
+    valutare_scraper.SOURCE_NAME: valutare_scraper.parse_html,
+}
+_ROW_BUILDERS = {
+    valutare_scraper.SOURCE_NAME: valutare_scraper.build_records,
+}
+
+
+@dataclass
+class ReplaySummary:
+    pages: int = 0
+    records: int = 0
+
+
+def reparse_entry(entry: dict) -> list[ScrapedRecord]:
+    """Re-run the current parser over one archived payload, stamped with its original scrape time."""
+    payload = load_payload(entry["sha256"])
+    source, currency, timestamp = entry["source"], entry["currency"], entry["timestamp"]
+
+    if entry["kind"] == "rows":
+        rows = [tuple(row) for row in json.loads(payload)]
+        return _ROW_BUILDERS[source](rows, currency, timestamp)
+    return _HTML_PARSERS[source](payload, currency, timestamp=timestamp)
+
+
+def replay(
+    since: date,
+    until: date,
+    source: str | None = None,
+    workers: int | None = None,
+    store: bool = True,
+    validate: bool = False,
+) -> ReplaySummary:
+    """
+    Re-parse every archived page between `since` and `until` in parallel worker processes.
+
+    Parsing runs in the workers; records are stored from this process in archive order,
+    committing every REPLAY_COMMIT_EVERY pages. Rows that already exist are skipped by
+    the unique (entity, currency, scraped_at) constraint, so replays are idempotent.
+    Validation is off by default because the deviation check compares against the
+    latest stored rate, not the rate preceding the archived page.
+    """
+    entries = list(iter_entries(since, until, source=source))
+    summary = ReplaySummary()
+    if not entries:
+        return summary
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(reparse_entry, entries, chunksize=16)
+        if not store:
+            for records in results:
+                summary.pages += 1
+                summary.records += len(records)
+            return summary
+
+        with get_connection() as conn:
+            try:
+                for records in results:
+                    store_records(conn, records, validate=validate)
+                    summary.pages += 1
+                    summary.records += len(records)
+                    if summary.pages % REPLAY_COMMIT_EVERY == 0:
+                        conn.commit()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                entity_id_cache.clear()
+                raise
+
+    logger.info(f"Replayed {summary.pages} pages ({summary.records} records) from {since} to {until}.")
+    return summary
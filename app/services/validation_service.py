@@ -1,7 +1,12 @@
 import logging
 
+import numpy as np
+
 from app.models.exchange_rate import ExchangeRate
-from app.repositories.rate_repository import get_latest_rate_for_entity
+from app.repositories.rate_repository import (
+    get_latest_rate_for_entity,
+    get_latest_rates_for_keys,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,3 +32,42 @@ def validate_rate(conn, entity_id: int, rate: ExchangeRate, max_deviation_pct: f
     sell_diff = abs(rate.sell - prev_sell) / prev_sell if prev_sell else 0
     
     return not (buy_diff > max_deviation_pct or sell_diff > max_deviation_pct)
+
+
+def validate_rates(
+    conn,
+    rates: list[tuple[int, ExchangeRate]],
+    max_deviation_pct: float = 0.03,
+) -> tuple[list[tuple[int, ExchangeRate]], list[tuple[int, ExchangeRate]]]:
+    """
+    Batch version of `validate_rate` for (entity_id, rate) pairs; returns (accepted, rejected).
+
+    Previous rates for every (entity_id, currency) in the batch are fetched with a single
+    query and deviations are computed for all rows at once, with the same rules.
+    """
+    if not rates:
+        return [], []
+
+    keys = list({(entity_id, rate.currency.upper()) for entity_id, rate in rates})
+    latest = get_latest_rates_for_keys(conn, keys)
+
+    new = np.array([(rate.buy, rate.sell) for _, rate in rates], dtype=float)
+    prev = np.array(
+        [latest.get((entity_id, rate.currency.upper()), (np.nan, np.nan)) for entity_id, rate in rates],
+        dtype=float,
+    )
+    has_baseline = ~np.isnan(prev[:, 0])
+
+    # A zero previous rate counts as no deviation, as in validate_rate
+    deviation = np.divide(
+        np.abs(new - prev), prev, out=np.zeros_like(new), where=has_baseline[:, None] & (prev != 0)
+    )
+    rejected_mask = (deviation > max_deviation_pct).any(axis=1)
+
+    for i in np.flatnonzero(~has_baseline):
+        entity_id, rate = rates[i]
+        logger.info(f"First-ever rate for entity {entity_id} currency {rate.currency}, unvalidated")
+
+    accepted = [pair for pair, rejected in zip(rates, rejected_mask) if not rejected]
+    rejected = [pair for pair, rejected in zip(rates, rejected_mask) if rejected]
+    return accepted, rejected
@@ -0,0 +1,45 @@
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+from app.core.config import EXPORT_DIR
+from app.services.analytics_service import (
+    GRAINS,
+    entity_coverage,
+    load_history,
+    source_volatility,
+    spreads_over_time,
+)
+
+
+def _month(value: str) -> date:
+    return date.fromisoformat(f"{value}-01")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyse exported rate history (see export_history) and print the report as CSV."
+    )
+    parser.add_argument("report", choices=["spreads", "volatility", "coverage"])
+    parser.add_argument("--dir", type=Path, default=EXPORT_DIR, help=f"Export directory (default: {EXPORT_DIR})")
+    parser.add_argument("--currency", nargs="+", help="Only these currencies (default: all)")
+    parser.add_argument("--since", type=_month, help="First month, as YYYY-MM")
+    parser.add_argument("--until", type=_month, help="Last month, as YYYY-MM")
+    parser.add_argument("--grain", choices=GRAINS, default="day", help="Spread bucket size (default: day)")
+    args = parser.parse_args()
+
+    history = load_history(args.dir, currencies=args.currency, since=args.since, until=args.until)
+    if args.report == "spreads":
+        result = spreads_over_time(history, grain=args.grain)
+    elif args.report == "volatility":
+        result = source_volatility(history)
+    else:
+        result = entity_coverage(history)
+    import pyarrow.csv  # available once load_history has checked for the extra
+
+    pyarrow.csv.write_csv(result, sys.stdout.buffer)
+
+
+if __name__ == "__main__":
+    main()
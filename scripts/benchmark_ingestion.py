@@ -0,0 +1,70 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from app.database.connection import get_connection
+from app.models.entity import Entity
+from app.models.exchange_rate import ExchangeRate
+from app.repositories.entity_repository import upsert_entities
+from app.repositories.rate_repository import (
+    bulk_insert_exchange_rates,
+    insert_exchange_rate,
+)
+
+CURRENCIES = ["EUR", "USD", "GBP"]
+
+
+def synthetic_batch(entity_ids: list[int], size: int) -> list[tuple[int, ExchangeRate]]:
+    """`size` distinct rates cycling through entities and currencies, one minute apart per round."""
+    start = datetime(2000, 1, 1)
+    per_round = len(entity_ids) * len(CURRENCIES)
+    batch = []
+    for i in range(size):
+        entity_id = entity_ids[i % len(entity_ids)]
+        currency = CURRENCIES[(i // len(entity_ids)) % len(CURRENCIES)]
+        timestamp = (start + timedelta(minutes=i // per_round)).strftime("%Y-%m-%d %H:%M")
+        buy = 4.9 + (i % 97) / 10000
+        batch.append((entity_id, ExchangeRate(currency=currency, buy=buy, sell=buy + 0.05, timestamp=timestamp)))
+    return batch
+
+
+def insert_per_row(conn, batch) -> tuple[int, int]:
+    inserted = sum(1 for entity_id, rate in batch if insert_exchange_rate(conn, entity_id, rate) is not None)
+    return inserted, len(batch) - inserted
+
+
+METHODS = {
+    "per-row": insert_per_row,
+    "values": lambda conn, batch: bulk_insert_exchange_rates(conn, batch, method="values"),
+    "copy": lambda conn, batch: bulk_insert_exchange_rates(conn, batch, method="copy"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare rate ingestion throughput; all writes are rolled back.")
+    parser.add_argument("--records", type=int, default=100_000, help="Synthetic batch size (default: 100000)")
+    parser.add_argument("--entities", type=int, default=1_000, help="Distinct entities in the batch (default: 1000)")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=list(METHODS))
+    args = parser.parse_args()
+
+    print(f"{'method':<8} {'records':>9} {'inserted':>9} {'seconds':>8} {'rows/s':>10}")
+    with get_connection() as conn:
+        for method in args.methods:
+            try:
+                entities = [
+                    Entity(platform_source="benchmark", name=f"Office {i}", city=None, type="exchange_office")
+                    for i in range(args.entities)
+                ]
+                entity_ids = list(upsert_entities(conn, entities).values())
+                batch = synthetic_batch(entity_ids, args.records)
+
+                start = time.perf_counter()
+                inserted, _ = METHODS[method](conn, batch)
+                elapsed = time.perf_counter() - start
+                print(f"{method:<8} {len(batch):>9} {inserted:>9} {elapsed:>8.2f} {len(batch) / elapsed:>10,.0f}")
+            finally:
+                conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import statistics
+import time
+
+from app.database.connection import get_connection
+from app.models.entity import Entity
+from app.repositories.entity_repository import upsert_entities
+from app.repositories.rate_repository import (
+    ensure_currencies,
+    get_latest_rates_by_currency,
+)
+
+CURRENCIES = ["EUR", "USD", "GBP"]
+
+
+def grow_history(conn, entity_ids: list[int], first_round: int, last_round: int):
+    """Append scrape rounds [first_round, last_round) for every entity and currency, 5 minutes apart."""
+    ensure_currencies(conn, CURRENCIES)
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        INSERT INTO exchange_rates (entity_id, currency_id, buy_micros, sell_micros, scraped_at)
+        SELECT e.id, c.id, 4900000 + (r %% 97) * 100, 4950000 + (r %% 97) * 100,
+            TIMESTAMPTZ '2000-01-01' + r * INTERVAL '5 minutes'
+        FROM unnest(%s::integer[]) AS e (id)
+        JOIN currencies c ON c.code = ANY(%s)
+        CROSS JOIN generate_series(%s, %s) AS r
+        """,
+        (entity_ids, CURRENCIES, first_round, last_round - 1),
+    )
+
+
+def history_scan(conn, currency: str):
+    """The previous latest-rate query: DISTINCT ON over the currency's full history."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT DISTINCT ON (er.entity_id) er.id, er.entity_id, e.name, er.buy_rate, er.sell_rate, er.scraped_at
+        FROM exchange_rates_decoded er
+        JOIN entities e ON er.entity_id = e.id
+        WHERE er.currency = %s
+        ORDER BY er.entity_id, er.scraped_at DESC
+        """,
+        (currency,),
+    )
+    return cursor.fetchall()
+
+
+def median_ms(query, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latest-rate lookup latency as history grows; all writes are rolled back."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100_000, 1_000_000, 10_000_000],
+        help="History sizes (rows) to measure at (default: 100000 1000000 10000000)",
+    )
+    parser.add_argument("--entities", type=int, default=1_000, help="Distinct entities (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (default: 5)")
+    args = parser.parse_args()
+
+    print(f"{'history rows':>12} {'current_rates ms':>17} {'history scan ms':>16}")
+    with get_connection() as conn:
+        try:
+            entities = [
+                Entity(platform_source="benchmark", name=f"Office {i}", city=None, type="exchange_office")
+                for i in range(args.entities)
+            ]
+            entity_ids = list(upsert_entities(conn, entities).values())
+            per_round = len(entity_ids) * len(CURRENCIES)
+
+            rounds = 0
+            for size in sorted(args.sizes):
+                target = max(1, size // per_round)
+                grow_history(conn, entity_ids, rounds, target)
+                rounds = target
+                conn.cursor().execute("ANALYZE exchange_rates")
+
+                current = median_ms(lambda: get_latest_rates_by_currency(conn, "EUR"), args.repeat)
+                scan = median_ms(lambda: history_scan(conn, "EUR"), args.repeat)
+                print(f"{rounds * per_round:>12,} {current:>17.1f} {scan:>16.1f}")
+        finally:
+            conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
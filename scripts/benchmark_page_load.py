@@ -0,0 +1,78 @@
+import argparse
+import statistics
+import time
+
+from app.core.config import BNR_URL, VALUTARE_URL
+from app.scrapers import bnr_scraper, valutare_scraper
+from app.scrapers.driver import apply_resource_blocking, get_driver
+
+_RESOURCE_STATS_JS = """
+const entries = performance.getEntriesByType("resource");
+return [entries.length, entries.reduce((total, e) => total + (e.transferSize || 0), 0)];
+"""
+
+
+def measure_bnr(driver) -> tuple[float, float]:
+    start = time.perf_counter()
+    driver.get(BNR_URL)
+    bnr_scraper.wait_for_proper_loading(driver)
+    return time.perf_counter() - start, 0.0
+
+
+def measure_valutare(driver) -> tuple[float, float]:
+    start = time.perf_counter()
+    driver.get(VALUTARE_URL.format("eur"))
+    valutare_scraper.wait_for_proper_loading(driver)
+    loaded = time.perf_counter()
+    valutare_scraper.handle_lazy_loading(driver)
+    return loaded - start, time.perf_counter() - loaded
+
+
+SOURCES = {
+    bnr_scraper.SOURCE_NAME: measure_bnr,
+    valutare_scraper.SOURCE_NAME: measure_valutare,
+}
+
+
+def run(source: str, block: bool, runs: int) -> dict:
+    """Load a source's page `runs` times in one browser and return median timings."""
+    driver = get_driver(block_resources=block)
+    loads, scrolls, requests, transferred = [], [], [], []
+    try:
+        apply_resource_blocking(driver, source, block_resources=block)
+        for _ in range(runs):
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            load, scroll = SOURCES[source](driver)
+            count, size = driver.execute_script(_RESOURCE_STATS_JS)
+            loads.append(load)
+            scrolls.append(scroll)
+            requests.append(count)
+            transferred.append(size)
+    finally:
+        driver.quit()
+
+    return {
+        "load": statistics.median(loads),
+        "scroll": statistics.median(scrolls),
+        "requests": statistics.median(requests),
+        "kb": statistics.median(transferred) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page-load timings with and without resource blocking.")
+    parser.add_argument("--runs", type=int, default=3, help="Page loads per source and mode (default: 3)")
+    args = parser.parse_args()
+
+    print(f"{'source':<10} {'blocking':>8} {'load s':>8} {'scroll s':>9} {'requests':>9} {'KB':>9}")
+    for source in SOURCES:
+        for block in (False, True):
+            r = run(source, block, args.runs)
+            print(
+                f"{source:<10} {'on' if block else 'off':>8} {r['load']:>8.2f} {r['scroll']:>9.2f} "
+                f"{r['requests']:>9.0f} {r['kb']:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
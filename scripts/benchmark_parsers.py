@@ -0,0 +1,65 @@
+import argparse
+import time
+from pathlib import Path
+
+from app.scrapers import bnr_scraper, valutare_scraper
+from app.scrapers.parsing import available_backends
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+# fixture file -> (parse_html, marker preceding the first data row, row start, container end)
+FIXTURES = {
+    "bnr_eur.html": (bnr_scraper.parse_html, "</th>", "<tr>", "</table>"),
+    "valutare_eur.html": (valutare_scraper.parse_html, "exchangegrid", '<div class="exchange-row">', "</div>"),
+}
+
+
+def enlarge(html: str, after: str, row_start: str, container_end: str, factor: int) -> str:
+    """Repeat the fixture's data rows `factor` times inside their container."""
+    start = html.index(row_start, html.index(after))
+    end = html.rindex(container_end)
+    return html[:start] + html[start:end] * factor + html[end:]
+
+
+def bench(parse_html, html: str, backend: str, min_seconds: float) -> tuple[int, float]:
+    """Parse repeatedly for at least min_seconds and return (rows per parse, rows/second)."""
+    rows = len(parse_html(html, "EUR", backend=backend))
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        parse_html(html, "EUR", backend=backend)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return rows, rows * runs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on the scraper fixtures.")
+    parser.add_argument(
+        "--factors",
+        type=int,
+        nargs="+",
+        default=[1, 100, 1000],
+        help="Row multiplication factors for synthetic pages (default: 1 100 1000)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=1.0,
+        help="Minimum time to spend per measurement (default: 1.0)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'fixture':<20} {'factor':>7} {'rows':>7} {'backend':>8} {'rows/s':>12}")
+    for name, (parse_html, after, row_start, container_end) in FIXTURES.items():
+        html = (FIXTURES_DIR / name).read_text(encoding="utf-8")
+        for factor in args.factors:
+            page = enlarge(html, after, row_start, container_end, factor)
+            for backend in available_backends():
+                rows, rate = bench(parse_html, page, backend, args.min_seconds)
+                print(f"{name:<20} {factor:>7} {rows:>7} {backend:>8} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import statistics
+import time
+
+from app.database.connection import get_connection
+from app.repositories.rate_repository import ensure_currencies
+
+CURRENCIES = ["EUR", "USD", "GBP", "CHF", "HUF"]
+
+# The pre-compact exchange_rates layout and its indexes, next to the compact one
+LAYOUTS = {
+    "legacy": """
+        CREATE TEMP TABLE bench_legacy (
+            id SERIAL PRIMARY KEY,
+            entity_id INTEGER NOT NULL,
+            currency VARCHAR(10) NOT NULL,
+            buy_rate NUMERIC(12, 6) NOT NULL,
+            sell_rate NUMERIC(12, 6) NOT NULL,
+            scraped_at TIMESTAMP NOT NULL,
+            last_seen_at TIMESTAMP,
+            UNIQUE(entity_id, currency, scraped_at)
+        ) ON COMMIT DROP;
+        CREATE INDEX ON bench_legacy(entity_id, currency, scraped_at);
+        INSERT INTO bench_legacy (entity_id, currency, buy_rate, sell_rate, scraped_at)
+        SELECT i %% %(entities)s, c.code, 4.9 + (i %% 97) / 10000.0, 4.95 + (i %% 97) / 10000.0,
+            TIMESTAMP '2000-01-01' + (i / %(entities)s) * INTERVAL '5 minutes'
+        FROM generate_series(0, %(rows)s - 1) AS i
+        JOIN currencies c ON c.code = (%(currencies)s::varchar[])[1 + (i / %(entities)s) %% %(currency_count)s];
+        ANALYZE bench_legacy;
+    """,
+    "compact": """
+        CREATE TEMP TABLE bench_compact (
+            id SERIAL,
+            entity_id INTEGER NOT NULL,
+            currency_id SMALLINT NOT NULL,
+            buy_micros INTEGER NOT NULL,
+            sell_micros INTEGER NOT NULL,
+            scraped_at TIMESTAMPTZ NOT NULL,
+            last_seen_at TIMESTAMPTZ,
+            PRIMARY KEY (id, scraped_at),
+            UNIQUE(entity_id, currency_id, scraped_at)
+        ) ON COMMIT DROP;
+        INSERT INTO bench_compact (entity_id, currency_id, buy_micros, sell_micros, scraped_at)
+        SELECT i %% %(entities)s, c.id, 4900000 + (i %% 97) * 100, 4950000 + (i %% 97) * 100,
+            TIMESTAMPTZ '2000-01-01' + (i / %(entities)s) * INTERVAL '5 minutes'
+        FROM generate_series(0, %(rows)s - 1) AS i
+        JOIN currencies c ON c.code = (%(currencies)s::varchar[])[1 + (i / %(entities)s) %% %(currency_count)s];
+        ANALYZE bench_compact;
+    """,
+}
+
+# Latest rate per entity for one currency, as before current_rates, and a day's averages
+QUERIES = {
+    "legacy": {
+        "latest": """
+            SELECT DISTINCT ON (entity_id) entity_id, buy_rate, sell_rate, scraped_at
+            FROM bench_legacy
+            WHERE currency = 'EUR'
+            ORDER BY entity_id, scraped_at DESC
+        """,
+        "day avg": """
+            SELECT entity_id, AVG(buy_rate), AVG(sell_rate)
+            FROM bench_legacy
+            WHERE currency = 'EUR' AND scraped_at >= TIMESTAMP '2000-01-02' AND scraped_at < TIMESTAMP '2000-01-03'
+            GROUP BY entity_id
+        """,
+    },
+    "compact": {
+        "latest": """
+            SELECT entity_id, buy_micros / 1000000.0, sell_micros / 1000000.0, scraped_at
+            FROM (
+                SELECT DISTINCT ON (entity_id) entity_id, buy_micros, sell_micros, scraped_at
+                FROM bench_compact
+                WHERE currency_id = (SELECT id FROM currencies WHERE code = 'EUR')
+                ORDER BY entity_id, scraped_at DESC
+            ) latest
+        """,
+        "day avg": """
+            SELECT r.entity_id, AVG(r.buy_micros) / 1000000.0, AVG(r.sell_micros) / 1000000.0
+            FROM bench_compact r
+            WHERE r.currency_id = (SELECT id FROM currencies WHERE code = 'EUR')
+                AND r.scraped_at >= TIMESTAMPTZ '2000-01-02' AND r.scraped_at < TIMESTAMPTZ '2000-01-03'
+            GROUP BY r.entity_id
+        """,
+    },
+}
+
+
+def median_ms(cursor, query: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(query)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare table/index size and query latency of the legacy and compact rate layouts; "
+        "all writes are rolled back."
+    )
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Synthetic history rows (default: 5000000)")
+    parser.add_argument("--entities", type=int, default=1_000, help="Distinct entities (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query (default: 5)")
+    args = parser.parse_args()
+
+    params = {
+        "rows": args.rows,
+        "entities": args.entities,
+        "currencies": CURRENCIES,
+        "currency_count": len(CURRENCIES),
+    }
+    print(f"{'layout':<8} {'table MB':>9} {'index MB':>9} {'bytes/row':>10} {'latest ms':>10} {'day avg ms':>11}")
+    with get_connection() as conn:
+        try:
+            ensure_currencies(conn, CURRENCIES)
+            cursor = conn.cursor()
+            for layout, ddl in LAYOUTS.items():
+                cursor.execute(ddl, params)
+                cursor.execute(
+                    "SELECT pg_table_size(%s), pg_indexes_size(%s)", (f"bench_{layout}", f"bench_{layout}")
+                )
+                table_bytes, index_bytes = cursor.fetchone()
+                latest = median_ms(cursor, QUERIES[layout]["latest"], args.repeat)
+                day_avg = median_ms(cursor, QUERIES[layout]["day avg"], args.repeat)
+                print(
+                    f"{layout:<8} {table_bytes / 2**20:>9.1f} {index_bytes / 2**20:>9.1f} "
+                    f"{(table_bytes + index_bytes) / args.rows:>10.1f} {latest:>10.1f} {day_avg:>11.1f}"
+                )
+        finally:
+            conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+from datetime import date
+from pathlib import Path
+
+from app.core.config import EXPORT_DIR, EXPORT_FORMAT
+from app.core.logging import logger
+from app.database.connection import get_connection
+from app.services.export_service import FORMATS, export_history
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export rate history to Arrow/Parquet files, one per currency and month."
+    )
+    parser.add_argument("--dir", type=Path, default=EXPORT_DIR, help=f"Output directory (default: {EXPORT_DIR})")
+    parser.add_argument(
+        "--format", choices=list(FORMATS), default=EXPORT_FORMAT, help=f"File format (default: {EXPORT_FORMAT})"
+    )
+    parser.add_argument(
+        "--since",
+        type=lambda value: date.fromisoformat(f"{value}-01"),
+        help="First month to export, as YYYY-MM (default: all history)",
+    )
+    args = parser.parse_args()
+
+    with get_connection() as conn:
+        try:
+            written = export_history(conn, export_dir=args.dir, fmt=args.format, since=args.since)
+        except Exception:
+            conn.rollback()
+            raise
+    logger.info(f"Exported {sum(written.values())} rows to {len(written)} files.")
+    for path in written:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
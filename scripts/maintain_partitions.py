@@ -0,0 +1,37 @@
+import argparse
+
+from app.core.config import PARTITION_MONTHS_AHEAD, PARTITION_RETENTION_MONTHS
+from app.core.logging import logger
+from app.services.partition_service import maintain_partitions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Create upcoming exchange_rates partitions and archive expired ones."
+    )
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=PARTITION_MONTHS_AHEAD,
+        help=f"Create partitions up to this many months ahead (default: {PARTITION_MONTHS_AHEAD})",
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=PARTITION_RETENTION_MONTHS,
+        help=f"Archive partitions that ended more than this many months ago (default: {PARTITION_RETENTION_MONTHS})",
+    )
+    parser.add_argument("--keep-all", action="store_true", help="Only create partitions, never archive")
+    args = parser.parse_args()
+
+    created, archived = maintain_partitions(
+        months_ahead=args.months_ahead,
+        retention_months=None if args.keep_all else args.retention_months,
+    )
+    logger.info(f"Created {len(created)} partitions, archived {len(archived)}.")
+    for path in archived:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
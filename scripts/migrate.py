@@ -0,0 +1,24 @@
+import argparse
+
+from app.core.logging import logger
+from app.database.init_database import list_migrations, run_migration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply a SQL migration from app/database/migrations.")
+    parser.add_argument("name", nargs="?", help="Migration to apply, e.g. 003_rebuild_current_rates")
+    parser.add_argument("--list", action="store_true", help="List available migrations and exit")
+    args = parser.parse_args()
+
+    if args.list or not args.name:
+        for name in list_migrations():
+            print(name)
+        return
+
+    logger.info(f"Applying migration {args.name}...")
+    run_migration(args.name)
+    logger.info(f"Migration {args.name} applied.")
+
+
+if __name__ == "__main__":
+    main()
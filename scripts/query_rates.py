@@ -1,12 +1,84 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from contextlib import closing
+from datetime import datetime
+
+from app.core.config import QUERY_ITERSIZE, TIMEZONE
 from app.database.connection import get_connection
-from app.repositories.rate_repository import get_rates
+from app.repositories.rate_repository import RATE_QUERY_COLUMNS, iter_rates
+
+
+def _moment(value: str) -> datetime:
+    """Parse an ISO date or datetime; naive values are local (TIMEZONE) times."""
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=TIMEZONE)
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return float(value)
+
+
+def write_csv(rows, out):
+    writer = csv.writer(out)
+    writer.writerow(RATE_QUERY_COLUMNS)
+    for row in rows:
+        writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+
+
+def write_jsonl(rows, out):
+    for row in rows:
+        out.write(json.dumps(dict(zip(RATE_QUERY_COLUMNS, row)), default=_json_value) + "\n")
+
+
+FORMATS = {"csv": write_csv, "jsonl": write_jsonl}
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Stream stored exchange rates, most recent first, as CSV or JSON lines."
+    )
+    parser.add_argument("--currency", help="Currency code, e.g. EUR")
+    parser.add_argument("--source", help="Platform source, e.g. BNR or Valutare")
+    parser.add_argument("--entity", help="Entity name, case-insensitive substring")
+    parser.add_argument("--city", help="Entity city, case-insensitive")
+    parser.add_argument("--since", type=_moment, help="Scraped at or after, ISO date/time (local unless offset given)")
+    parser.add_argument("--until", type=_moment, help="Scraped before, ISO date/time (local unless offset given)")
+    parser.add_argument("--limit", type=int, help="Stop after this many rows")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv", help="Output format (default: csv)")
+    parser.add_argument(
+        "--itersize",
+        type=int,
+        default=QUERY_ITERSIZE,
+        help=f"Rows fetched from the server per round trip (default: {QUERY_ITERSIZE})",
+    )
+    args = parser.parse_args()
+
     with get_connection() as conn:
-        records = get_rates(conn)
-        for record in records:
-            print(record)
+        try:
+            rows = iter_rates(
+                conn,
+                limit=args.limit,
+                itersize=args.itersize,
+                currency=args.currency,
+                platform_source=args.source,
+                entity=args.entity,
+                city=args.city,
+                since=args.since,
+                until=args.until,
+            )
+            with closing(rows):
+                FORMATS[args.format](rows, sys.stdout)
+                sys.stdout.flush()
+        except BrokenPipeError:
+            # Output was cut short, e.g. piped into head; stop without a traceback on exit flush
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        finally:
+            conn.rollback()
 
 
 if __name__ == "__main__":
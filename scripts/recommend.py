@@ -2,24 +2,74 @@ import argparse
 import sys
 
 from app.database.connection import get_connection
+from app.models.recommendation import MarketReport
+from app.services.market_stats_service import DEFAULT_PERCENTILES, DEFAULT_TRIM
 from app.services.recommendation_service import (
     DEFAULT_MAX_AGE_HOURS,
     DEFAULT_MIN_SPREAD,
-    get_market_stats,
-    rank_own_rate,
-    recommend_rate,
+    STRATEGIES,
+    build_market_reports,
 )
 
 
+def print_report(report: MarketReport, args):
+    stats, own_rank, rec = report.stats, report.ranking, report.recommendation
+
+    print("=" * 55)
+    print(f" MARKET WATCH - RATE RECOMMENDATION ENGINE ({report.currency})")
+    print("=" * 55)
+    if report.error:
+        print(f"\n  Error: {report.error}")
+        print("=" * 55)
+        return
+
+    age_str = f"last {args.max_age_hours}h" if args.max_age_hours else "all-time"
+    print(f"\n--- Market Overview ({stats.competitor_count} Competitors active in {age_str}) ---")
+
+    print(f"  Best Competitor Buy : {stats.best_buy:.4f}")
+    print(f"  Best Competitor Sell: {stats.best_sell:.4f}")
+    print(f"  Market Avg Buy      : {stats.avg_buy:.4f}")
+    print(f"  Market Avg Sell     : {stats.avg_sell:.4f}")
+    print(f"  Median Buy / Sell   : {stats.buy.median:.4f} / {stats.sell.median:.4f}")
+    print(f"  Trimmed Avg Buy/Sell: {stats.buy.trimmed_mean:.4f} / {stats.sell.trimmed_mean:.4f}")
+    for q in sorted(stats.buy.percentiles):
+        print(f"  P{q:g} Buy / Sell".ljust(22) + f": {stats.buy.percentiles[q]:.4f} / {stats.sell.percentiles[q]:.4f}")
+    print(f"  Buy / Sell IQR      : {stats.buy.iqr:.4f} / {stats.sell.iqr:.4f}")
+
+    print("\n--- Current Own Office Rate & Market Rank ---")
+    if own_rank.own_buy is not None and own_rank.own_sell is not None:
+        print(f"  Posted Buy          : {own_rank.own_buy:.4f} ({own_rank.buy_rank_text})")
+        print(f"  Posted Sell         : {own_rank.own_sell:.4f} ({own_rank.sell_rank_text})")
+    else:
+        print("  Posted Rates        : No active rates posted yet for this currency.")
+
+    print("\n--- Recommendation ---")
+    print(f"  Target Strategy     : {args.strategy} (Margin: {args.margin:.4f})")
+    if rec.is_fallback:
+        print("  [SAFETY ALERT]    : Target rates would shrink spread below MIN_SPREAD.")
+        print(f"                       Falling back to strategy: '{rec.strategy_used}'.")
+
+    else:
+        print(f"  Strategy Applied    : {rec.strategy_used}")
+    print(f"  Recommended Buy     : {rec.recommended_buy:.4f}")
+    print(f"  Recommended Sell    : {rec.recommended_sell:.4f}")
+    print(f"  Resulting Spread    : {rec.spread:.4f}")
+    print("=" * 55)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Get market stats and recommended exchange rates.")
-    parser.add_argument("currency", type=str, help="Currency code (e.g. EUR, USD)")
+    parser.add_argument("currencies", nargs="*", metavar="currency", help="Currency codes (e.g. EUR USD)")
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Report every currency with fresh rates",
+    )
     parser.add_argument(
         "--strategy",
         type=str,
         default="beat_best",
-        choices=["beat_best", "match_average"],
-        help="Recommendation strategy (default: beat_best)",
+        help=f"Recommendation strategy: {', '.join(STRATEGIES)}, e.g. match_p75 (default: beat_best)",
     )
     parser.add_argument(
         "--margin",
@@ -40,52 +90,46 @@ def main():
         help=f"Max age of rates in hours to include (default: {DEFAULT_MAX_AGE_HOURS})",
     )
 
+    parser.add_argument(
+        "--percentiles",
+        type=float,
+        nargs="+",
+        default=list(DEFAULT_PERCENTILES),
+        help=f"Percentiles of competitor rates to report (default: {' '.join(f'{q:g}' for q in DEFAULT_PERCENTILES)})",
+    )
+    parser.add_argument(
+        "--trim",
+        type=float,
+        default=DEFAULT_TRIM,
+        help=f"Share of rates cut from each end for the trimmed average (default: {DEFAULT_TRIM})",
+    )
+
     args = parser.parse_args()
-    currency = args.currency.upper()
+    if not args.all and not args.currencies:
+        parser.error("give at least one currency or --all")
 
     try:
+        # One query covers every requested currency
         with get_connection() as conn:
-            stats = get_market_stats(conn, currency, max_age_hours=args.max_age_hours)
-            rec = recommend_rate(
+            reports = build_market_reports(
                 conn,
-                currency,
+                None if args.all else args.currencies,
                 strategy=args.strategy,
                 margin=args.margin,
                 min_spread=args.min_spread,
                 max_age_hours=args.max_age_hours,
+                percentiles=tuple(args.percentiles),
+                trim=args.trim,
             )
-            own_rank = rank_own_rate(conn, currency, max_age_hours=args.max_age_hours)
 
-        print("=" * 55)
-        print(f" MARKET WATCH - RATE RECOMMENDATION ENGINE ({currency})")
-        print("=" * 55)
-        age_str = f"last {args.max_age_hours}h" if args.max_age_hours else "all-time"
-        print(f"\n--- Market Overview ({stats.competitor_count} Competitors active in {age_str}) ---")
-
-        print(f"  Best Competitor Buy : {stats.best_buy:.4f}")
-        print(f"  Best Competitor Sell: {stats.best_sell:.4f}")
-        print(f"  Market Avg Buy      : {stats.avg_buy:.4f}")
-        print(f"  Market Avg Sell     : {stats.avg_sell:.4f}")
-
-        print("\n--- Current Own Office Rate & Market Rank ---")
-        if own_rank.own_buy is not None and own_rank.own_sell is not None:
-            print(f"  Posted Buy          : {own_rank.own_buy:.4f} ({own_rank.buy_rank_text})")
-            print(f"  Posted Sell         : {own_rank.own_sell:.4f} ({own_rank.sell_rank_text})")
-        else:
-            print("  Posted Rates        : No active rates posted yet for this currency.")
-
-        print("\n--- Recommendation ---")
-        print(f"  Target Strategy     : {args.strategy} (Margin: {args.margin:.4f})")
-        if rec.is_fallback:
-            print("  [SAFETY ALERT]    : Beating best rate would shrink spread below MIN_SPREAD.")
-            print(f"                       Falling back to strategy: '{rec.strategy_used}'.")
-
-        else:
-            print(f"  Strategy Applied    : {rec.strategy_used}")
-        print(f"  Recommended Buy     : {rec.recommended_buy:.4f}")
-        print(f"  Recommended Sell    : {rec.recommended_sell:.4f}")
-        print(f"  Resulting Spread    : {rec.spread:.4f}")
-        print("=" * 55)
+        if not reports:
+            raise ValueError("No rate data available for any currency.")
+        if len(reports) == 1 and reports[0].error:
+            raise ValueError(reports[0].error)
+        for report in reports:
+            print_report(report, args)
+        if all(report.error for report in reports):
+            sys.exit(1)
 
     except ValueError as err:
         print(f"Error: {err}", file=sys.stderr)
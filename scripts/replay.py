@@ -0,0 +1,39 @@
+import argparse
+from datetime import date
+
+from app.services.replay_service import replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse archived pages and store the resulting rates.")
+    parser.add_argument("since", type=date.fromisoformat, help="First day to replay (YYYY-MM-DD)")
+    parser.add_argument("until", type=date.fromisoformat, help="Last day to replay, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--source", type=str, default=None, help="Only replay one source (e.g. BNR, Valutare)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parser worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Apply the deviation check against the latest stored rate",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Parse only; do not write to the database")
+    args = parser.parse_args()
+
+    summary = replay(
+        args.since,
+        args.until,
+        source=args.source,
+        workers=args.workers,
+        store=not args.dry_run,
+        validate=args.validate,
+    )
+    action = "Parsed" if args.dry_run else "Replayed"
+    print(f"{action} {summary.pages} pages ({summary.records} records) from {args.since} to {args.until}.")
+
+
+if __name__ == "__main__":
+    main()
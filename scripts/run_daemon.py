@@ -0,0 +1,58 @@
+import argparse
+import signal
+import threading
+import time
+
+from app.core.config import DAEMON_INTERVAL_SECONDS, DRIVER_MAX_USES, DRIVER_POOL_SIZE
+from app.core.logging import logger
+from app.scrapers.driver_pool import DriverPool, install_pool
+from scripts.run_pipeline import run_all
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline on a fixed cadence with warm browsers.")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DAEMON_INTERVAL_SECONDS,
+        help=f"Seconds between pipeline runs (default: {DAEMON_INTERVAL_SECONDS})",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DRIVER_POOL_SIZE,
+        help=f"Number of warm browsers to keep (default: {DRIVER_POOL_SIZE})",
+    )
+    parser.add_argument(
+        "--max-uses",
+        type=int,
+        default=DRIVER_MAX_USES,
+        help=f"Recycle a browser after this many checkouts (default: {DRIVER_MAX_USES})",
+    )
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    pool = DriverPool(size=args.pool_size, max_uses=args.max_uses)
+    install_pool(pool)
+    logger.info(f"Daemon started: every {args.interval}s with {args.pool_size} warm browsers.")
+
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                run_all()
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Pipeline run failed: {e}")
+            stop.wait(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        install_pool(None)
+        pool.close()
+        logger.info("Daemon stopped.")
+
+
+if __name__ == "__main__":
+    main()
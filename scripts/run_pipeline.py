@@ -1,29 +1,53 @@
+import asyncio
+
+from app.core.config import PIPELINE_RUNNER
 from app.core.logging import logger
-from app.scrapers.bnr_scraper import scrape_bnr
-from app.scrapers.valutare_scraper import scrape_valutare
-from app.services.pipeline_service import process_scraped_data
+from app.database.connection import get_pool_stats
+from app.scrapers.orchestrator import iter_sources
+from app.services.async_pipeline_service import run_pipeline
+from app.services.partition_service import maintain_partitions
+from app.services.pipeline_service import process_scraped_pages
 
 
-def run_all():
-    logger.info("Pipeline started.")
+def scraped_pages():
+    """Yield the records of each successfully scraped page as soon as it finishes."""
+    for result in iter_sources():
+        if result.error:
+            continue
+        logger.info(
+            f"Scraper {result.source} {result.currency} returned {len(result.records)} records "
+            f"in {result.elapsed:.1f}s."
+        )
+        yield result.records
 
-    all_records = []
 
-    for scraper in [scrape_valutare, scrape_bnr]:
-        try:
-            records = scraper()
-            logger.info(f"Scraper {scraper.__name__} returned {len(records)} records.")
-            all_records.extend(records)
-        except Exception as e:  # noqa: BLE001
-            logger.error(f"Scraper {scraper.__name__} failed: {e}")
+def run_all():
+    logger.info("Pipeline started.")
 
-    if not all_records:
-        logger.warning("No records scraped. Pipeline will exit.")
+    # Make sure this month's partition exists; archiving is left to maintain_partitions.py
+    try:
+        maintain_partitions(retention_months=None)
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Partition maintenance failed: {e}")
+
+    if PIPELINE_RUNNER == "asyncio":
+        stored = asyncio.run(run_pipeline())
+    else:
+        stored = process_scraped_pages(scraped_pages())
+
+    stats = get_pool_stats()
+    if stats is not None:
+        logger.info(
+            f"Connection pool: {stats.checkouts} checkouts, wait avg {stats.avg_wait * 1000:.1f}ms "
+            f"max {stats.max_wait * 1000:.1f}ms, held avg {stats.avg_held:.2f}s max {stats.max_held:.2f}s, "
+            f"{stats.timeouts} timeouts, {stats.reconnects} reconnects."
+        )
+
+    if not stored:
+        logger.warning("No records stored.")
         return
 
-    process_scraped_data(all_records)
-
-    logger.info("Pipeline finished.")
+    logger.info(f"Pipeline finished: {stored} records processed.")
 
 
 if __name__ == "__main__":
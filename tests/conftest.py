@@ -0,0 +1,11 @@
+import pytest
+
+from app.repositories import page_archive
+
+
+@pytest.fixture(autouse=True)
+def isolated_archive(tmp_path, monkeypatch):
+    """Keep pages archived during tests out of the real archive directory."""
+    archive_dir = tmp_path / "archive"
+    monkeypatch.setattr(page_archive, "ARCHIVE_DIR", archive_dir)
+    return archive_dir
@@ -0,0 +1,152 @@
+from datetime import date, datetime
+
+import psycopg2
+import pytest
+from testcontainers.community.postgres import PostgresContainer
+
+from app.core.config import TIMEZONE
+from app.database.init_database import SCHEMA_PATH, apply_migration, list_migrations
+from app.models.exchange_rate import ExchangeRate
+from app.repositories.partition_repository import is_partitioned, list_rate_partitions
+from app.repositories.rate_repository import (
+    bulk_insert_exchange_rates,
+    get_latest_rate_for_entity,
+    get_rates,
+)
+from app.repositories.rollup_repository import get_rollups
+
+# The schema.sql shipped before any migration existed, with a little history
+BASELINE_SCHEMA = """
+CREATE TABLE entities (
+    id SERIAL PRIMARY KEY,
+    platform_source VARCHAR(255) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    city VARCHAR(255),
+    type VARCHAR(100) NOT NULL,
+    UNIQUE(platform_source, name, city)
+);
+
+CREATE TABLE exchange_rates (
+    id SERIAL PRIMARY KEY,
+    entity_id INTEGER NOT NULL,
+    currency VARCHAR(10) NOT NULL,
+    buy_rate NUMERIC(12, 6) NOT NULL,
+    sell_rate NUMERIC(12, 6) NOT NULL,
+    scraped_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (entity_id) REFERENCES entities(id),
+    UNIQUE(entity_id, currency, scraped_at)
+);
+
+CREATE INDEX idx_rates_entity_currency_time
+ON exchange_rates(entity_id, currency, scraped_at);
+
+INSERT INTO entities (platform_source, name, city, type) VALUES ('BNR', 'Legacy Bank', NULL, 'bank');
+
+INSERT INTO exchange_rates (entity_id, currency, buy_rate, sell_rate, scraped_at) VALUES
+    (1, 'EUR', 4.9, 5.0, '2025-01-15 10:00'),
+    (1, 'USD', 4.512345, 4.6, '2025-02-15 10:00'),
+    (1, 'EUR', 4.92, 5.0, '2025-04-15 10:00');
+"""
+
+
+@pytest.fixture(scope="module")
+def postgres():
+    with PostgresContainer("postgres:15-alpine") as postgres:
+        yield postgres
+
+
+@pytest.fixture
+def legacy_conn(postgres):
+    """A connection to a fresh database with the baseline schema."""
+    conn = psycopg2.connect(
+        dbname=postgres.dbname,
+        user=postgres.username,
+        password=postgres.password,
+        host=postgres.get_container_host_ip(),
+        port=postgres.get_exposed_port(5432),
+        options=f"-c timezone={TIMEZONE.key}",
+    )
+    with conn.cursor() as cur:
+        cur.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
+        cur.execute(BASELINE_SCHEMA)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_schema_refuses_the_legacy_layout(legacy_conn):
+    with pytest.raises(psycopg2.errors.RaiseException, match="001_compact_exchange_rates"):
+        legacy_conn.cursor().execute(SCHEMA_PATH.read_text())
+
+
+def test_later_migrations_wait_for_the_conversion(legacy_conn):
+    with pytest.raises(ValueError, match="apply 001_compact_exchange_rates first"):
+        apply_migration(legacy_conn, "003_rebuild_current_rates")
+
+
+def test_compact_migration_converts_existing_history(legacy_conn):
+    conn = legacy_conn
+    apply_migration(conn, "001_compact_exchange_rates")
+    conn.commit()
+
+    assert is_partitioned(conn)
+    partitions = list_rate_partitions(conn)
+    assert {"exchange_rates_p2025_01", "exchange_rates_p2025_02", "exchange_rates_p2025_03"} <= set(partitions)
+    assert partitions["exchange_rates_p2025_04"] == date(2025, 4, 1)
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT code FROM currencies ORDER BY id")
+    assert [row[0] for row in cursor.fetchall()] == ["EUR", "USD"]
+    cursor.execute("SELECT id, buy_micros, scraped_at, tableoid::regclass::text FROM exchange_rates ORDER BY id")
+    assert cursor.fetchall() == [
+        (1, 4_900_000, datetime(2025, 1, 15, 10, 0, tzinfo=TIMEZONE), "exchange_rates_p2025_01"),
+        (2, 4_512_345, datetime(2025, 2, 15, 10, 0, tzinfo=TIMEZONE), "exchange_rates_p2025_02"),
+        (3, 4_920_000, datetime(2025, 4, 15, 10, 0, tzinfo=TIMEZONE), "exchange_rates_p2025_04"),
+    ]
+    assert [(row[4], float(row[5])) for row in get_rates(conn)] == [("EUR", 4.92), ("USD", 4.512345), ("EUR", 4.9)]
+
+    # schema.sql ran after the migration, so triggers and the id sequence work on the new table
+    bulk_insert_exchange_rates(conn, [(1, ExchangeRate(currency="EUR", buy=5.1, sell=5.2, timestamp="2025-05-01T09:00"))])
+    conn.commit()
+    assert get_latest_rate_for_entity(conn, 1, "EUR") == {"buy_rate": 5.1, "sell_rate": 5.2}
+    cursor.execute("SELECT MAX(id) FROM exchange_rates")
+    assert cursor.fetchone()[0] == 4
+
+    with pytest.raises(ValueError, match="already converted"):
+        apply_migration(conn, "001_compact_exchange_rates")
+
+
+def test_every_migration_applies_in_order_to_a_baseline_database(legacy_conn):
+    conn = legacy_conn
+    with conn.cursor() as cur:
+        # An unchanged scrape, for the interval compaction to collapse
+        cur.execute(
+            "INSERT INTO exchange_rates (entity_id, currency, buy_rate, sell_rate, scraped_at) "
+            "VALUES (1, 'EUR', 4.9, 5.0, '2025-01-15 11:00')"
+        )
+    conn.commit()
+
+    assert list_migrations() == [
+        "001_compact_exchange_rates",
+        "002_compact_rate_intervals",
+        "003_rebuild_current_rates",
+        "004_rebuild_rate_rollups",
+    ]
+    for name in list_migrations():
+        apply_migration(conn, name)
+        conn.commit()
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, last_seen_at FROM exchange_rates ORDER BY id")
+    assert cursor.fetchall() == [
+        (1, datetime(2025, 1, 15, 11, 0, tzinfo=TIMEZONE)),
+        (2, datetime(2025, 2, 15, 10, 0, tzinfo=TIMEZONE)),
+        (3, datetime(2025, 4, 15, 10, 0, tzinfo=TIMEZONE)),
+    ]
+    assert get_latest_rate_for_entity(conn, 1, "EUR") == {"buy_rate": 4.92, "sell_rate": 5.0}
+    assert get_latest_rate_for_entity(conn, 1, "USD") == {"buy_rate": 4.512345, "sell_rate": 4.6}
+    days = get_rollups(conn, "EUR", grain="day")
+    assert [(str(day["bucket"]), day["samples"]) for day in days] == [
+        ("2025-01-15 00:00:00", 1),
+        ("2025-04-15 00:00:00", 1),
+    ]
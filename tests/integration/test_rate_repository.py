@@ -1,33 +1,71 @@
+import asyncio
+import csv
+import gzip
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 import psycopg2
 import pytest
 from testcontainers.community.postgres import PostgresContainer
 
+from app.core.config import TIMESTAMP_FORMAT, TIMEZONE
+from app.database.init_database import MIGRATIONS_DIR
+from app.database.prepared import prepared_names
+from app.models.entity import Entity
 from app.models.exchange_rate import ExchangeRate
+from app.repositories.aio import rate_repository as aio_rates
+from app.repositories.entity_repository import (
+    get_entity_id,
+    insert_entity,
+    upsert_entities,
+)
+from app.repositories.fingerprint_repository import save_fingerprint, touch_fingerprint
+from app.repositories.partition_repository import (
+    create_rate_partition,
+    is_partitioned,
+    list_rate_partitions,
+)
 from app.repositories.rate_repository import (
+    bulk_insert_exchange_rates,
     get_latest_rate_for_entity,
     get_latest_rates_by_currency,
+    get_latest_rates_for_currencies,
+    get_latest_rates_for_keys,
+    get_rates,
     insert_exchange_rate,
+    iter_rates,
 )
+from app.repositories.rollup_repository import get_market_trend, get_rollups
+from app.services.analytics_service import load_history
+from app.services.entity_cache import entity_id_cache
+from app.services.entity_service import get_or_create_entity_async
+from app.services.export_service import export_history
+from app.services.partition_service import archive_partitions, ensure_partitions
+from app.services.rate_service import create_exchange_rates
 
 
 @pytest.fixture(scope="module")
-def postgres_conn():
+def postgres_params():
     with PostgresContainer("postgres:15-alpine") as postgres:
-        conn = psycopg2.connect(
-            dbname=postgres.dbname,
-            user=postgres.username,
-            password=postgres.password,
-            host=postgres.get_container_host_ip(),
-            port=postgres.get_exposed_port(5432),
-        )
-        schema_path = Path(__file__).parent.parent.parent / "app" / "database" / "schema.sql"
-        with conn.cursor() as cur:
-            cur.execute(schema_path.read_text(encoding="utf-8"))
-        conn.commit()
-        yield conn
-        conn.close()
+        yield {
+            "dbname": postgres.dbname,
+            "user": postgres.username,
+            "password": postgres.password,
+            "host": postgres.get_container_host_ip(),
+            "port": postgres.get_exposed_port(5432),
+            "options": f"-c timezone={TIMEZONE.key}",
+        }
+
+
+@pytest.fixture(scope="module")
+def postgres_conn(postgres_params):
+    conn = psycopg2.connect(**postgres_params)
+    schema_path = Path(__file__).parent.parent.parent / "app" / "database" / "schema.sql"
+    with conn.cursor() as cur:
+        cur.execute(schema_path.read_text(encoding="utf-8"))
+    conn.commit()
+    yield conn
+    conn.close()
 
 
 def test_repository_postgres_integration(postgres_conn):
@@ -64,3 +102,494 @@ def test_repository_postgres_integration(postgres_conn):
     assert len(rates) == 1
     assert rates[0]["entity_id"] == entity_id
     assert rates[0]["buy_rate"] == 4.92
+
+
+def test_unchanged_page_heartbeat_keeps_rates_fresh(postgres_conn):
+    conn = postgres_conn
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO entities (platform_source, name, city, type) VALUES ('BNR', 'BT Heartbeat', NULL, 'bank') RETURNING id;"
+    )
+    entity_id = cursor.fetchone()[0]
+
+    now = datetime.now(TIMEZONE)
+    rate = ExchangeRate(currency="USD", buy=4.50, sell=4.60, timestamp=(now - timedelta(hours=48)).strftime(TIMESTAMP_FORMAT))
+    insert_exchange_rate(conn, entity_id, rate)
+    save_fingerprint(conn, "BNR", "USD", "a" * 64, rate.scraped_at)
+    conn.commit()
+
+    assert get_latest_rates_by_currency(conn, "USD", max_age_hours=24) == []
+
+    touch_fingerprint(conn, "BNR", "USD", now)
+    conn.commit()
+
+    rates = get_latest_rates_by_currency(conn, "USD", max_age_hours=24)
+    assert [r["entity_id"] for r in rates] == [entity_id]
+
+
+def test_upsert_entities_resolves_existing_and_new_in_one_batch(postgres_conn):
+    conn = postgres_conn
+    existing_bank = Entity(platform_source="BNR", name="Upsert Bank", city=None, type="bank")
+    existing_office = Entity(platform_source="Valutare", name="Upsert Office", city="Iasi", type="exchange_office")
+    new_bank = Entity(platform_source="BNR", name="Upsert New Bank", city=None, type="bank")
+
+    first = upsert_entities(conn, [existing_bank, existing_office])
+    conn.commit()
+
+    ids = upsert_entities(conn, [existing_bank, existing_office, new_bank, new_bank])
+    conn.commit()
+
+    assert ids[existing_bank.key] == first[existing_bank.key]
+    assert ids[existing_office.key] == first[existing_office.key]
+    assert len(set(ids.values())) == 3
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM entities WHERE name LIKE 'Upsert%%'")
+    assert cursor.fetchone()[0] == 3
+
+
+@pytest.mark.parametrize("method", ["copy", "values"])
+def test_bulk_insert_reports_inserted_and_duplicates(postgres_conn, method):
+    conn = postgres_conn
+    [entity_id] = upsert_entities(
+        conn, [Entity(platform_source="Valutare", name=f"Bulk {method}", city="Arad", type="exchange_office")]
+    ).values()
+    first = [(entity_id, ExchangeRate(currency="GBP", buy=5.8, sell=5.9, timestamp=f"2026-08-01 1{h}:00")) for h in range(3)]
+    second = first[1:] + [(entity_id, ExchangeRate(currency="GBP", buy=5.81, sell=5.91, timestamp="2026-08-01 13:00"))]
+
+    assert bulk_insert_exchange_rates(conn, first, method=method) == (3, 0)
+    assert bulk_insert_exchange_rates(conn, second, method=method) == (1, 2)
+    conn.commit()
+
+    assert get_latest_rate_for_entity(conn, entity_id, "GBP") == {"buy_rate": 5.81, "sell_rate": 5.91}
+
+
+def test_latest_rates_for_keys_returns_newest_per_pair(postgres_conn):
+    conn = postgres_conn
+    ids = upsert_entities(
+        conn,
+        [
+            Entity(platform_source="BNR", name="Keys Bank A", city=None, type="bank"),
+            Entity(platform_source="BNR", name="Keys Bank B", city=None, type="bank"),
+        ],
+    )
+    first_id, second_id = ids.values()
+    bulk_insert_exchange_rates(
+        conn,
+        [
+            (first_id, ExchangeRate(currency="CHF", buy=5.1, sell=5.2, timestamp="2026-08-01 10:00")),
+            (first_id, ExchangeRate(currency="CHF", buy=5.15, sell=5.25, timestamp="2026-08-01 11:00")),
+            (second_id, ExchangeRate(currency="CHF", buy=5.3, sell=5.4, timestamp="2026-08-01 10:00")),
+        ],
+    )
+    conn.commit()
+
+    latest = get_latest_rates_for_keys(conn, [(first_id, "chf"), (second_id, "CHF"), (second_id, "USD")])
+
+    assert latest == {(first_id, "CHF"): (5.15, 5.25), (second_id, "CHF"): (5.3, 5.4)}
+
+
+def _history(conn, entity_id):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT buy_rate::float, scraped_at::timestamp, last_seen_at::timestamp FROM exchange_rates_decoded"
+        " WHERE entity_id = %s ORDER BY scraped_at",
+        (entity_id,),
+    )
+    return [(buy, str(start), str(seen) if seen else None) for buy, start, seen in cursor.fetchall()]
+
+
+def _ids(conn, entity_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM exchange_rates WHERE entity_id = %s", (entity_id,))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def test_interval_mode_only_writes_changed_rates(postgres_conn):
+    conn = postgres_conn
+    [entity_id] = upsert_entities(
+        conn, [Entity(platform_source="Valutare", name="Interval Office", city="Sibiu", type="exchange_office")]
+    ).values()
+
+    def scrape(buy, hour):
+        return [(entity_id, ExchangeRate(currency="EUR", buy=buy, sell=buy + 0.05, timestamp=f"2026-08-01T{hour}:00"))]
+
+    assert create_exchange_rates(conn, scrape(4.9, 10), mode="interval") == (1, 0)
+    assert create_exchange_rates(conn, scrape(4.9, 11) + scrape(4.9, 12), mode="interval") == (0, 2)
+    assert create_exchange_rates(conn, scrape(4.9, 13) + scrape(4.95, 14), mode="interval") == (1, 1)
+    assert create_exchange_rates(conn, scrape(4.95, 14), mode="interval") == (0, 1)
+    conn.commit()
+
+    assert _history(conn, entity_id) == [
+        (4.9, "2026-08-01 10:00:00", "2026-08-01 13:00:00"),
+        (4.95, "2026-08-01 14:00:00", "2026-08-01 14:00:00"),
+    ]
+    assert get_latest_rate_for_entity(conn, entity_id, "EUR") == {"buy_rate": 4.95, "sell_rate": 5.0}
+    assert [row[8] for row in get_rates(conn) if row[0] in _ids(conn, entity_id)] == [
+        datetime(2026, 8, 1, 14, 0, tzinfo=TIMEZONE), datetime(2026, 8, 1, 13, 0, tzinfo=TIMEZONE)
+    ]
+
+
+def test_interval_row_stays_fresh_while_last_seen_is_recent(postgres_conn):
+    conn = postgres_conn
+    [entity_id] = upsert_entities(
+        conn, [Entity(platform_source="Valutare", name="Fresh Interval", city="Brasov", type="exchange_office")]
+    ).values()
+    now = datetime.now(TIMEZONE)
+    create_exchange_rates(
+        conn,
+        [
+            (entity_id, ExchangeRate(currency="SEK", buy=0.43, sell=0.45, timestamp=(now - timedelta(hours=30)).strftime(TIMESTAMP_FORMAT))),
+            (entity_id, ExchangeRate(currency="SEK", buy=0.43, sell=0.45, timestamp=(now - timedelta(hours=1)).strftime(TIMESTAMP_FORMAT))),
+        ],
+        mode="interval",
+    )
+    conn.commit()
+
+    [fresh] = get_latest_rates_by_currency(conn, "SEK", max_age_hours=2)
+    assert fresh["entity_id"] == entity_id
+    assert fresh["scraped_at"] < fresh["last_seen_at"]
+
+
+def test_compaction_migration_collapses_unchanged_runs(postgres_conn):
+    conn = postgres_conn
+    [entity_id] = upsert_entities(
+        conn, [Entity(platform_source="BNR", name="Compaction Bank", city=None, type="bank")]
+    ).values()
+    buys = [4.9, 4.9, 4.9, 4.95, 4.95, 4.9]
+    bulk_insert_exchange_rates(
+        conn,
+        [
+            (entity_id, ExchangeRate(currency="NOK", buy=buy, sell=5.0, timestamp=f"2026-08-02T1{i}:00"))
+            for i, buy in enumerate(buys)
+        ],
+    )
+    conn.commit()
+
+    with conn.cursor() as cur:
+        cur.execute((MIGRATIONS_DIR / "002_compact_rate_intervals.sql").read_text())
+    conn.commit()
+
+    assert _history(conn, entity_id) == [
+        (4.9, "2026-08-02 10:00:00", "2026-08-02 12:00:00"),
+        (4.95, "2026-08-02 13:00:00", "2026-08-02 14:00:00"),
+        (4.9, "2026-08-02 15:00:00", "2026-08-02 15:00:00"),
+    ]
+
+    # Buckets whose rows were collapsed are recomputed from the rows left in them
+    hours = get_rollups(conn, "NOK", grain="hour", entity_id=entity_id)
+    assert [(str(r["bucket"]), r["samples"]) for r in hours] == [
+        ("2026-08-02 10:00:00", 1),
+        ("2026-08-02 13:00:00", 1),
+        ("2026-08-02 15:00:00", 1),
+    ]
+    [day] = get_rollups(conn, "NOK", grain="day", entity_id=entity_id)
+    assert (day["open_buy"], day["high_buy"], day["close_buy"], day["samples"]) == (4.9, 4.95, 4.9, 3)
+
+
+def _current(conn, entity_id, currency):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT buy_rate::float, scraped_at::timestamp FROM current_rates WHERE entity_id = %s AND currency = %s",
+        (entity_id, currency),
+    )
+    row = cursor.fetchone()
+    return (row[0], str(row[1])) if row else None
+
+
+def test_current_rates_follow_inserts_updates_and_deletes(postgres_conn):
+    conn = postgres_conn
+    [entity_id] = upsert_entities(
+        conn, [Entity(platform_source="BNR", name="Current Bank", city=None, type="bank")]
+    ).values()
+
+    def rate(buy, hour):
+        return (entity_id, ExchangeRate(currency="HUF", buy=buy, sell=buy + 0.01, timestamp=f"2026-08-03T{hour}:00"))
+
+    bulk_insert_exchange_rates(conn, [rate(1.25, 10), rate(1.27, 12), rate(1.26, 11)], method="copy")
+    assert _current(conn, entity_id, "HUF") == (1.27, "2026-08-03 12:00:00")
+
+    # A replayed older scrape does not replace the current rate
+    bulk_insert_exchange_rates(conn, [rate(1.20, "09")], method="values")
+    assert _current(conn, entity_id, "HUF") == (1.27, "2026-08-03 12:00:00")
+
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM exchange_rates WHERE entity_id = %s AND scraped_at = '2026-08-03 12:00'", (entity_id,))
+    assert _current(conn, entity_id, "HUF") == (1.26, "2026-08-03 11:00:00")
+
+    cursor.execute("DELETE FROM exchange_rates WHERE entity_id = %s", (entity_id,))
+    assert _current(conn, entity_id, "HUF") is None
+    conn.commit()
+
+
+def test_backfill_migration_rebuilds_current_rates(postgres_conn):
+    conn = postgres_conn
+    [entity_id] = upsert_entities(
+        conn, [Entity(platform_source="BNR", name="Backfill Bank", city=None, type="bank")]
+    ).values()
+    bulk_insert_exchange_rates(
+        conn,
+        [(entity_id, ExchangeRate(currency="PLN", buy=1.1 + h / 100, sell=1.2, timestamp=f"2026-08-04T1{h}:00")) for h in range(3)],
+    )
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM current_rates")
+    conn.commit()
+
+    cursor.execute((MIGRATIONS_DIR / "003_rebuild_current_rates.sql").read_text())
+    conn.commit()
+
+    assert _current(conn, entity_id, "PLN") == (1.12, "2026-08-04 12:00:00")
+
+
+def test_rollups_merge_batches_incrementally(postgres_conn):
+    conn = postgres_conn
+    first_id, second_id = upsert_entities(
+        conn,
+        [
+            Entity(platform_source="Valutare", name="Rollup Office A", city="Oradea", type="exchange_office"),
+            Entity(platform_source="Valutare", name="Rollup Office B", city="Oradea", type="exchange_office"),
+        ],
+    ).values()
+
+    def rate(entity_id, buy, minute, hour=10):
+        timestamp = f"2026-08-05T{hour}:{minute:02d}"
+        return (entity_id, ExchangeRate(currency="DKK", buy=buy, sell=buy + 0.02, timestamp=timestamp))
+
+    bulk_insert_exchange_rates(conn, [rate(first_id, 0.66, 20), rate(first_id, 0.70, 30)], method="copy")
+    # A later batch can extend the bucket on both ends
+    bulk_insert_exchange_rates(
+        conn, [rate(first_id, 0.64, 50), rate(first_id, 0.67, 5), rate(second_id, 0.65, 0, hour=11)], method="values"
+    )
+    conn.commit()
+
+    [hour] = get_rollups(conn, "dkk", grain="hour", entity_id=first_id)
+    assert str(hour["bucket"]) == "2026-08-05 10:00:00"
+    assert (hour["open_buy"], hour["high_buy"], hour["low_buy"], hour["close_buy"]) == (0.67, 0.70, 0.64, 0.64)
+    assert hour["avg_buy"] == pytest.approx(0.6675)
+    assert hour["close_sell"] == 0.66
+    assert hour["samples"] == 4
+
+    [day] = get_market_trend(conn, "DKK", grain="day")
+    assert day["best_buy"] == 0.70
+    assert day["best_sell"] == 0.66
+    assert day["avg_buy"] == pytest.approx((0.66 + 0.70 + 0.64 + 0.67 + 0.65) / 5)
+    assert day["entity_count"] == 2
+
+    assert len(get_rollups(conn, "DKK", grain="hour", since="2026-08-05 11:00")) == 1
+
+    incremental = get_rollups(conn, "DKK", grain="hour") + get_rollups(conn, "DKK", grain="day")
+    with conn.cursor() as cur:
+        cur.execute((MIGRATIONS_DIR / "004_rebuild_rate_rollups.sql").read_text())
+    conn.commit()
+    assert get_rollups(conn, "DKK", grain="hour") + get_rollups(conn, "DKK", grain="day") == incremental
+
+
+def test_partitions_are_created_ahead_pruned_and_archived(postgres_conn, tmp_path):
+    conn = postgres_conn
+    created = ensure_partitions(conn, months_ahead=1, today=date(2024, 1, 10))
+    assert created == ["exchange_rates_p2024_01", "exchange_rates_p2024_02"]
+    assert ensure_partitions(conn, months_ahead=1, today=date(2024, 1, 20)) == []
+
+    [entity_id] = upsert_entities(
+        conn, [Entity(platform_source="BNR", name="Partition Bank", city=None, type="bank")]
+    ).values()
+    bulk_insert_exchange_rates(
+        conn,
+        [
+            (entity_id, ExchangeRate(currency="EUR", buy=4.97, sell=5.0, timestamp="2024-01-05T10:00")),
+            (entity_id, ExchangeRate(currency="EUR", buy=4.98, sell=5.0, timestamp="2024-02-05T10:00")),
+        ],
+    )
+    conn.commit()
+
+    cursor = conn.cursor()
+    cursor.execute(
+        "EXPLAIN SELECT * FROM exchange_rates WHERE scraped_at >= '2024-02-01' AND scraped_at < '2024-03-01'"
+    )
+    plan = "\n".join(row[0] for row in cursor.fetchall())
+    assert "exchange_rates_p2024_02" in plan
+    assert "exchange_rates_p2024_01" not in plan
+    assert "exchange_rates_default" not in plan
+
+    archived = archive_partitions(conn, retention_months=1, archive_dir=tmp_path, today=date(2024, 3, 3))
+
+    assert archived == [tmp_path / "exchange_rates_p2024_01.csv.gz"]
+    with gzip.open(archived[0], "rt", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["entity_id"], row["buy_rate"]) for row in rows] == [(str(entity_id), "4.970000")]
+    partitions = list_rate_partitions(conn)
+    assert "exchange_rates_p2024_01" not in partitions
+    assert "exchange_rates_p2024_02" in partitions
+
+
+def test_partition_takes_over_rows_from_the_default_partition(postgres_conn):
+    conn = postgres_conn
+    [entity_id] = upsert_entities(
+        conn, [Entity(platform_source="BNR", name="Replay Bank", city=None, type="bank")]
+    ).values()
+    # A replayed page from a month without a partition lands in the default one
+    bulk_insert_exchange_rates(
+        conn, [(entity_id, ExchangeRate(currency="EUR", buy=4.75, sell=4.8, timestamp="2022-03-10T10:00"))]
+    )
+    conn.commit()
+
+    assert create_rate_partition(conn, date(2022, 3, 15)) == "exchange_rates_p2022_03"
+    assert create_rate_partition(conn, date(2022, 3, 1)) == "exchange_rates_p2022_03"
+    conn.commit()
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT tableoid::regclass::text FROM exchange_rates WHERE entity_id = %s", (entity_id,))
+    assert cursor.fetchall() == [("exchange_rates_p2022_03",)]
+    assert is_partitioned(conn)
+    cursor.execute(
+        "SELECT c.relname FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partdefid "
+        "WHERE pt.partrelid = 'exchange_rates'::regclass"
+    )
+    assert cursor.fetchone()[0] == "exchange_rates_default"
+    # Moving the row did not touch the derived tables
+    assert get_latest_rate_for_entity(conn, entity_id, "EUR") == {"buy_rate": 4.75, "sell_rate": 4.8}
+    [day] = get_rollups(conn, "EUR", grain="day", entity_id=entity_id)
+    assert day["samples"] == 1
+
+
+def test_history_export_streams_months_into_currency_files(postgres_conn, tmp_path):
+    pytest.importorskip("pyarrow")
+    conn = postgres_conn
+    [entity_id] = upsert_entities(
+        conn, [Entity(platform_source="BNR", name="Export Bank", city="Cluj", type="bank")]
+    ).values()
+    bulk_insert_exchange_rates(
+        conn,
+        [
+            (entity_id, ExchangeRate(currency="CZK", buy=0.41, sell=0.43, timestamp="2023-05-31T23:30")),
+            (entity_id, ExchangeRate(currency="CZK", buy=0.42, sell=0.44, timestamp="2023-06-01T00:30")),
+            (entity_id, ExchangeRate(currency="CZK", buy=0.425, sell=0.445, timestamp="2023-06-02T10:00")),
+        ],
+    )
+    conn.commit()
+
+    written = export_history(conn, export_dir=tmp_path, fmt="parquet", since=date(2023, 1, 1), batch_rows=2)
+    exported = {path.relative_to(tmp_path).as_posix(): rows for path, rows in written.items()}
+    assert exported["currency=CZK/2023-05.parquet"] == 1
+    assert exported["currency=CZK/2023-06.parquet"] == 2
+
+    history = load_history(tmp_path, currencies=["CZK"], since=date(2023, 6, 1))
+    assert history["buy_rate"].to_pylist() == [0.42, 0.425]
+    assert history["scraped_at"][0].as_py() == datetime(2023, 6, 1, 0, 30, tzinfo=TIMEZONE)
+    assert history["city"].to_pylist() == ["Cluj", "Cluj"]
+
+
+def test_iter_rates_filters_and_streams_in_batches(postgres_conn):
+    conn = postgres_conn
+    ids = upsert_entities(
+        conn,
+        [
+            Entity(platform_source="Valutare", name="Query Office North", city="Suceava", type="exchange_office"),
+            Entity(platform_source="Valutare", name="Query Office South", city="Craiova", type="exchange_office"),
+        ],
+    )
+    north_id, south_id = ids.values()
+    bulk_insert_exchange_rates(
+        conn,
+        [
+            (entity_id, ExchangeRate(currency="RSD", buy=0.04 + h / 1000, sell=0.05, timestamp=f"2026-08-06T1{h}:00"))
+            for entity_id in (north_id, south_id)
+            for h in range(5)
+        ],
+    )
+    conn.commit()
+
+    rows = list(iter_rates(conn, itersize=2, currency="rsd", entity="north"))
+    assert [row[2] for row in rows] == ["Query Office North"] * 5
+    assert [row[7].hour for row in rows] == [14, 13, 12, 11, 10]
+
+    window = list(
+        iter_rates(
+            conn,
+            currency="RSD",
+            city="craiova",
+            since=datetime(2026, 8, 6, 11, tzinfo=TIMEZONE),
+            until=datetime(2026, 8, 6, 13, tzinfo=TIMEZONE),
+        )
+    )
+    assert [(row[3], row[7].hour) for row in window] == [("Craiova", 12), ("Craiova", 11)]
+    assert len(list(iter_rates(conn, limit=3, platform_source="Valutare", currency="RSD"))) == 3
+    rates = get_rates(conn, currency="RSD", entity="query office")
+    assert len(rates) == 10
+    assert rates == list(iter_rates(conn, currency="RSD", entity="query office"))
+    conn.rollback()
+
+
+def test_async_repository_functions_share_the_schema(postgres_conn, postgres_params):
+    psycopg = pytest.importorskip("psycopg")
+    entity_id_cache.clear()
+    office = Entity(platform_source="Valutare", name="Async Office", city=None, type="exchange_office")
+
+    async def scenario():
+        conn = await psycopg.AsyncConnection.connect(**postgres_params)
+        try:
+            entity_id = await get_or_create_entity_async(conn, office)
+            entity_id_cache.clear()
+            assert await get_or_create_entity_async(conn, office) == entity_id
+
+            rate = ExchangeRate(currency="DKK", buy=0.65, sell=0.67, timestamp=datetime.now(TIMEZONE).strftime(TIMESTAMP_FORMAT))
+            assert await aio_rates.insert_exchange_rate(conn, entity_id, rate) is not None
+            assert await aio_rates.insert_exchange_rate(conn, entity_id, rate) is None
+            await conn.commit()
+            return entity_id, await aio_rates.get_latest_rates_by_currency(conn, "dkk", max_age_hours=1)
+        finally:
+            await conn.close()
+
+    entity_id, latest = asyncio.run(scenario())
+
+    assert latest == get_latest_rates_by_currency(postgres_conn, "DKK", max_age_hours=1)
+    assert [(r["entity_id"], r["buy_rate"], r["sell_rate"]) for r in latest] == [(entity_id, 0.65, 0.67)]
+    entity_id_cache.clear()
+
+
+def test_hot_statements_are_prepared_once_per_connection(postgres_params):
+    conn = psycopg2.connect(**postgres_params)
+    try:
+        office = Entity(platform_source="BNR", name="Prepared Bank", city=None, type="bank")
+        entity_id = insert_entity(conn, office)
+        assert get_entity_id(conn, office) == entity_id
+        rate = ExchangeRate(currency="SEK", buy=0.42, sell=0.44, timestamp="2026-08-03 10:00:00")
+        assert insert_exchange_rate(conn, entity_id, rate) is not None
+        conn.rollback()
+
+        # PREPARE is session-level, so the statements survive the rollback
+        assert {"entity_id_by_key", "insert_entity", "ensure_currencies", "insert_rate"} <= prepared_names(conn)
+        entity_id = insert_entity(conn, office)
+        assert insert_exchange_rate(conn, entity_id, rate) is not None
+        assert get_latest_rate_for_entity(conn, entity_id, "sek") == {"buy_rate": 0.42, "sell_rate": 0.44}
+        conn.commit()
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM pg_prepared_statements")
+        assert {row[0] for row in cursor.fetchall()} == prepared_names(conn)
+    finally:
+        conn.close()
+
+
+def test_latest_rates_for_currencies_match_per_currency_lookups(postgres_conn):
+    conn = postgres_conn
+    now = datetime.now(TIMEZONE).strftime(TIMESTAMP_FORMAT)
+    offices = [Entity(platform_source="Valutare", name=f"Batch Office {i}", city="Iasi", type="exchange_office") for i in range(2)]
+    ids = upsert_entities(conn, offices)
+    bulk_insert_exchange_rates(
+        conn,
+        [
+            (entity_id, ExchangeRate(currency=currency, buy=1.0 + i, sell=1.1 + i, timestamp=now))
+            for i, entity_id in enumerate(ids.values())
+            for currency in ("NOK", "CZK")
+        ],
+    )
+    conn.commit()
+
+    snapshot = get_latest_rates_for_currencies(conn, ["nok", "czk", "isk"], max_age_hours=1)
+
+    assert set(snapshot) == {"NOK", "CZK"}
+    for currency in snapshot:
+        assert snapshot[currency] == get_latest_rates_by_currency(conn, currency, max_age_hours=1)
+    assert {r["city"] for r in snapshot["NOK"]} == {"Iasi"}
+    assert set(get_latest_rates_for_currencies(conn)) >= {"NOK", "CZK"}
@@ -0,0 +1,217 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import TIMESTAMP_FORMAT, TIMEZONE
+from app.database import connection
+from app.database.connection import connect_sqlite
+from app.database.init_database import apply_migration, apply_schema
+from app.models.entity import Entity
+from app.models.exchange_rate import ExchangeRate
+from app.repositories.entity_repository import (
+    get_entity_id,
+    insert_entity,
+    upsert_entities,
+)
+from app.repositories.fingerprint_repository import (
+    get_fingerprints,
+    save_fingerprint,
+    touch_fingerprint,
+)
+from app.repositories.partition_repository import is_partitioned
+from app.repositories.rate_repository import (
+    bulk_insert_exchange_rates,
+    get_latest_rate_for_entity,
+    get_latest_rates_by_currency,
+    get_latest_rates_for_keys,
+    get_rates,
+    insert_exchange_rate,
+    iter_rate_history,
+    iter_rates,
+)
+from app.services import own_office_service
+from app.services.entity_cache import entity_id_cache
+from app.services.rate_service import create_exchange_rates
+from app.services.recommendation_service import (
+    build_market_reports,
+    rank_own_rate,
+    recommend_rate,
+)
+
+
+@pytest.fixture
+def sqlite_conn():
+    conn = connect_sqlite(":memory:")
+    apply_schema(conn)
+    # Cached entity IDs belong to whichever database created them
+    entity_id_cache.clear()
+    yield conn
+    entity_id_cache.clear()
+    conn.close()
+
+
+def _entity(conn, name, source="Valutare", city="Cluj"):
+    [entity_id] = upsert_entities(conn, [Entity(platform_source=source, name=name, city=city, type="exchange_office")]).values()
+    return entity_id
+
+
+def test_entities_are_unique_with_null_cities(sqlite_conn):
+    conn = sqlite_conn
+    bank = Entity(platform_source="BNR", name="Embedded Bank", city=None, type="bank")
+    office = Entity(platform_source="Valutare", name="Embedded Office", city="Iasi", type="exchange_office")
+
+    first = upsert_entities(conn, [bank, office])
+    ids = upsert_entities(conn, [bank, office, bank])
+
+    assert ids == first
+    assert get_entity_id(conn, bank) == first[bank.key]
+    assert insert_entity(conn, office) is None
+    assert conn.execute("SELECT COUNT(*) FROM entities").fetchone()[0] == 2
+
+
+def test_insert_skips_duplicates_and_tracks_latest(sqlite_conn):
+    conn = sqlite_conn
+    entity_id = _entity(conn, "Embedded Latest")
+    older = ExchangeRate(currency="EUR", buy=4.90, sell=4.95, timestamp="2026-08-01 10:00:00")
+    newer = ExchangeRate(currency="EUR", buy=4.92, sell=4.97, timestamp="2026-08-01 12:00:00")
+
+    assert insert_exchange_rate(conn, entity_id, newer) is not None
+    assert insert_exchange_rate(conn, entity_id, older) is not None
+    assert insert_exchange_rate(conn, entity_id, newer) is None
+
+    assert get_latest_rate_for_entity(conn, entity_id, "eur") == {"buy_rate": 4.92, "sell_rate": 4.97}
+    [latest] = get_latest_rates_by_currency(conn, "EUR")
+    assert latest["scraped_at"] == datetime(2026, 8, 1, 12, tzinfo=TIMEZONE)
+    assert [row[7] for row in get_rates(conn, currency="EUR")] == [
+        datetime(2026, 8, 1, 12, tzinfo=TIMEZONE),
+        datetime(2026, 8, 1, 10, tzinfo=TIMEZONE),
+    ]
+
+
+@pytest.mark.parametrize("method", ["copy", "values"])
+def test_bulk_insert_reports_inserted_and_duplicates(sqlite_conn, method):
+    conn = sqlite_conn
+    entity_id = _entity(conn, "Embedded Bulk")
+    first = [(entity_id, ExchangeRate(currency="GBP", buy=5.8, sell=5.9, timestamp=f"2026-08-01 1{h}:00")) for h in range(3)]
+    second = first[1:] + [(entity_id, ExchangeRate(currency="GBP", buy=5.81, sell=5.91, timestamp="2026-08-01 13:00"))]
+
+    assert bulk_insert_exchange_rates(conn, first, method=method) == (3, 0)
+    assert bulk_insert_exchange_rates(conn, second, method=method) == (1, 2)
+    assert get_latest_rates_for_keys(conn, [(entity_id, "gbp"), (entity_id, "USD")]) == {(entity_id, "GBP"): (5.81, 5.91)}
+
+
+def test_current_rates_follow_deletes(sqlite_conn):
+    conn = sqlite_conn
+    entity_id = _entity(conn, "Embedded Current")
+    bulk_insert_exchange_rates(
+        conn,
+        [
+            (entity_id, ExchangeRate(currency="HUF", buy=buy, sell=buy + 0.01, timestamp=f"2026-08-03T{hour}:00"))
+            for buy, hour in [(1.25, 10), (1.27, 12), (1.26, 11)]
+        ],
+    )
+
+    conn.execute("DELETE FROM exchange_rates WHERE buy_micros = 1270000")
+    assert get_latest_rate_for_entity(conn, entity_id, "HUF") == {"buy_rate": 1.26, "sell_rate": 1.27}
+
+    conn.execute("DELETE FROM exchange_rates")
+    assert get_latest_rate_for_entity(conn, entity_id, "HUF") is None
+
+
+def test_interval_mode_extends_unchanged_rates(sqlite_conn):
+    conn = sqlite_conn
+    entity_id = _entity(conn, "Embedded Interval")
+
+    def scrape(buy, hour):
+        return [(entity_id, ExchangeRate(currency="EUR", buy=buy, sell=buy + 0.05, timestamp=f"2026-08-01T{hour}:00"))]
+
+    assert create_exchange_rates(conn, scrape(4.9, 10), mode="interval") == (1, 0)
+    assert create_exchange_rates(conn, scrape(4.9, 11) + scrape(4.9, 12), mode="interval") == (0, 2)
+    assert create_exchange_rates(conn, scrape(4.9, 13) + scrape(4.95, 14), mode="interval") == (1, 1)
+
+    assert [(row[5], row[7].hour, row[8].hour) for row in get_rates(conn)] == [(4.95, 14, 14), (4.9, 10, 13)]
+
+
+def test_unchanged_page_heartbeat_keeps_rates_fresh(sqlite_conn):
+    conn = sqlite_conn
+    entity_id = _entity(conn, "Embedded Heartbeat", source="BNR", city=None)
+    now = datetime.now(TIMEZONE)
+    rate = ExchangeRate(currency="USD", buy=4.5, sell=4.6, timestamp=(now - timedelta(hours=48)).strftime(TIMESTAMP_FORMAT))
+    insert_exchange_rate(conn, entity_id, rate)
+    save_fingerprint(conn, "BNR", "USD", "a" * 64, rate.scraped_at)
+
+    assert get_latest_rates_by_currency(conn, "USD", max_age_hours=24) == []
+
+    touch_fingerprint(conn, "BNR", "USD", now)
+    touch_fingerprint(conn, "BNR", "USD", now - timedelta(hours=30))
+
+    assert get_fingerprints(conn) == {("BNR", "USD"): "a" * 64}
+    assert [r["entity_id"] for r in get_latest_rates_by_currency(conn, "USD", max_age_hours=24)] == [entity_id]
+
+
+def test_iter_rates_filters_and_history_batches(sqlite_conn):
+    conn = sqlite_conn
+    north_id = _entity(conn, "Query Office North", city="Suceava")
+    south_id = _entity(conn, "Query Office South", city="Craiova")
+    bulk_insert_exchange_rates(
+        conn,
+        [
+            (entity_id, ExchangeRate(currency="RSD", buy=0.04 + h / 1000, sell=0.05, timestamp=f"2026-08-06T1{h}:00"))
+            for entity_id in (north_id, south_id)
+            for h in range(5)
+        ],
+    )
+
+    rows = list(iter_rates(conn, itersize=2, currency="rsd", entity="north"))
+    assert [row[7].hour for row in rows] == [14, 13, 12, 11, 10]
+    assert get_rates(conn, currency="rsd", entity="north") == rows
+    window = iter_rates(
+        conn,
+        city="craiova",
+        since=datetime(2026, 8, 6, 11, tzinfo=TIMEZONE),
+        until=datetime(2026, 8, 6, 13, tzinfo=TIMEZONE),
+    )
+    assert [(row[3], row[7].hour) for row in window] == [("Craiova", 12), ("Craiova", 11)]
+    assert len(list(iter_rates(conn, limit=3))) == 3
+
+    start = datetime(2026, 8, 6, tzinfo=TIMEZONE)
+    batches = list(iter_rate_history(conn, start, start + timedelta(days=1), batch_rows=4))
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    first_scraped = min(row[7] for batch in batches for row in batch)
+    assert first_scraped == int(datetime(2026, 8, 6, 10, tzinfo=TIMEZONE).timestamp()) * 1_000_000
+
+
+def test_recommendations_run_on_the_embedded_backend(sqlite_conn, monkeypatch):
+    monkeypatch.setattr(own_office_service, "OWN_OFFICE_NAME", "Embedded Own Office")
+    conn = sqlite_conn
+    now = datetime.now(TIMEZONE).strftime(TIMESTAMP_FORMAT)
+    competitors = [_entity(conn, f"Competitor {i}") for i in range(3)]
+    bulk_insert_exchange_rates(
+        conn,
+        [
+            (entity_id, ExchangeRate(currency="EUR", buy=4.90 + i / 100, sell=5.00 + i / 100, timestamp=now))
+            for i, entity_id in enumerate(competitors)
+        ],
+    )
+
+    recommendation = recommend_rate(conn, "EUR", strategy="match_average")
+    assert (recommendation.recommended_buy, recommendation.recommended_sell) == (4.91, 5.01)
+    ranking = rank_own_rate(conn, "EUR")
+    assert ranking.total_competitors == 3
+    assert ranking.own_buy is None
+
+    [report] = build_market_reports(conn, strategy="match_average")
+    assert (report.recommendation, report.ranking) == (recommendation, ranking)
+
+
+def test_get_connection_selects_sqlite_by_url(tmp_path, monkeypatch):
+    monkeypatch.setattr(connection, "DATABASE_URL", f"sqlite:///{tmp_path / 'market_watch.db'}")
+    try:
+        with connection.get_connection() as conn:
+            apply_schema(conn)
+            assert not is_partitioned(conn)
+            with pytest.raises(ValueError, match="PostgreSQL only"):
+                apply_migration(conn, "003_rebuild_current_rates")
+    finally:
+        connection.close_pool()
+    assert (tmp_path / "market_watch.db").exists()
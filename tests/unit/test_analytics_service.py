@@ -0,0 +1,89 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.core.config import TIMEZONE
+from app.services.analytics_service import (
+    entity_coverage,
+    load_history,
+    source_volatility,
+    spreads_over_time,
+)
+from app.services.export_service import _open_writer, export_path, history_schema
+
+pa = pytest.importorskip("pyarrow")
+
+
+def _history(rows):
+    return pa.Table.from_pylist(
+        [
+            {
+                "entity_id": entity_id,
+                "platform_source": source,
+                "name": f"Office {entity_id}",
+                "city": None,
+                "currency": currency,
+                "buy_rate": buy,
+                "sell_rate": sell,
+                "scraped_at": datetime(2026, 8, day, hour, tzinfo=TIMEZONE),
+                "last_seen_at": None,
+            }
+            for entity_id, source, currency, buy, sell, day, hour in rows
+        ],
+        schema=history_schema(),
+    )
+
+
+HISTORY = _history(
+    [
+        (1, "BNR", "EUR", 4.90, 5.00, 1, 10),
+        (1, "BNR", "EUR", 4.95, 5.05, 1, 12),
+        (2, "Valutare", "EUR", 4.92, 4.96, 1, 23),
+        (2, "Valutare", "EUR", 4.92, 4.96, 3, 9),
+        (2, "Valutare", "USD", 4.40, 4.50, 3, 9),
+    ]
+)
+
+
+def test_spreads_are_bucketed_by_local_day():
+    spreads = spreads_over_time(HISTORY).to_pylist()
+
+    assert [(row["currency"], row["bucket"].date(), row["samples"]) for row in spreads] == [
+        ("EUR", date(2026, 8, 1), 3),
+        ("EUR", date(2026, 8, 3), 1),
+        ("USD", date(2026, 8, 3), 1),
+    ]
+    assert spreads[0]["min_spread"] == pytest.approx(0.04)
+    assert spreads[0]["max_spread"] == pytest.approx(0.10)
+    assert spreads[0]["avg_spread"] == pytest.approx(0.08)
+
+
+def test_volatility_only_compares_rates_of_the_same_entity_and_currency():
+    volatility = {(row["platform_source"], row["currency"]): row for row in source_volatility(HISTORY).to_pylist()}
+
+    assert set(volatility) == {("BNR", "EUR"), ("Valutare", "EUR")}
+    assert volatility[("BNR", "EUR")]["changes"] == 1
+    assert volatility[("BNR", "EUR")]["buy_volatility"] == 0.0
+    assert volatility[("Valutare", "EUR")]["sell_volatility"] == 0.0
+
+
+def test_coverage_counts_days_with_data_over_the_history_span():
+    coverage = {(row["entity_id"], row["currency"]): row for row in entity_coverage(HISTORY).to_pylist()}
+
+    assert coverage[(1, "EUR")]["days_seen"] == 1
+    assert coverage[(1, "EUR")]["coverage"] == pytest.approx(1 / 3)
+    assert coverage[(2, "EUR")]["samples"] == 2
+    assert coverage[(2, "EUR")]["coverage"] == pytest.approx(2 / 3)
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_load_history_filters_files_by_currency_and_month(tmp_path, fmt):
+    for currency, month in [("EUR", date(2026, 7, 1)), ("EUR", date(2026, 8, 1)), ("USD", date(2026, 8, 1))]:
+        writer = _open_writer(export_path(tmp_path, currency, month, fmt), history_schema(), fmt)
+        writer.write_table(HISTORY.filter(pa.compute.equal(HISTORY["currency"], currency)))
+        writer.close()
+
+    assert load_history(tmp_path).num_rows == 9
+    assert load_history(tmp_path, currencies=["usd"]).num_rows == 1
+    assert load_history(tmp_path, currencies=["EUR"], since=date(2026, 8, 15)).num_rows == 4
+    assert load_history(tmp_path / "missing").num_rows == 0
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from app.scrapers import bnr_scraper
+from app.scrapers.orchestrator import ScraperSource
+from app.services import async_pipeline_service
+
+BNR_HTML = (Path(__file__).parent.parent / "fixtures" / "bnr_eur.html").read_text(encoding="utf-8")
+
+
+def _source(name, currencies, fetch_html=None, parse_html=None, scrape_currency=None, max_workers=3, timeout=5.0):
+    return ScraperSource(
+        name=name,
+        scrape_currency=scrape_currency or (lambda currency, fetch_mode=None: []),
+        currencies=currencies,
+        max_workers=max_workers,
+        timeout=timeout,
+        fetch_html=fetch_html,
+        parse_html=parse_html,
+    )
+
+
+def _run(sources, stored_chunks, store_delay=0.0, **kwargs):
+    def store(records):
+        time.sleep(store_delay)
+        stored_chunks.append(records)
+        return len(records)
+
+    with patch.object(async_pipeline_service, "store_chunk", side_effect=store):
+        return asyncio.run(async_pipeline_service.run_pipeline(sources, parse_workers=0, fetch_mode="http", **kwargs))
+
+
+def test_pages_are_written_while_others_still_download():
+    delays = {"EUR": 0.1, "USD": 0.2, "GBP": 0.3, "CHF": 0.4, "HUF": 0.5, "PLN": 0.6}
+
+    def fetch(currency):
+        time.sleep(delays[currency])
+        return f"<{currency}>"
+
+    def parse(html, currency, timestamp=None):
+        return [currency]
+
+    chunks = []
+    start = time.monotonic()
+    stored = _run(
+        [_source("A", ["EUR", "USD", "GBP"], fetch, parse), _source("B", ["CHF", "HUF", "PLN"], fetch, parse)],
+        chunks,
+        store_delay=0.1,
+        chunk_size=1,
+    )
+    elapsed = time.monotonic() - start
+
+    # Writing only after the slowest download would take 0.6 + 6 * 0.1s
+    assert elapsed < 0.95
+    assert stored == 6
+    assert chunks == [["EUR"], ["USD"], ["GBP"], ["CHF"], ["HUF"], ["PLN"]]
+
+
+def test_chunk_is_written_once_its_oldest_page_is_too_old():
+    delays = {"EUR": 0.05, "USD": 0.6}
+
+    def fetch(currency):
+        time.sleep(delays[currency])
+        return f"<{currency}>"
+
+    written_at = []
+    start = time.monotonic()
+
+    def store(records):
+        written_at.append(time.monotonic() - start)
+        return len(records)
+
+    with patch.object(async_pipeline_service, "store_chunk", side_effect=store):
+        stored = asyncio.run(
+            async_pipeline_service.run_pipeline(
+                [_source("A", ["EUR", "USD"], fetch, lambda html, currency, timestamp=None: [currency])],
+                chunk_size=100,
+                chunk_max_age=0.1,
+                parse_workers=0,
+                fetch_mode="http",
+            )
+        )
+
+    assert stored == 2
+    assert len(written_at) == 2
+    assert written_at[0] < 0.45
+
+
+def test_http_failure_falls_back_to_the_source_scrape():
+    calls = []
+
+    def fetch(currency):
+        raise requests.ConnectionError("refused")
+
+    def scrape(currency, fetch_mode=None):
+        calls.append((currency, fetch_mode))
+        return [currency]
+
+    chunks = []
+    stored = _run([_source("A", ["EUR"], fetch, lambda *a, **k: [], scrape_currency=scrape)], chunks)
+
+    assert calls == [("EUR", "selenium")]
+    assert stored == 1
+
+
+def test_timed_out_and_failed_pages_are_skipped():
+    release = threading.Event()
+
+    def scrape(currency, fetch_mode=None):
+        if currency == "USD":
+            release.wait(2)
+        if currency == "GBP":
+            raise RuntimeError("boom")
+        return [currency]
+
+    chunks = []
+    start = time.monotonic()
+    stored = _run([_source("A", ["EUR", "USD", "GBP"], scrape_currency=scrape, timeout=0.3)], chunks)
+    release.set()
+
+    assert time.monotonic() - start < 1.0
+    assert chunks == [["EUR"]]
+    assert stored == 1
+
+
+def test_pages_are_parsed_in_worker_processes(isolated_archive):
+    chunks = []
+    with patch.object(async_pipeline_service, "store_chunk", side_effect=lambda records: chunks.append(records) or len(records)):
+        stored = asyncio.run(
+            async_pipeline_service.run_pipeline(
+                [_source("BNR", ["EUR"], lambda currency: BNR_HTML, bnr_scraper.parse_html)],
+                parse_workers=1,
+                fetch_mode="http",
+            )
+        )
+
+    assert stored == len(chunks[0]) > 0
+    assert {record.rate.currency for record in chunks[0]} == {"EUR"}
+    assert len(list((isolated_archive / "objects").rglob("*.gz"))) == 1
@@ -0,0 +1,37 @@
+from app.models.entity import Entity
+from app.models.exchange_rate import ExchangeRate
+from app.models.scraped_record import ScrapedRecord
+from app.services.change_detection_service import group_by_page, page_fingerprint
+
+
+def _record(name, buy, sell, currency="EUR", source="BNR", timestamp="2026-08-01T10:00"):
+    return ScrapedRecord(
+        entity=Entity(platform_source=source, name=name, city=None, type="bank"),
+        rate=ExchangeRate(currency=currency, buy=buy, sell=sell, timestamp=timestamp),
+    )
+
+
+def test_fingerprint_ignores_timestamp_and_row_order():
+    first = [_record("BT", 4.92, 4.98), _record("BCR", 4.91, 4.99)]
+    later = [
+        _record("BCR", 4.91, 4.99, timestamp="2026-08-01T10:05"),
+        _record("BT", 4.92, 4.98, timestamp="2026-08-01T10:05"),
+    ]
+
+    assert page_fingerprint(first) == page_fingerprint(later)
+
+
+def test_fingerprint_changes_when_a_rate_moves():
+    before = [_record("BT", 4.92, 4.98), _record("BCR", 4.91, 4.99)]
+    after = [_record("BT", 4.92, 4.98), _record("BCR", 4.91, 4.995)]
+
+    assert page_fingerprint(before) != page_fingerprint(after)
+
+
+def test_group_by_page():
+    records = [_record("BT", 4.92, 4.98), _record("BT", 4.5, 4.6, currency="USD"), _record("BCR", 4.91, 4.99)]
+
+    pages = group_by_page(records)
+
+    assert sorted(pages) == [("BNR", "EUR"), ("BNR", "USD")]
+    assert len(pages[("BNR", "EUR")]) == 2
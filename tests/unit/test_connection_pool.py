@@ -0,0 +1,127 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+from psycopg2.pool import PoolError
+
+from app.database import connection
+from app.database import pool as pool_module
+from app.database.pool import ConnectionPool
+
+
+def _fake_conn(status=psycopg2.extensions.TRANSACTION_STATUS_IDLE):
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = status
+    return conn
+
+
+@pytest.fixture
+def connect():
+    with patch.object(pool_module.psycopg2, "connect", side_effect=lambda *a, **k: _fake_conn()) as connect:
+        yield connect
+
+
+def test_checkout_blocks_until_a_connection_is_returned(connect):
+    pool = ConnectionPool("dsn", minconn=1, maxconn=1, timeout=2)
+    first = pool.getconn()
+    threading.Timer(0.2, pool.putconn, args=(first,)).start()
+
+    second = pool.getconn()
+
+    assert second is first
+    assert connect.call_count == 1
+    stats = pool.stats()
+    assert stats.checkouts == 2
+    assert stats.max_wait >= 0.15
+    assert stats.max_held >= 0.15
+
+
+def test_checkout_times_out_when_pool_is_exhausted(connect):
+    pool = ConnectionPool("dsn", minconn=0, maxconn=1, timeout=0.1)
+    pool.getconn()
+
+    with pytest.raises(PoolError):
+        pool.getconn()
+    assert pool.stats().timeouts == 1
+
+
+def test_returned_connection_is_rolled_back(connect):
+    pool = ConnectionPool("dsn", minconn=0, maxconn=1)
+    conn = pool.getconn()
+    conn.get_transaction_status.return_value = psycopg2.extensions.TRANSACTION_STATUS_INERROR
+
+    pool.putconn(conn)
+
+    conn.rollback.assert_called_once()
+    assert pool.getconn() is conn
+
+
+def test_stale_idle_connection_is_replaced(connect):
+    pool = ConnectionPool("dsn", minconn=1, maxconn=1, validate_idle_seconds=0)
+    stale = pool.getconn()
+    stale.cursor.return_value.__enter__.return_value.execute.side_effect = psycopg2.OperationalError("gone")
+    pool.putconn(stale)
+
+    fresh = pool.getconn()
+
+    assert fresh is not stale
+    stale.close.assert_called_once()
+    assert pool.stats().reconnects == 1
+
+
+def test_closed_connection_is_dropped_on_return(connect):
+    pool = ConnectionPool("dsn", minconn=0, maxconn=2)
+    conn = pool.getconn()
+    conn.closed = 2
+
+    pool.putconn(conn)
+
+    stats = pool.stats()
+    assert (stats.size, stats.idle) == (0, 0)
+    assert pool.getconn() is not conn
+
+
+def test_concurrent_checkouts_never_exceed_maxconn(connect):
+    pool = ConnectionPool("dsn", minconn=0, maxconn=3, timeout=5)
+    in_use, peak, lock = set(), [0], threading.Lock()
+
+    def worker():
+        for _ in range(20):
+            conn = pool.getconn()
+            with lock:
+                assert conn not in in_use
+                in_use.add(conn)
+                peak[0] = max(peak[0], len(in_use))
+            time.sleep(0.001)
+            with lock:
+                in_use.discard(conn)
+            pool.putconn(conn)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] <= 3
+    assert connect.call_count <= 3
+    assert pool.stats().checkouts == 160
+
+
+def test_sqlite_connection_is_rolled_back_on_release(tmp_path, monkeypatch):
+    monkeypatch.setattr(connection, "DATABASE_URL", f"sqlite:///{tmp_path / 'rates.db'}")
+    monkeypatch.setattr(connection, "_sqlite_conn", None)
+    with connection.get_connection() as conn:
+        conn.execute("CREATE TABLE notes (body TEXT)")
+        conn.commit()
+        conn.execute("INSERT INTO notes VALUES ('uncommitted')")
+
+    try:
+        with connection.get_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM notes").fetchone() == (0,)
+    finally:
+        connection.close_pool()
@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock, patch
+
+from app.core.config import (
+    DRIVER_PAGE_LOAD_TIMEOUT_SECONDS,
+    DRIVER_SCRIPT_TIMEOUT_SECONDS,
+)
+from app.scrapers import driver as driver_module
+from app.scrapers.driver import apply_resource_blocking, blocked_patterns, get_driver
+
+
+def test_blocked_patterns_honour_source_allowlist():
+    valutare = blocked_patterns("Valutare")
+    bnr = blocked_patterns("BNR")
+
+    assert "*.css" not in valutare
+    assert "*.css" in bnr
+    assert "*.png" in valutare
+    assert "*googletagmanager.com*" in bnr
+
+
+def test_apply_resource_blocking_sets_devtools_blocklist():
+    driver = MagicMock()
+
+    apply_resource_blocking(driver, "BNR", block_resources=True)
+
+    driver.execute_cdp_cmd.assert_any_call("Network.enable", {})
+    driver.execute_cdp_cmd.assert_called_with("Network.setBlockedURLs", {"urls": blocked_patterns("BNR")})
+
+
+def test_apply_resource_blocking_clears_blocklist_when_disabled():
+    driver = MagicMock()
+
+    apply_resource_blocking(driver, "BNR", block_resources=False)
+
+    driver.execute_cdp_cmd.assert_called_with("Network.setBlockedURLs", {"urls": []})
+
+
+def test_new_drivers_time_out_hung_page_loads():
+    with patch.object(driver_module.webdriver, "Chrome") as chrome:
+        driver = get_driver()
+
+    driver.set_page_load_timeout.assert_called_once_with(DRIVER_PAGE_LOAD_TIMEOUT_SECONDS)
+    driver.set_script_timeout.assert_called_once_with(DRIVER_SCRIPT_TIMEOUT_SECONDS)
+    assert driver is chrome.return_value
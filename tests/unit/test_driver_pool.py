@@ -0,0 +1,143 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from app.scrapers import driver_pool
+from app.scrapers.driver_pool import DriverPool, driver_session, install_pool
+
+
+def _fake_driver(heap_bytes=10 * 1024 * 1024):
+    driver = MagicMock()
+    driver.execute_script.side_effect = lambda script: 1 if script == "return 1;" else heap_bytes
+    return driver
+
+
+def test_pool_reuses_warm_driver():
+    factory = MagicMock(side_effect=lambda: _fake_driver())
+    pool = DriverPool(size=1, factory=factory)
+
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as second:
+        pass
+
+    assert first is second
+    assert factory.call_count == 1
+    first.quit.assert_not_called()
+
+
+def test_pool_recycles_after_max_uses():
+    factory = MagicMock(side_effect=lambda: _fake_driver())
+    pool = DriverPool(size=1, max_uses=2, factory=factory)
+
+    drivers = []
+    for _ in range(3):
+        with pool.acquire() as driver:
+            drivers.append(driver)
+
+    assert drivers[0] is drivers[1]
+    assert drivers[2] is not drivers[0]
+    drivers[0].quit.assert_called_once()
+
+
+def test_pool_recycles_on_memory_growth():
+    factory = MagicMock(side_effect=lambda: _fake_driver(heap_bytes=900 * 1024 * 1024))
+    pool = DriverPool(size=1, max_heap_mb=512, factory=factory)
+
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as second:
+        pass
+
+    assert first is not second
+    first.quit.assert_called_once()
+
+
+def test_pool_replaces_unhealthy_driver_on_checkout():
+    factory = MagicMock(side_effect=lambda: _fake_driver())
+    pool = DriverPool(size=1, factory=factory)
+
+    with pool.acquire() as first:
+        pass
+    first.execute_script.side_effect = WebDriverException("chrome not reachable")
+
+    with pool.acquire() as second:
+        pass
+
+    assert second is not first
+    first.quit.assert_called_once()
+
+
+def test_pool_discards_driver_when_caller_raises():
+    pool = DriverPool(size=1, factory=lambda: _fake_driver())
+
+    with pytest.raises(RuntimeError), pool.acquire() as driver:
+        raise RuntimeError("page crashed")
+
+    driver.quit.assert_called_once()
+
+
+def test_pool_times_out_when_exhausted():
+    pool = DriverPool(size=1, factory=lambda: _fake_driver())
+
+    with pool.acquire(), pytest.raises(TimeoutError), pool.acquire(timeout=0.01):
+        pass
+
+
+def test_pool_blocks_until_a_slot_is_free():
+    factory = MagicMock(side_effect=lambda: _fake_driver())
+    pool = DriverPool(size=1, factory=factory)
+    in_use, errors, lock = [], [], threading.Lock()
+
+    def worker():
+        try:
+            for _ in range(5):
+                with pool.acquire() as driver:
+                    with lock:
+                        in_use.append(driver)
+                        assert len(in_use) == 1
+                    time.sleep(0.001)
+                    with lock:
+                        in_use.remove(driver)
+        except Exception as e:  # noqa: BLE001
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert factory.call_count == 1
+
+
+def test_driver_session_uses_installed_pool(monkeypatch):
+    monkeypatch.setattr(driver_pool, "get_driver", MagicMock(side_effect=AssertionError("cold start")))
+    pool = DriverPool(size=1, factory=lambda: _fake_driver())
+    install_pool(pool)
+    try:
+        with driver_session() as first:
+            pass
+        with driver_session() as second:
+            pass
+    finally:
+        install_pool(None)
+
+    assert first is second
+
+
+def test_driver_session_gives_up_when_every_browser_is_busy():
+    pool = DriverPool(size=1, factory=lambda: _fake_driver(), acquire_timeout=0.05)
+    install_pool(pool)
+    try:
+        started = time.monotonic()
+        with pool.acquire(), pytest.raises(TimeoutError), driver_session():
+            pass
+    finally:
+        install_pool(None)
+
+    assert time.monotonic() - started < 1
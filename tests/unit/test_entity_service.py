@@ -0,0 +1,39 @@
+from unittest.mock import MagicMock, patch
+
+from app.models.entity import Entity
+from app.services import entity_service
+from app.services.entity_cache import EntityIdCache
+
+
+def _entity(name, city=None):
+    return Entity(platform_source="Valutare", name=name, city=city, type="exchange_office")
+
+
+def test_cache_evicts_least_recently_used():
+    cache = EntityIdCache(maxsize=2)
+    cache.put(("a",), 1)
+    cache.put(("b",), 2)
+    cache.get(("a",))
+    cache.put(("c",), 3)
+
+    assert cache.get(("a",)) == 1
+    assert cache.get(("b",)) is None
+    assert cache.get(("c",)) == 3
+
+
+def test_resolve_entity_ids_upserts_only_cache_misses():
+    cache = EntityIdCache()
+    lux, express = _entity("Lux", "Bucuresti"), _entity("Express", "Cluj")
+    cache.put(lux.key, 7)
+
+    with (
+        patch.object(entity_service, "entity_id_cache", cache),
+        patch.object(entity_service, "upsert_entities", return_value={express.key: 8}) as upsert,
+    ):
+        conn = MagicMock()
+        ids = entity_service.resolve_entity_ids(conn, [lux, express, lux, express])
+        again = entity_service.resolve_entity_ids(conn, [lux, express])
+
+    upsert.assert_called_once_with(conn, [express])
+    assert ids == {lux.key: 7, express.key: 8}
+    assert again == ids
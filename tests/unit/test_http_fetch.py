@@ -0,0 +1,111 @@
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.scrapers import bnr_scraper, valutare_scraper
+from app.scrapers.http_client import fetch_html
+
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def fixture_server():
+    """Serve tests/fixtures over HTTP on a free local port."""
+    handler = partial(_QuietHandler, directory=str(FIXTURES_DIR))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_html_decodes_utf8(fixture_server):
+    html = fetch_html(f"{fixture_server}/bnr_eur.html")
+    assert "Cumpărare" in html
+
+
+def test_scrape_bnr_over_http(fixture_server):
+    with (
+        patch.object(bnr_scraper, "BNR_HTTP_URL", f"{fixture_server}/bnr_{{}}.html"),
+        patch.object(bnr_scraper, "CURRENCIES", ["eur"]),
+        patch.object(bnr_scraper, "scrape_bnr_selenium") as selenium,
+    ):
+        records = bnr_scraper.scrape_bnr(fetch_mode="http")
+
+    selenium.assert_not_called()
+    assert [r.entity.name for r in records] == ["Banca Transilvania", "BCR"]
+    assert records[0].rate.buy == 4.9200
+
+
+def test_scrape_valutare_over_http(fixture_server):
+    with (
+        patch.object(valutare_scraper, "VALUTARE_URL", f"{fixture_server}/valutare_{{}}.html"),
+        patch.object(valutare_scraper, "CURRENCIES", ["EUR"]),
+        patch.object(valutare_scraper, "scrape_valutare_selenium") as selenium,
+    ):
+        records = valutare_scraper.scrape_valutare(fetch_mode="http")
+
+    selenium.assert_not_called()
+    assert [r.entity.city for r in records] == ["Bucuresti", "Cluj-Napoca"]
+    assert records[1].rate.sell == 4.9750
+
+
+def test_scrape_valutare_falls_back_to_selenium(fixture_server):
+    # USD has no fixture, so the HTTP fetch 404s and Selenium takes over
+    with (
+        patch.object(valutare_scraper, "VALUTARE_URL", f"{fixture_server}/valutare_{{}}.html"),
+        patch.object(valutare_scraper, "CURRENCIES", ["EUR", "USD"]),
+        patch.object(valutare_scraper, "scrape_valutare_selenium", return_value=["fallback"]) as selenium,
+    ):
+        records = valutare_scraper.scrape_valutare(fetch_mode="http")
+
+    # Only the page that failed over HTTP goes to the browser
+    selenium.assert_called_once_with("USD")
+    assert [r.entity.city for r in records[:2]] == ["Bucuresti", "Cluj-Napoca"]
+    assert records[2:] == ["fallback"]
+
+
+def test_bnr_rejects_page_showing_other_currency():
+    html = '<select id="c1"><option value="EUR" selected>EUR</option><option value="USD">USD</option></select>'
+    with patch.object(bnr_scraper, "fetch_html", return_value=html), pytest.raises(ValueError):
+        bnr_scraper.fetch_page_source_http("USD")
+
+
+def test_bnr_page_without_currency_falls_back_to_selenium(caplog):
+    html = "<table><tr><td>BCR</td><td>4,9150</td><td>4,9900</td></tr></table>"
+    with patch.object(bnr_scraper, "fetch_html", return_value=html), pytest.raises(ValueError):
+        bnr_scraper.fetch_page_source_http("USD")
+
+    with (
+        patch.object(bnr_scraper, "fetch_html", return_value=html),
+        patch.object(bnr_scraper, "scrape_bnr_selenium", return_value=["fallback"]) as selenium,
+    ):
+        records = bnr_scraper.scrape_bnr_currency("USD", fetch_mode="http")
+
+    selenium.assert_called_once_with("USD")
+    assert records == ["fallback"]
+    [warning] = [r for r in caplog.records if r.name == "app.scrapers.http_client"]
+    assert warning.levelname == "WARNING" and "BNR USD HTTP fetch failed" in warning.getMessage()
+    assert warning.exc_info[0] is ValueError
+
+
+def test_selenium_mode_skips_the_http_fetch():
+    with (
+        patch.object(bnr_scraper, "fetch_html") as fetch,
+        patch.object(bnr_scraper, "scrape_bnr_selenium", return_value=["browser"]) as selenium,
+    ):
+        records = bnr_scraper.scrape_bnr_currency("EUR", fetch_mode="selenium")
+
+    fetch.assert_not_called()
+    selenium.assert_called_once_with("EUR")
+    assert records == ["browser"]
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from app.services.market_stats_service import describe_rates
+
+
+def test_describe_rates_summarises_both_sides():
+    buy = [4.90, 4.91, 4.92, 4.93, 4.94, 4.95, 4.96, 4.97, 4.98, 4.99]
+    sell = [5.10, 5.09, 5.08, 5.07, 5.06, 5.05, 5.04, 5.03, 5.02, 5.01]
+
+    buy_stats, sell_stats = describe_rates(buy, sell, percentiles=(25, 75), trim=0.1)
+
+    assert buy_stats.median == 4.945
+    assert sell_stats.median == 5.055
+    assert buy_stats.percentiles == {25.0: round(float(np.percentile(buy, 25)), 4), 75.0: 4.9675}
+    assert buy_stats.trimmed_mean == round(float(np.mean(buy[1:-1])), 4)
+    assert buy_stats.winsorized_mean == round(float(np.mean([4.91, *buy[1:-1], 4.98])), 4)
+    assert buy_stats.iqr == round(4.9675 - 4.9225, 4)
+    assert sell_stats.std == round(float(np.std(sell)), 4)
+
+
+def test_robust_statistics_ignore_a_fat_fingered_rate():
+    buy = [4.95, 4.96, 4.97, 4.98, 49.7]
+
+    buy_stats, _ = describe_rates(buy, [5.0] * 5, trim=0.2)
+
+    assert buy_stats.median == 4.97
+    assert buy_stats.trimmed_mean == 4.97
+    assert buy_stats.mad == 0.01
+    assert buy_stats.std > 10
+
+
+def test_describe_rates_rejects_bad_input():
+    with pytest.raises(ValueError):
+        describe_rates([], [])
+    with pytest.raises(ValueError):
+        describe_rates([4.9], [5.0], trim=0.5)
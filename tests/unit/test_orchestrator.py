@@ -0,0 +1,102 @@
+import threading
+import time
+
+from app.scrapers.orchestrator import ScraperSource, iter_sources, run_sources
+
+
+def _source(name, scrape_currency, currencies, max_workers=3, timeout=5.0):
+    return ScraperSource(
+        name=name,
+        scrape_currency=scrape_currency,
+        currencies=currencies,
+        max_workers=max_workers,
+        timeout=timeout,
+    )
+
+
+def test_run_sources_runs_pages_in_parallel():
+    def slow_page(currency):
+        time.sleep(0.2)
+        return [currency]
+
+    start = time.monotonic()
+    results = run_sources(
+        [
+            _source("A", slow_page, ["EUR", "USD", "GBP"]),
+            _source("B", slow_page, ["EUR", "USD", "GBP"]),
+        ]
+    )
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.6  # sequential would take 1.2s
+    assert sorted((r.source, r.currency) for r in results if r.records) == [
+        ("A", "EUR"), ("A", "GBP"), ("A", "USD"), ("B", "EUR"), ("B", "GBP"), ("B", "USD")
+    ]
+
+
+def test_run_sources_respects_per_source_worker_limit():
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def page(currency):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return [currency]
+
+    run_sources([_source("A", page, ["EUR", "USD", "GBP", "CHF"], max_workers=2)])
+
+    assert peak == 2
+
+
+def test_run_sources_keeps_results_when_a_worker_fails_or_times_out():
+    release = threading.Event()
+
+    def flaky_page(currency):
+        if currency == "USD":
+            raise RuntimeError("table not found")
+        if currency == "GBP":
+            release.wait(2)
+        return [currency]
+
+    try:
+        results = run_sources([_source("A", flaky_page, ["EUR", "USD", "GBP"], timeout=0.3)])
+    finally:
+        release.set()
+
+    by_currency = {r.currency: r for r in results}
+    assert by_currency["EUR"].records == ["EUR"]
+    assert by_currency["EUR"].error is None
+    assert by_currency["USD"].error == "table not found"
+    assert "timed out" in by_currency["GBP"].error
+
+
+def test_iter_sources_yields_pages_while_another_source_stalls():
+    release = threading.Event()
+
+    def stalled_page(currency):
+        release.wait(2)
+        return [currency]
+
+    start = time.monotonic()
+    arrivals = []
+    try:
+        for result in iter_sources(
+            [
+                _source("Stalled", stalled_page, ["EUR"], timeout=0.5),
+                _source("Fast", lambda currency: [currency], ["EUR", "USD"]),
+            ]
+        ):
+            arrivals.append((result.source, result.error is None, time.monotonic() - start))
+    finally:
+        release.set()
+
+    fast = [elapsed for source, ok, elapsed in arrivals if source == "Fast" and ok]
+    assert len(fast) == 2
+    assert max(fast) < 0.3
+    assert arrivals[-1][:2] == ("Stalled", False)
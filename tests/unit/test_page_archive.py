@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+from app.repositories.page_archive import archive_page, iter_entries, load_payload
+from app.scrapers import bnr_scraper, valutare_scraper
+from app.services.replay_service import reparse_entry, replay
+
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+
+
+def test_archive_stores_identical_pages_once(isolated_archive):
+    first = archive_page("BNR", "EUR", "2026-08-01T10:00", "<table>ă</table>")
+    second = archive_page("BNR", "EUR", "2026-08-01T10:05", "<table>ă</table>")
+
+    assert first == second
+    assert len(list((isolated_archive / "objects").rglob("*.gz"))) == 1
+    assert load_payload(first) == "<table>ă</table>"
+
+
+def test_iter_entries_filters_by_date_range_and_source():
+    archive_page("BNR", "EUR", "2026-08-01T23:55", "a")
+    archive_page("Valutare", "EUR", "2026-08-02T00:05", "b")
+    archive_page("BNR", "USD", "2026-08-02T00:00", "c")
+    archive_page("BNR", "EUR", "2026-08-03T00:00", "d")
+
+    entries = list(iter_entries(date(2026, 8, 1), date(2026, 8, 2), source="BNR"))
+
+    assert [(e["currency"], e["timestamp"]) for e in entries] == [
+        ("EUR", "2026-08-01T23:55"),
+        ("USD", "2026-08-02T00:00"),
+    ]
+
+
+def test_replay_reparses_archived_pages_with_original_timestamps():
+    html = (FIXTURES_DIR / "valutare_eur.html").read_text(encoding="utf-8")
+    archive_page("Valutare", "EUR", "2026-08-01T10:00", html)
+    archive_page("Valutare", "USD", "2026-08-01T10:00", '[["Casa Nord", "Iasi", "4.5 RON", "4.6 RON"]]', kind="rows")
+
+    summary = replay(date(2026, 8, 1), date(2026, 8, 1), workers=2, store=False)
+
+    assert summary.pages == 2
+    assert summary.records == 3
+
+
+def test_reparse_entry_stamps_records_with_scrape_time():
+    html = (FIXTURES_DIR / "bnr_eur.html").read_text(encoding="utf-8")
+    archive_page("BNR", "EUR", "2026-08-01T10:00", html)
+    [entry] = iter_entries(date(2026, 8, 1), date(2026, 8, 1))
+
+    records = reparse_entry(entry)
+
+    assert [r.rate.timestamp for r in records] == ["2026-08-01T10:00", "2026-08-01T10:00"]
+
+
+def test_only_pages_with_records_are_archived():
+    html = (FIXTURES_DIR / "bnr_eur.html").read_text(encoding="utf-8")
+
+    assert bnr_scraper.records_from_html("<table></table>", "USD") == []
+    assert valutare_scraper.records_from_html("<div></div>", "USD") == []
+    assert valutare_scraper.records_from_rows([], "USD") == []
+    assert bnr_scraper.records_from_html(html, "EUR")
+
+    today = date.today()
+    entries = iter_entries(today - timedelta(days=1), today + timedelta(days=1))
+    assert [(e["source"], e["currency"]) for e in entries] == [("BNR", "EUR")]
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+from app.scrapers import bnr_scraper, valutare_scraper
+
+pytest.importorskip("lxml")
+
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+
+
+def _normalized(records):
+    return [(r.entity, r.rate.currency, r.rate.buy, r.rate.sell) for r in records]
+
+
+@pytest.mark.parametrize(
+    ("parse_html", "fixture"),
+    [
+        (bnr_scraper.parse_html, "bnr_eur.html"),
+        (valutare_scraper.parse_html, "valutare_eur.html"),
+    ],
+)
+def test_lxml_backend_matches_bs4_on_fixtures(parse_html, fixture):
+    html = (FIXTURES_DIR / fixture).read_text(encoding="utf-8")
+
+    bs4_records = parse_html(html, "EUR", backend="bs4")
+    lxml_records = parse_html(html, "EUR", backend="lxml")
+
+    assert len(bs4_records) == 2
+    assert _normalized(lxml_records) == _normalized(bs4_records)
+
+
+def test_lxml_backend_matches_bs4_on_irregular_markup():
+    html = """
+    <div class="exchangegrid">
+      <div class="exchange-row featured">
+        <div class="exchange-name-txt"><a href="#">Casa <b>Nord</b></a><!-- promo --></div>
+        <div class="oras">Iasi&nbsp;</div>
+        <div class="rates"><span class="buy-rate">4,9400 RON</span><span class="sell-rate">4,9800 RON</span></div>
+      </div>
+      <div class="exchange-row"><div class="exchange-name-txt">No Sell</div><div class="buy-rate">4.9</div></div>
+      <div class="exchange-row"><div class="buy-rate">n/a</div><div class="sell-rate">4.9</div></div>
+    </div>
+    """
+
+    bs4_records = valutare_scraper.parse_html(html, "USD", backend="bs4")
+    lxml_records = valutare_scraper.parse_html(html, "USD", backend="lxml")
+
+    assert _normalized(lxml_records) == _normalized(bs4_records)
+    assert [(r.entity.name, r.entity.city, r.rate.buy) for r in lxml_records] == [("CasaNord", "Iasi", 4.94)]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        bnr_scraper.parse_html("<table></table>", "EUR", backend="regex")
@@ -0,0 +1,110 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.config import TIMEZONE
+from app.models.entity import Entity
+from app.models.exchange_rate import ExchangeRate
+from app.models.scraped_record import ScrapedRecord
+from app.services import pipeline_service
+from app.services.change_detection_service import page_fingerprint
+
+
+def _records(currency, buy):
+    return [
+        ScrapedRecord(
+            entity=Entity(platform_source="BNR", name="BT", city=None, type="bank"),
+            rate=ExchangeRate(currency=currency, buy=buy, sell=buy + 0.05, timestamp="2026-08-01T10:00"),
+        )
+    ]
+
+
+@contextmanager
+def _fake_connection(conn):
+    yield conn
+
+
+def test_unchanged_page_only_records_heartbeat():
+    conn = MagicMock()
+    eur = _records("EUR", 4.92)
+    usd = _records("USD", 4.50)
+
+    with (
+        patch.object(pipeline_service, "get_connection", lambda: _fake_connection(conn)),
+        patch.object(pipeline_service, "get_fingerprints", return_value={("BNR", "EUR"): page_fingerprint(eur)}),
+        patch.object(pipeline_service, "touch_fingerprint") as touch,
+        patch.object(pipeline_service, "save_fingerprint") as save,
+        patch.object(pipeline_service, "resolve_entity_ids", return_value={usd[0].entity.key: 1}) as resolve,
+        patch.object(pipeline_service, "validate_rates", side_effect=lambda conn, rates: (rates, [])),
+        patch.object(pipeline_service, "create_exchange_rates", return_value=(1, 0)) as create,
+    ):
+        pipeline_service.process_scraped_data(eur + usd)
+
+    seen_at = datetime(2026, 8, 1, 10, 0, tzinfo=TIMEZONE)
+    touch.assert_called_once_with(conn, "BNR", "EUR", seen_at)
+    save.assert_called_once_with(conn, "BNR", "USD", page_fingerprint(usd), seen_at)
+    resolve.assert_called_once_with(conn, [usd[0].entity])
+    create.assert_called_once_with(conn, [(1, usd[0].rate)])
+    conn.commit.assert_called_once()
+
+
+def test_pages_are_committed_in_chunks_without_splitting_pages():
+    pages = [_records(currency, 4.5) * 2 for currency in ("EUR", "USD", "GBP")]
+    chunks = []
+
+    with patch.object(pipeline_service, "process_scraped_data", side_effect=chunks.append):
+        stored = pipeline_service.process_scraped_pages(iter(pages), chunk_size=3)
+
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+    assert stored == 6
+
+
+def test_chunk_is_committed_once_its_oldest_page_is_too_old():
+    committed_at = []
+
+    def pages():
+        yield _records("EUR", 4.5)
+        time.sleep(0.5)
+        yield _records("USD", 4.5)
+
+    start = time.monotonic()
+    with patch.object(
+        pipeline_service, "process_scraped_data", side_effect=lambda records: committed_at.append(time.monotonic() - start)
+    ):
+        stored = pipeline_service.process_scraped_pages(pages(), chunk_size=100, chunk_max_age=0.1)
+
+    assert stored == 2
+    assert len(committed_at) == 2
+    # The first page was committed while the second was still on its way
+    assert committed_at[0] < 0.4
+
+
+def test_error_from_the_page_source_is_raised():
+    def pages():
+        yield _records("EUR", 4.5)
+        raise RuntimeError("scraper crashed")
+
+    with (
+        patch.object(pipeline_service, "process_scraped_data"),
+        pytest.raises(RuntimeError, match="scraper crashed"),
+    ):
+        pipeline_service.process_scraped_pages(pages())
+
+
+def test_failed_chunk_does_not_stop_later_chunks():
+    pages = [_records(currency, 4.5) for currency in ("EUR", "USD", "GBP")]
+    calls = []
+
+    def flaky_store(records):
+        calls.append(records[0].rate.currency)
+        if len(calls) == 1:
+            raise RuntimeError("connection lost")
+
+    with patch.object(pipeline_service, "process_scraped_data", side_effect=flaky_store):
+        stored = pipeline_service.process_scraped_pages(pages, chunk_size=1)
+
+    assert calls == ["EUR", "USD", "GBP"]
+    assert stored == 2
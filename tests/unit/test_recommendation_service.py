@@ -3,6 +3,7 @@ from unittest.mock import MagicMock, patch
 
 from app.models.recommendation import MarketStats
 from app.services.recommendation_service import (
+    build_market_reports,
     get_market_stats,
     rank_own_rate,
     recommend_rate,
@@ -95,6 +96,68 @@ class TestRecommendationService(unittest.TestCase):
             self.assertEqual(ranking.buy_rank_text, "#2 of 3 on buy")
             self.assertEqual(ranking.sell_rank_text, "#2 of 3 on sell")
 
+    def test_build_market_reports_uses_one_snapshot(self):
+        mock_conn = MagicMock()
+        own = {"platform_source": "Manual", "name": "Own Office", "city": None}
+        comp = {"platform_source": "Valutare", "city": "Cluj"}
+        snapshot = {
+            "EUR": [
+                {**own, "entity_id": 99, "buy_rate": 4.96, "sell_rate": 5.00},
+                {**comp, "entity_id": 1, "name": "Comp A", "buy_rate": 4.98, "sell_rate": 5.02},
+                {**comp, "entity_id": 2, "name": "Comp B", "buy_rate": 4.95, "sell_rate": 4.99},
+            ],
+            "USD": [{**own, "entity_id": 99, "buy_rate": 4.50, "sell_rate": 4.60}],
+        }
+
+        with (
+            patch("app.services.recommendation_service.own_office_entity") as own_office,
+            patch(
+                "app.services.recommendation_service.get_latest_rates_for_currencies", return_value=snapshot
+            ) as get_rates,
+            patch("app.services.recommendation_service.get_latest_rates_by_currency") as get_latest,
+        ):
+            own_office.return_value.key = ("Manual", "Own Office", None)
+            reports = build_market_reports(mock_conn, ["eur", "usd"], strategy="match_average")
+
+            get_rates.assert_called_once_with(mock_conn, ["eur", "usd"], max_age_hours=24.0)
+            get_latest.assert_not_called()
+
+        eur, usd = reports
+        self.assertEqual((eur.stats.best_buy, eur.stats.best_sell, eur.stats.competitor_count), (4.98, 4.99, 2))
+        self.assertEqual((eur.recommendation.recommended_buy, eur.recommendation.recommended_sell), (4.965, 5.005))
+        self.assertEqual((eur.ranking.buy_rank, eur.ranking.sell_rank), (2, 2))
+        self.assertIsNone(eur.error)
+
+        self.assertIsNone(usd.stats)
+        self.assertIsNone(usd.recommendation)
+        self.assertIn("No competitor rate data available for currency 'USD'", usd.error)
+        self.assertEqual((usd.ranking.own_buy, usd.ranking.total_competitors), (4.50, 0))
+
+    def test_percentile_and_median_strategies_resist_outliers(self):
+        mock_conn = MagicMock()
+        mock_rates = [
+            {"entity_id": i, "name": f"Comp {i}", "buy_rate": buy, "sell_rate": sell}
+            for i, (buy, sell) in enumerate(
+                [(4.90, 5.04), (4.92, 5.02), (4.94, 5.00), (4.96, 4.98), (9.40, 0.50)], start=1
+            )
+        ]
+
+        with (
+            patch("app.services.recommendation_service.get_own_office_entity_id", return_value=99),
+            patch("app.services.recommendation_service.get_latest_rates_by_currency", return_value=mock_rates),
+        ):
+            median = recommend_rate(mock_conn, "EUR", strategy="match_median")
+            p75 = recommend_rate(mock_conn, "EUR", strategy="match_p75")
+            guarded = recommend_rate(mock_conn, "EUR", strategy="match_p75", min_spread=0.2)
+            with self.assertRaises(ValueError):
+                recommend_rate(mock_conn, "EUR", strategy="match_p100")
+
+        self.assertEqual((median.recommended_buy, median.recommended_sell), (4.94, 5.00))
+        self.assertEqual((p75.recommended_buy, p75.recommended_sell, p75.is_fallback), (4.96, 4.98, False))
+        self.assertTrue(guarded.is_fallback)
+        self.assertEqual(guarded.strategy_used, "fallback_match_median")
+        self.assertEqual((guarded.recommended_buy, guarded.recommended_sell), (4.94, 5.00))
+
 
 if __name__ == "__main__":
     unittest.main()
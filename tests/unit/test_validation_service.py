@@ -1,7 +1,7 @@
 from unittest.mock import MagicMock, patch
 
 from app.models.exchange_rate import ExchangeRate
-from app.services.validation_service import validate_rate
+from app.services.validation_service import validate_rate, validate_rates
 
 
 def test_validate_rate_no_baseline():
@@ -25,3 +25,19 @@ def test_validate_rate_exceeds_threshold():
         # 5% change (exceeds 3% threshold)
         rate = ExchangeRate(currency="EUR", buy=5.25, sell=5.25, timestamp="2026-08-01T00:00:00Z")
         assert validate_rate(conn, 1, rate, max_deviation_pct=0.03) is False
+
+def test_validate_rates_splits_batch_with_one_lookup():
+    conn = MagicMock()
+    latest = {(1, "EUR"): (5.0, 5.0), (2, "EUR"): (5.0, 0.0)}
+    ok = (1, ExchangeRate(currency="EUR", buy=5.05, sell=5.05, timestamp="2026-08-01T00:00:00Z"))
+    jump = (1, ExchangeRate(currency="eur", buy=5.25, sell=5.0, timestamp="2026-08-01T00:00:00Z"))
+    zero_prev = (2, ExchangeRate(currency="EUR", buy=5.0, sell=9.0, timestamp="2026-08-01T00:00:00Z"))
+    first = (3, ExchangeRate(currency="USD", buy=4.5, sell=4.6, timestamp="2026-08-01T00:00:00Z"))
+
+    with patch("app.services.validation_service.get_latest_rates_for_keys", return_value=latest) as lookup:
+        accepted, rejected = validate_rates(conn, [ok, jump, zero_prev, first], max_deviation_pct=0.03)
+
+    lookup.assert_called_once()
+    assert sorted(lookup.call_args.args[1]) == [(1, "EUR"), (2, "EUR"), (3, "USD")]
+    assert accepted == [ok, zero_prev, first]
+    assert rejected == [jump]
@@ -1,5 +1,7 @@
 from pathlib import Path
+from unittest.mock import MagicMock
 
+from app.scrapers import valutare_scraper
 from app.scrapers.valutare_scraper import parse_html
 
 
@@ -24,3 +26,19 @@ def test_parse_valutare_html():
     assert r2.entity.city == "Cluj-Napoca"
     assert r2.rate.buy == 4.9450
     assert r2.rate.sell == 4.9750
+
+
+def test_scrape_page_builds_records_from_in_page_rows(monkeypatch):
+    driver = MagicMock()
+    driver.execute_script.return_value = [
+        {"name": "Casa de Schimb Lux", "city": "Bucuresti", "buy": "4.9500 RON", "sell": "4.9700 RON"},
+        {"name": "Fara Curs", "city": "Iasi", "buy": "", "sell": "4.9800 RON"},
+    ]
+    monkeypatch.setattr(valutare_scraper, "load_page", lambda driver, currency: None)
+
+    records = valutare_scraper.scrape_page(driver, "EUR", extraction_mode="script")
+
+    driver.execute_script.assert_called_once()
+    assert len(records) == 1
+    assert records[0].entity.name == "Casa de Schimb Lux"
+    assert records[0].rate.buy == 4.9500
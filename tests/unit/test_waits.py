@@ -0,0 +1,106 @@
+import time
+from functools import partial
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.scrapers import bnr_scraper, valutare_scraper
+from app.scrapers.waits import (
+    MAX_WAIT_TIMINGS,
+    get_wait_timings,
+    reset_wait_timings,
+    wait_until_stable,
+)
+
+
+def _sequence(*values):
+    """Probe that returns each value in turn, then keeps returning the last one."""
+    remaining = list(values)
+
+    def probe():
+        return remaining.pop(0) if len(remaining) > 1 else remaining[0]
+
+    return probe
+
+
+def test_wait_returns_once_value_settles():
+    reset_wait_timings()
+    start = time.monotonic()
+
+    value = wait_until_stable(
+        _sequence(0, 3, 7, 7), name="rows", timeout=5, settle=0.05, poll_interval=0.01
+    )
+
+    assert value == 7
+    assert time.monotonic() - start < 1
+    [timing] = get_wait_timings()
+    assert timing.name == "rows"
+    assert not timing.timed_out
+
+
+def test_wait_times_out_without_raising():
+    reset_wait_timings()
+
+    value = wait_until_stable(lambda: 0, name="empty", timeout=0.1, poll_interval=0.01)
+
+    assert value == 0
+    [timing] = get_wait_timings()
+    assert timing.timed_out
+    assert timing.elapsed >= 0.1
+
+
+def test_wait_can_raise_on_timeout():
+    reset_wait_timings()
+
+    with pytest.raises(TimeoutError, match="select"):
+        wait_until_stable(lambda: "old", name="select", ready=lambda text: text != "old", timeout=0.05, raise_on_timeout=True)
+
+    [timing] = get_wait_timings()
+    assert timing.timed_out
+
+
+def test_only_the_latest_timings_are_kept():
+    reset_wait_timings()
+
+    for i in range(MAX_WAIT_TIMINGS + 5):
+        wait_until_stable(lambda: 1, name=f"wait_{i}", settle=0)
+
+    timings = get_wait_timings()
+    assert len(timings) == MAX_WAIT_TIMINGS
+    assert timings[-1].name == f"wait_{MAX_WAIT_TIMINGS + 4}"
+    reset_wait_timings()
+
+
+def test_bnr_currency_switch_that_never_redraws_raises(monkeypatch):
+    monkeypatch.setattr(bnr_scraper, "table_text", lambda driver: "EUR 4.97")
+    monkeypatch.setattr(bnr_scraper, "wait_until_stable", partial(wait_until_stable, timeout=0.05))
+    select = MagicMock()
+    select.first_selected_option.get_attribute.return_value = "EUR"
+    monkeypatch.setattr(bnr_scraper, "Select", lambda element: select)
+
+    with pytest.raises(TimeoutError, match="bnr_select_USD"):
+        bnr_scraper.fetch_page_source(MagicMock(), "USD")
+
+
+def test_wait_for_change_ignores_initial_value():
+    value = wait_until_stable(
+        _sequence("old", "old", "new"),
+        name="select",
+        ready=lambda text: text != "old",
+        timeout=5,
+        settle=0,
+        poll_interval=0.01,
+    )
+
+    assert value == "new"
+
+
+def test_handle_lazy_loading_stops_when_rows_stop_growing(monkeypatch):
+    counts = iter([10, 10, 20, 20, 20, 20, 20, 20])
+    monkeypatch.setattr(valutare_scraper, "row_count", lambda driver: next(counts))
+    monkeypatch.setattr(valutare_scraper, "SCROLL_WAIT_SECONDS", 0.05)
+    driver = MagicMock()
+
+    valutare_scraper.handle_lazy_loading(driver)
+
+    assert driver.execute_script.call_count == 2